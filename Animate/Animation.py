@@ -1,6 +1,9 @@
 from __future__ import print_function, division, unicode_literals
 
-import copy
+import math
+import warnings
+
+import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.animation import TimedAnimation
@@ -8,16 +11,70 @@ from matplotlib.gridspec import GridSpec
 from matplotlib.lines import Line2D
 import matplotlib.patches as patches
 
+from .compositor import Compositor, compositor_support
+from .decimate import MinMaxPyramid, decimate_trace
+from .FrameSource import BinnedSource
+from .lut import ColorizedSource, make_lut
+from .pipeline import PipelinedWriter
+from .progress import timer
+from .sprites import SpriteCache, SpriteText, format_labels
+from .static_layer import StaticLayer
+from .styles import style_context
+
+# acquired (and released) around the writer of Animation.render, e.g. to limit the encoders running at once (see
+# batch.render_many), None for no limit
+writer_slots = None
+
+
+def frame_range(movie):
+    """ All the frame indices of a movie, as used by Animation.new_frame_seq
+
+    :param movie: Movie instance
+    :return: range of frame indices
+    """
+    if len(movie.images) == 0:
+        raise RuntimeError('At least one image is needed')
+    img = movie.images[0]
+    if img['animation_type'] == 'movie':
+        return range(img['data'].shape[0])
+    elif img['animation_type'] == 'window':
+        length = img['data'].shape[1] - img['window_size']
+        return range(0, length, img['window_step'])
+
+
+def select_frames(movie, frames=None):
+    """ Frame indices to render
+
+    :param movie: Movie instance
+    :param frames: None for all frames, a slice of frame_range(movie) (e.g. slice(100, 500, 10)) or a sequence of
+     frame indices
+    :return: range or list of frame indices
+    """
+    all_frames = frame_range(movie)
+    if frames is None:
+        return all_frames
+    if isinstance(frames, slice):
+        return all_frames[frames]
+    frames = list(frames)
+    valid = set(all_frames)
+    for frame in frames:
+        if frame not in valid:
+            raise ValueError('Frame %s is not a frame of the movie: %s' % (frame, all_frames))
+    return frames
+
 
 class Animation(TimedAnimation):
     """
 
     """
 
-    def __init__(self, movie, fps=1):
+    def __init__(self, movie, fps=1, frames=None, interpolation=None):
         """
 
         :param movie:
+        :param frames: frame indices to animate (a contiguous range or a sub-sequence of frame_range(movie)),
+         None for all frames
+        :param interpolation: interpolation of all the images (e.g. 'nearest'), None for the one of their style
         """
         self.x_data = None
         self.movie = movie
@@ -25,6 +82,19 @@ class Animation(TimedAnimation):
         if self.n_images == 0:
             raise RuntimeError('At least one image is needed')
         self.n_axes = len(movie.axes)
+        if frames is None:
+            frames = frame_range(movie)
+        self.frames = frames
+        self.interpolation = interpolation
+        # dpi of the frames while rendering, None for the figure dpi (see _output_scale)
+        self.render_dpi = None
+        # Compositor drawing the images while rendering with the numpy backend
+        self.compositor = None
+        # MinMaxPyramid of the traces of scrolling axes, by trace index
+        self._pyramids = {}
+        # strings of the labels by frame, by label index, and the glyphs they are drawn from
+        self._label_strings = {}
+        self.text_sprites = SpriteCache()
         self._make_x_data()
         # figure
         if movie.fig_kwargs is not None:
@@ -36,11 +106,17 @@ class Animation(TimedAnimation):
         TimedAnimation.__init__(self, self.fig, interval=1.0 / fps * 1000, blit=True)
 
     def _init_labels(self):
-        for label in self.movie.labels:
+        for i, label in enumerate(self.movie.labels):
             ax = self.img_axes[label['axis']]
-            l = ax.text(label['x'], label['y'], '', size=label['size'],
-                        transform=ax.transAxes, **label['kwargs'])
+            # like ax.text, drawn from the glyphs in text_sprites
+            l = SpriteText(label['x'], label['y'], '', self.text_sprites, verticalalignment='baseline',
+                           horizontalalignment='left', clip_on=False)
+            l.update(dict(size=label['size'], transform=ax.transAxes, **label['kwargs']))
+            ax.add_artist(l)
+            l.set_clip_path(ax.patch)
             self.labels.append(l)
+            if i not in self._label_strings:
+                self._label_strings[i] = format_labels(label['s_format'], label['values'], self.frames)
 
     def _init_annotations(self):
         for annotation in self.movie.annotations:
@@ -66,6 +142,8 @@ class Animation(TimedAnimation):
                 an = ax.annotate(annotation['text_array'][0], xy=annotation['xy_array'][0],
                                  xytext=annotation['xy_text_array'][0], **annotation['kwargs'])
                 self.var_annotations.append((an, annotation))
+            elif annotation['type'] == 'points':
+                self.point_overlays.append((self._init_points(ax, annotation), annotation))
             elif annotation['type'] == 'rectangle':
                 r = patches.Rectangle(xy=annotation['xy'], width=annotation['width'], height=annotation['height'],
                                       angle=annotation['angle'], **annotation['kwargs'])
@@ -79,10 +157,10 @@ class Animation(TimedAnimation):
         for i, axis in enumerate(self.movie.axes):
             axis['legend_handles'] = []
             # set correct style
-            with plt.style.context(axis['style'], after_reset=True):
+            with style_context(axis['style']) as rc:
 
                 # get the color cycle
-                colors = plt.style.library[axis['style']].get('axes.prop_cycle')
+                colors = rc['axes.prop_cycle']
                 colors = list(map(lambda x: x['color'], list(colors)))
                 ax = self.fig.add_subplot(self.gs[i + 1, :], **axis['kwargs'])
                 self.trace_axes.append(ax)
@@ -97,19 +175,30 @@ class Animation(TimedAnimation):
                 trace_index = np.where(trace_axis == i)[0]
                 if len(trace_index) == 0:
                     raise RuntimeError('Axis %d with no traces' % i)
+                n_bins = self._decimation_bins(ax, axis['decimate'])
+                scroll_lines = []
                 all_data = []
                 for j, index in enumerate(trace_index):
                     trace = self.movie.traces[index]
+                    x, y = self.x_data, trace['data']
+                    if axis['scroll'] is not None:
+                        # the points of the window are set for every frame
+                        x, y = [], []
+                    elif n_bins is not None:
+                        x, y = decimate_trace(x, y, n_bins)
                     if 'color' in trace['kwargs']:
-                        line = Line2D(self.x_data, trace['data'], **trace['kwargs'])
+                        line = Line2D(x, y, **trace['kwargs'])
                     else:
                         # use the default from the color cycle
-                        line = Line2D(self.x_data, trace['data'], color=colors[j], **trace['kwargs'])
+                        line = Line2D(x, y, color=colors[j], **trace['kwargs'])
                     if 'label' in trace['kwargs']:
                         axis['legend_handles'].append(line)
                     ax.add_line(line)
-                    all_data.append(copy.deepcopy(trace['data']))
+                    # the limits are from the full trace, without copying it (memory mapped traces stay on disk)
+                    all_data.append(np.asarray(trace['data']))
                     self.traces.append(line)
+                    if axis['scroll'] is not None:
+                        scroll_lines.append((line, self._trace_pyramid(index)))
                 if len(all_data) > 1:
                     all_data = np.concatenate(all_data)
                 else:
@@ -123,8 +212,10 @@ class Animation(TimedAnimation):
                 else:
                     y_min, y_max = self.movie.get_ylim(axis['ylim_type'], axis['ylim_value'], all_data)
                 ax.set_ylim(y_min, y_max)
-                if axis['tight_x']:
-                    ax.set_xlim([min(self.x_data), max(self.x_data)])
+                if axis['scroll'] is not None:
+                    self.scroll_axes.append((ax, float(axis['scroll']), n_bins, scroll_lines))
+                elif axis['tight_x']:
+                    ax.set_xlim([np.min(self.x_data), np.max(self.x_data)])
                 if len(axis['legend_handles']) > 0:
                     ax.legend(handles=axis['legend_handles'], **axis['legend_kwargs'])
                 # running line
@@ -135,33 +226,157 @@ class Animation(TimedAnimation):
                         ax.add_line(run_line)
                         self.running_lines.append(run_line)
                     else:
-                        patch_x = (movie['window_size'] // 2 * -1 - 1) * self.movie.dt
-                        r = patches.Rectangle(xy=(patch_x, y_min), width=movie['window_size'] * self.movie.dt,
+                        r = patches.Rectangle(xy=(self.x_data[0], y_min), width=movie['window_size'] * self.movie.dt,
                                               height=y_max - y_min, angle=0, **axis['running_line'])
                         ax.add_patch(r)
                         self.running_lines.append(r)
 
+    def _trace_pyramid(self, index):
+        """ MinMaxPyramid of a trace, made once per animation (_init_draw runs again before rendering) """
+        if index not in self._pyramids:
+            self._pyramids[index] = MinMaxPyramid(self.movie.traces[index]['data'])
+        return self._pyramids[index]
+
+    def _scroll(self, frame):
+        """ Move the x window of the scrolling trace axes to a frame and set the points of their traces
+
+        :return: the artists that changed
+        """
+        changed = []
+        image = self.movie.images[0]
+        center = self.x_data[frame]
+        if image['animation_type'] == 'window':
+            # the middle of the running rectangle
+            center += image['window_size'] * self.movie.dt / 2
+        for ax, duration, n_bins, lines in self.scroll_axes:
+            x_min, x_max = center - duration / 2, center + duration / 2
+            # one point past each side so the line reaches the edges of the axis
+            start = max(np.searchsorted(self.x_data, x_min) - 1, 0)
+            stop = min(np.searchsorted(self.x_data, x_max, side='right') + 1, len(self.x_data))
+            for line, pyramid in lines:
+                if n_bins is None:
+                    line.set_data(self.x_data[start:stop], np.asarray(pyramid.data[start:stop]))
+                else:
+                    index, values = pyramid.window(start, stop, n_bins)
+                    line.set_data(self.x_data[index], values)
+                changed.append(line)
+            ax.set_xlim(x_min, x_max)
+            # the ticks move with the window
+            changed.append(ax.xaxis)
+        return changed
+
+    def _decimation_bins(self, ax, decimate):
+        """ Number of buckets to decimate the traces of an axis to
+
+        :param ax: trace axis
+        :param decimate: True for two buckets per pixel of the axis width, a number of buckets, or False
+        :return: number of buckets or None to draw the full traces
+        """
+        if decimate is False:
+            return None
+        if decimate is True:
+            return 2 * int(math.ceil(ax.get_window_extent().width * self._output_scale()))
+        return int(decimate)
+
+    def _output_scale(self):
+        """ Pixels of the saved frames per pixel of the canvas: the stock writers save through savefig at the dpi of
+        render without changing the figure dpi the axes are laid out with
+        """
+        if self.render_dpi is None:
+            return 1.0
+        return float(self.render_dpi) / self.fig.dpi
+
     def _init_images(self):
         for i, image in enumerate(self.movie.images):
-            with plt.style.context(image['style'], after_reset=True):
+            with style_context(image['style']):
                 ax = self.fig.add_subplot(self.gs[0, i])
                 self.img_axes.append(ax)
+                source = image['source']
+                window = image['animation_type'] == 'window'
+                factors = self._display_factors(ax, image) if image['downsample'] else (1, 1)
+                binned = factors != (1, 1)
+                if binned:
+                    source = BinnedSource(source, factors[0], factors[1], image['downsample'], window)
+                # uncolored frames, for the compositor
+                self.panel_sources.append(source)
+                if image['lut']:
+                    # colored windows are kept as a strip of the source columns, they are binned after coloring
+                    bin_colors = binned and window
+                    # color the frames a batch at a time with the colormap of the style, the images get RGBA data
+                    source = ColorizedSource(source.source if bin_colors else source, make_lut(plt.get_cmap()),
+                                             image['ymin'], image['ymax'], image['lut_batch'], image['is_rgb'])
+                    if bin_colors:
+                        source = BinnedSource(source, factors[0], factors[1], image['downsample'], window)
+                self.frame_sources.append(source)
+                extent = None
+                if binned:
+                    # the binned pixels cover the data pixels they come from, in data coordinates
+                    rows, columns = self._image_size(image)
+                    extent = (-0.5, -(-columns // factors[1]) * factors[1] - 0.5,
+                              -(-rows // factors[0]) * factors[0] - 0.5, -0.5)
+                    if mpl.rcParams['image.origin'] == 'lower':
+                        extent = extent[:2] + extent[2:][::-1]
                 if image['animation_type'] == 'movie':
-                    im = ax.imshow(image['data'][0, :, :], animated=True, vmin=image['ymin'],
-                                   vmax=image['ymax'])
+                    im = ax.imshow(source.get_frame(0), animated=True, vmin=image['ymin'], vmax=image['ymax'],
+                                   extent=extent)
                 elif image['animation_type'] == 'window':
-                    if image['is_rgb']:
-                        im = ax.imshow(image['data'][:, :image['window_size'], :], animated=True, vmin=image['ymin'],
-                                       vmax=image['ymax'])
-                    else:
-                        im = ax.imshow(image['data'][:, :image['window_size']], animated=True, vmin=image['ymin'],
-                                       vmax=image['ymax'])
+                    im = ax.imshow(source.get_window(0, image['window_size']), animated=True,
+                                   vmin=image['ymin'], vmax=image['ymax'], extent=extent)
                     ax.set_aspect('auto')
+                if binned:
+                    # the limits of the full resolution image, the edge blocks can extend past them
+                    ax.set_xlim(-0.5, columns - 0.5)
+                    ax.set_ylim((rows - 0.5, -0.5) if extent[2] > extent[3] else (-0.5, rows - 0.5))
+                if self.interpolation is not None:
+                    im.set_interpolation(self.interpolation)
                 self.images.append(im)
                 if image['c_title'] is not None:
-                    with plt.style.context(image['c_style'], after_reset=True):
+                    with style_context(image['c_style']):
                         plt.colorbar(im, ax=ax, label=image['c_title'])
 
+    @staticmethod
+    def _image_size(image):
+        """ Rows and columns of the frames (windows) of an image """
+        if image['animation_type'] == 'movie':
+            return image['data'].shape[1], image['data'].shape[2]
+        return image['data'].shape[0], image['window_size']
+
+    def _display_factors(self, ax, image):
+        """ Rows and columns of an image binned into one pixel so it has about the resolution of its axis on the
+        canvas, never less (the figure size, dpi and layout give the size of the axis, before a colorbar takes
+        part of it)
+
+        :return: factor_y, factor_x
+        """
+        box = ax.get_window_extent()
+        rows, columns = self._image_size(image)
+        # the size of the axis in the saved frames
+        box_width, box_height = box.width * self._output_scale(), box.height * self._output_scale()
+        if image['animation_type'] == 'movie' and mpl.rcParams['image.aspect'] == 'equal':
+            # the image keeps its aspect inside the axis
+            scale = min(box_width / columns, box_height / rows)
+            width, height = columns * scale, rows * scale
+        else:
+            width, height = box_width, box_height
+        return max(int(rows // max(height, 1)), 1), max(int(columns // max(width, 1)), 1)
+
+    def _init_points(self, ax, points):
+        """ scatter collection of a point overlay, the limits of the axis are kept """
+        limits = ax.get_xlim(), ax.get_ylim()
+        kwargs = dict(points['kwargs'])
+        frame = self.frames[0] if len(self.frames) > 0 else 0
+        n_points = points['xy'].shape[1]
+        if points['sizes'] is not None:
+            kwargs['s'] = points['sizes'][frame] if points['sizes_per_frame'] else points['sizes']
+        if points['colors'] is not None:
+            kwargs['c'] = points['colors'][frame] if points['colors_per_frame'] else points['colors']
+        # scatter drops the NaN points (and their sizes and colors), the offsets are set afterwards
+        collection = ax.scatter(np.zeros(n_points), np.zeros(n_points), **kwargs)
+        collection.set_offsets(points['xy'][frame])
+        ax.set_xlim(limits[0])
+        ax.set_ylim(limits[1])
+        return collection
+
     def _make_x_data(self):
         # for now we assume that either all animation types are 'movie' or 'window'
         movie = self.movie.images[0]
@@ -182,23 +397,18 @@ class Animation(TimedAnimation):
             self.x_data = (np.arange(length) - window_length // 2) * self.movie.dt
 
     def _draw_frame(self, frame):
-        print(frame, end=', ')
         drawn_artist = []
-        # images
-        for im, image in zip(self.images, self.movie.images):
-            if image['animation_type'] == 'movie':
-                im.set_array(image['data'][frame, :, :])
-            elif image['animation_type'] == 'window':
-                start = frame
-                stop = frame + image['window_size']
-                if image['is_rgb']:
-                    im.set_array(image['data'][:, start:stop, :])
-                else:
-                    im.set_array(image['data'][:, start:stop])
+        # images, the compositor takes the frames from the sources itself
+        for im, image, source in zip(self.images, self.movie.images, self.frame_sources):
+            if self.compositor is None:
+                if image['animation_type'] == 'movie':
+                    im.set_array(source.get_frame(frame))
+                elif image['animation_type'] == 'window':
+                    im.set_array(source.get_window(frame, frame + image['window_size']))
             drawn_artist.append(im)
         # labels
-        for label, data in zip(self.labels, self.movie.labels):
-            label.set_text(data['s_format'] % data['values'][frame])
+        for i, label in enumerate(self.labels):
+            label.set_text(self._label_strings[i][frame])
             drawn_artist.append(label)
         # var_annotations
         for annotation_handle, annotation_data in self.var_annotations:
@@ -207,30 +417,165 @@ class Animation(TimedAnimation):
             annotation_handle.set_text(annotation_data['text_array'][frame])
             drawn_artist.append(annotation_handle)
 
+        # point overlays: Agg skips the NaN offsets of missing points
+        for collection, points in self.point_overlays:
+            collection.set_offsets(points['xy'][frame])
+            if points['sizes_per_frame']:
+                collection.set_sizes(points['sizes'][frame])
+            if points['colors_per_frame']:
+                colors = points['colors'][frame]
+                if np.ndim(colors) == 1:
+                    collection.set_array(np.asarray(colors))
+                else:
+                    collection.set_facecolor(colors)
+            drawn_artist.append(collection)
         # running lines
         if self.n_axes > 0:
+            drawn_artist.extend(self._scroll(frame))
             for line in self.running_lines:
                 y_limits = line.axes.get_ylim()
                 if self.movie.images[0]['animation_type'] == 'movie':
                     line.set_data([self.x_data[frame], self.x_data[frame]], [y_limits[0], y_limits[1]])
                 else:
-                    x, y = line.xy
-                    x += self.movie.images[0]['window_step'] * self.movie.dt
-                    line.xy = (x, y)
-                    # x_loc = self.x_data[frame] + self.movie.images[0]['window_size'] // 2
-                    # line.set_data([x_loc, x_loc], [y_limits[0], y_limits[1]])
+                    # position from the frame index so animations that start mid-movie are correct
+                    line.set_x(self.x_data[frame])
                 drawn_artist.append(line)
         self._drawn_artists = drawn_artist
 
     def new_frame_seq(self):
-        if self.movie.images[0]['animation_type'] == 'movie':
-            return iter(range(self.movie.images[0]['data'].shape[0]))
-        elif self.movie.images[0]['animation_type'] == 'window':
-            img = self.movie.images[0]
-            length = img['data'].shape[1] - img['window_size']
-            return iter(range(0, length, img['window_step']))
+        return iter(self.frames)
+
+    def render(self, path, writer, dpi=None, savefig_kwargs=None, progress=None, cache_static=False,
+               backend='matplotlib', resize='nearest', pipeline=None):
+        """ Save the animation by updating and drawing every frame once. Unlike TimedAnimation.save the canvas is
+        not redrawn after each update, the writer draws it when it grabs the frame.
+
+        :param path: full path of the output file
+        :param writer: a matplotlib MovieWriter instance
+        :param dpi: dpi of the saved frames, None for the figure dpi
+        :param savefig_kwargs: forwarded to writer.grab_frame
+        :param progress: RenderProgress that gets the timings of every frame, or None
+        :param cache_static: draw the static artists once and only the artists that change for every frame (see
+         StaticLayer), needs a writer that takes frame buffers (ffmpeg_raw)
+        :param backend: 'matplotlib' or 'numpy' to draw the frames of image only movies with the Compositor, needs a
+         writer that takes frame buffers. Movies the compositor does not support are drawn by matplotlib (with a
+         warning)
+        :param resize: resizing of the images by the compositor, 'nearest' or 'block' (block averaging)
+        :param pipeline: None or the number of frame buffers of a PipelinedWriter: the frames are encoded by a
+         thread while the next ones are drawn, needs a writer that takes frame buffers. Its stats are added to the
+         progress info
+        :return:
+        """
+        if pipeline is not None:
+            writer = PipelinedWriter(writer, pipeline)
+        if savefig_kwargs is None:
+            savefig_kwargs = {}
+        if backend not in ('matplotlib', 'numpy'):
+            raise ValueError('backend should be matplotlib or numpy got: %s' % backend)
+        # writers that take a buffer (ffmpeg_raw) are timed separately for the draw and the write
+        buffer_writer = hasattr(writer, 'write_frame')
+        if cache_static and not buffer_writer:
+            raise ValueError('cache_static needs a writer that takes frame buffers (e.g. ffmpeg_raw) got: %s' %
+                             type(writer).__name__)
+        if backend == 'numpy' and not buffer_writer:
+            raise ValueError('the numpy backend needs a writer that takes frame buffers (e.g. ffmpeg_raw) got: %s' %
+                             type(writer).__name__)
+        if self._first_draw_id is not None:
+            self.fig.canvas.mpl_disconnect(self._first_draw_id)
+            self._first_draw_id = None
+        # the frames are laid out (binning, decimation) for the dpi they are saved at
+        self.render_dpi = dpi
+        with mpl.rc_context():
+            # a tight bounding box can change the frame size between frames
+            mpl.rcParams['savefig.bbox'] = None
+            if writer_slots is not None:
+                writer_slots.acquire()
+            try:
+                with writer.saving(self.fig, path, dpi):
+                    if progress is not None:
+                        progress.start(len(self.frames), path=path, writer=type(writer).__name__, fps=writer.fps)
+                    if buffer_writer:
+                        for frame, buffer, update, draw in self.frame_buffers(cache_static, backend, resize):
+                            drawn = timer()
+                            writer.write_frame(buffer)
+                            if progress is not None:
+                                progress.frame(frame, update, draw, timer() - drawn)
+                    else:
+                        self._init_draw()
+                        for frame in self.new_frame_seq():
+                            start = timer()
+                            self._draw_frame(frame)
+                            updated = timer()
+                            writer.grab_frame(**savefig_kwargs)
+                            if progress is not None:
+                                progress.frame(frame, updated - start, None, timer() - updated)
+            finally:
+                if writer_slots is not None:
+                    writer_slots.release()
+        if progress is not None:
+            if pipeline is not None:
+                progress.info['pipeline'] = writer.stats()
+            if len(self.labels) > 0:
+                progress.info['text_sprites'] = self.text_sprites.stats()
+            progress.finish()
+
+    def frame_buffers(self, cache_static=False, backend='matplotlib', resize='nearest'):
+        """ Draw every frame on the Agg canvas (or with the Compositor) and yield its RGBA pixels. The figure is
+        drawn again from scratch when the first frame is asked for.
+
+        :param cache_static: draw the static artists once (see StaticLayer)
+        :param backend: 'matplotlib' or 'numpy' (see render)
+        :param resize: resizing of the images by the compositor
+        :return: generator of (frame index, buffer, seconds updating the artists, seconds drawing), the buffer
+         (canvas.buffer_rgba() or a compositor array) is only valid until the next frame is drawn
+        """
+        if backend not in ('matplotlib', 'numpy'):
+            raise ValueError('backend should be matplotlib or numpy got: %s' % backend)
+        if self._first_draw_id is not None:
+            # the first draw of the canvas would start the animation timer
+            self.fig.canvas.mpl_disconnect(self._first_draw_id)
+            self._first_draw_id = None
+        self._init_draw()
+        if backend == 'numpy':
+            self.compositor = self._make_compositor(resize)
+        static_layer = None
+        try:
+            for frame in self.new_frame_seq():
+                start = timer()
+                self._draw_frame(frame)
+                updated = timer()
+                if self.compositor is not None:
+                    buffer = self.compositor.draw(frame)
+                else:
+                    if cache_static:
+                        if static_layer is None:
+                            static_layer = StaticLayer(self.fig, self._drawn_artists)
+                        static_layer.draw()
+                    else:
+                        self.fig.canvas.draw()
+                    buffer = self.fig.canvas.buffer_rgba()
+                yield frame, buffer, updated - start, timer() - updated
+        finally:
+            self.compositor = None
+
+    def _make_compositor(self, resize):
+        """ Compositor of the figure, or None (with a warning) when it has to be drawn by matplotlib """
+        reason = compositor_support(self.movie)
+        if reason is None:
+            self._draw_frame(self.frames[0])
+            compositor = Compositor(self, resize)
+            reason = compositor.setup()
+            if reason is None:
+                return compositor
+        warnings.warn('the numpy backend can not draw this movie, drawing it with matplotlib: %s' % reason)
+        return None
 
     def _init_draw(self):
+        # start from an empty figure, _init_draw also runs on the first draw of the canvas. The axes are removed
+        # first so clearing the figure does not clear each of them (cla) only to drop them
+        for ax in list(self.fig.axes):
+            self.fig.delaxes(ax)
+        self.fig.clear()
         if self.n_axes > 0:
             height_ratios = (self.n_axes * self.movie.height_ratio,) + (1,) * self.n_axes
             self.gs = GridSpec(1 + self.n_axes, self.n_images, height_ratios=height_ratios)
@@ -239,15 +584,19 @@ class Animation(TimedAnimation):
             # images
         self.img_axes = []
         self.images = []
+        self.frame_sources = []
+        self.panel_sources = []
         self._init_images()
         # traces
         if self.n_axes > 0:
             self.trace_axes = []
             self.traces = []
             self.running_lines = []
+            self.scroll_axes = []
             self._init_traces()
         # annotations
         self.var_annotations = []
+        self.point_overlays = []
         self._init_annotations()
         # labels
         self.labels = []
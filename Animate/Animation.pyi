@@ -11,20 +11,25 @@ from matplotlib.text import Text
 from numpy import ndarray
 
 from Animate import Movie
+from Animate.compositor import Compositor
+from Animate.FrameSource import FrameSource
 
 
 class Animation(TimedAnimation):
     """
 
     """
-    def __init__(self, movie: Movie):
+    def __init__(self, movie: Movie, fps: float=1, frames: Union(None, range)=None):
         self.x_data: Union(None, ndarray)= None
         self.movie: Movie = movie
+        self.frames: range = frames
         self.n_images: int = 0
         self.n_axes: int = 0
         self.fig: Figure = None
         self.img_axes: List(Axis) = []
         self.images: List(AxesImage) = []
+        self.frame_sources: List(FrameSource) = []
+        self.compositor: Union(None, Compositor) = None
         self.trace_axes: List(Axis) = []
         self.traces: List(Line2D) = []
         self.running_lines: List(Line2D) = []
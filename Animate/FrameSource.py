@@ -0,0 +1,410 @@
+from __future__ import print_function, division, unicode_literals
+
+import io
+import mmap
+import os
+import struct
+
+import numpy as np
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+class FrameSource(object):
+    """ Lazy image data for Movie.add_image. Only the frames that are drawn are read.
+
+        shape, dtype: same as the equivalent numpy array
+        get_frame(i): frame i of a 3d movie (data[i])
+        get_window(start, stop): columns start:stop of a window animation (data[:, start:stop])
+        get_frames(start, stop): frames start:stop (data[start:stop]), used for batched reads
+
+    Sub classes implement get_frame and get_window, and should pickle without their data so Movies can be sent
+    to worker processes.
+    """
+    shape = None
+    dtype = None
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def get_frame(self, i):
+        raise NotImplementedError
+
+    def get_window(self, start, stop):
+        raise NotImplementedError
+
+    def get_frames(self, start, stop):
+        stop = min(stop, self.shape[0])
+        out = np.empty((max(stop - start, 0),) + tuple(self.shape[1:]), dtype=self.dtype)
+        for i in range(start, stop):
+            out[i - start] = self.get_frame(i)
+        return out
+
+
+class ArraySource(FrameSource):
+    """ Frames from an in-memory array or any object with numpy style slicing """
+
+    def __init__(self, data):
+        self.data = data
+        self.shape = tuple(data.shape)
+        self.dtype = np.dtype(data.dtype)
+
+    def get_frame(self, i):
+        return np.asarray(self.data[i])
+
+    def get_window(self, start, stop):
+        return np.asarray(self.data[:, start:stop])
+
+    def get_frames(self, start, stop):
+        return np.asarray(self.data[start:stop])
+
+
+class MemmapSource(ArraySource):
+    """ Frames from a raw binary file or a .npy file, memory mapped read only """
+
+    def __init__(self, path, dtype=None, shape=None, offset=0, order='C'):
+        """
+
+        :param path: .npy file (dtype, shape and order are read from its header) or raw binary file
+        :param dtype: dtype of a raw file
+        :param shape: shape of a raw file
+        :param offset: offset in bytes of the data in a raw file
+        :param order: 'C' or 'F' order of a raw file
+        """
+        self.path = path
+        self.offset = offset
+        self.order = order
+        if path.endswith('.npy'):
+            data = np.load(path, mmap_mode='r')
+        else:
+            if dtype is None or shape is None:
+                raise ValueError('dtype and shape are needed for a raw memory mapped file: %s' % path)
+            data = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=tuple(shape), order=order)
+        ArraySource.__init__(self, data)
+
+    @classmethod
+    def from_memmap(cls, data):
+        """ Re-open the file of a np.memmap (not a view of one) read only
+
+        :param data: np.memmap
+        :return: MemmapSource
+        """
+        order = 'F' if data.flags.f_contiguous and not data.flags.c_contiguous else 'C'
+        return cls(data.filename, data.dtype, data.shape, data.offset, order)
+
+    def __getstate__(self):
+        return {'path': self.path, 'dtype': self.dtype.str, 'shape': self.shape, 'offset': self.offset,
+                'order': self.order}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class ChunkedSource(ArraySource):
+    """ Frames from a chunked dataset (h5py.Dataset, zarr array, ...). Frames are read one chunk-aligned block at a
+    time and served from the block, so a chunk that spans several frames is read once, not once per frame.
+    """
+
+    def __init__(self, data, block=None):
+        """
+
+        :param data: dataset with shape, dtype, chunks and numpy style slicing
+        :param block: number of frames to read at once, defaults to the chunk length of the first axis
+        """
+        ArraySource.__init__(self, data)
+        if block is None:
+            chunks = getattr(data, 'chunks', None)
+            block = chunks[0] if chunks else 1
+        self.block = max(int(block), 1)
+        self._block_start = None
+        self._block_data = None
+
+    def get_frame(self, i):
+        if self._block_start is None or not self._block_start <= i < self._block_start + len(self._block_data):
+            self._block_start = i - i % self.block
+            self._block_data = np.asarray(self.data[self._block_start:self._block_start + self.block])
+        return self._block_data[i - self._block_start]
+
+
+class Hdf5Source(ChunkedSource):
+    """ Frames from a dataset in an HDF5 file, opened lazily with h5py """
+
+    def __init__(self, path, name, block=None):
+        """
+
+        :param path: HDF5 file
+        :param name: name of the dataset in the file
+        :param block: see ChunkedSource
+        """
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError('h5py is needed to read HDF5 files: %s' % path)
+        self.path = path
+        self.name = name
+        self._file = h5py.File(path, 'r')
+        ChunkedSource.__init__(self, self._file[name], block)
+
+    def __getstate__(self):
+        return {'path': self.path, 'name': self.name, 'block': self.block}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+def _bin_axis(data, factor, axis, method):
+    """ Block mean or max of factor elements along one axis, summed a strided slice at a time (the edge block has the
+    elements left) """
+    n = data.shape[axis]
+    n_blocks = -(-n // factor)
+    index = [slice(None)] * data.ndim
+
+    def take(i, stop=None):
+        index[axis] = slice(i, stop, factor if stop is None else None)
+        return tuple(index)
+
+    out = data[take(0)].astype(data.dtype if method == 'max' else np.result_type(data.dtype, np.float32))
+    for i in range(1, min(factor, n)):
+        part = data[take(i)]
+        target = out[take(0, part.shape[axis])]
+        if method == 'max':
+            np.maximum(target, part, out=target)
+        else:
+            target += part
+    if method != 'max':
+        counts = np.full(n_blocks, factor, dtype=out.dtype)
+        counts[-1] = n - (n_blocks - 1) * factor
+        shape = [1] * data.ndim
+        shape[axis] = n_blocks
+        out /= counts.reshape(shape)
+    return out
+
+
+def bin_pixels(data, factor_y, factor_x, method='mean', axis=0):
+    """ Block mean or max of factor_y x factor_x pixels. The blocks on the bottom and right edges that do not fill a
+    block reduce the pixels left, so the binned image covers the whole image.
+
+    :param data: numpy array with rows on axis and columns on axis + 1
+    :param factor_y: rows per block
+    :param factor_x: columns per block
+    :param method: 'mean' or 'max'
+    :param axis: axis of the rows, e.g. 1 for a stack of frames
+    :return: array with ceil(rows / factor_y) rows and ceil(columns / factor_x) columns, of the dtype of data
+    """
+    data = np.asarray(data)
+    dtype = data.dtype
+    if int(factor_y) > 1:
+        data = _bin_axis(data, int(factor_y), axis, method)
+    if int(factor_x) > 1:
+        data = _bin_axis(data, int(factor_x), axis + 1, method)
+    if data.dtype != dtype:
+        # integer frames (e.g. RGB windows) keep their dtype
+        data = np.round(data).astype(dtype)
+    return data
+
+
+class BinnedSource(FrameSource):
+    """ Frames of a FrameSource binned as they are read (see bin_pixels), e.g. to the resolution they are drawn at.
+    Windows are binned from their first column.
+    """
+
+    def __init__(self, source, factor_y, factor_x, method='mean', window=False):
+        """
+
+        :param source: FrameSource
+        :param factor_y: rows per block
+        :param factor_x: columns per block
+        :param method: 'mean' or 'max'
+        :param window: source of a window animation (rows, time[, channels]), its shape has the binned rows and the
+         columns of the source
+        """
+        if method not in ('mean', 'max'):
+            raise ValueError('method should be mean or max got: %s' % method)
+        self.source = source
+        self.factor_y = max(int(factor_y), 1)
+        self.factor_x = max(int(factor_x), 1)
+        self.method = method
+        shape = list(source.shape)
+        rows = 0 if window else 1
+        shape[rows] = -(-shape[rows] // self.factor_y)
+        if not window:
+            shape[2] = -(-shape[2] // self.factor_x)
+        self.shape = tuple(shape)
+        self.dtype = source.dtype
+
+    def get_frame(self, i):
+        return bin_pixels(self.source.get_frame(i), self.factor_y, self.factor_x, self.method)
+
+    def get_frames(self, start, stop):
+        return bin_pixels(self.source.get_frames(start, stop), self.factor_y, self.factor_x, self.method, axis=1)
+
+    def get_window(self, start, stop):
+        return bin_pixels(self.source.get_window(start, stop), self.factor_y, self.factor_x, self.method)
+
+
+_TIFF_DTYPES = {(1, 8): 'u1', (1, 16): 'u2', (1, 32): 'u4', (1, 64): 'u8', (2, 8): 'i1', (2, 16): 'i2',
+                (2, 32): 'i4', (2, 64): 'i8', (3, 16): 'f2', (3, 32): 'f4', (3, 64): 'f8'}
+# tag type: (struct format, size)
+_TIFF_TYPES = {1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('I', 4), 16: ('Q', 8)}
+
+
+class TiffSource(FrameSource):
+    """ Frames from an uncompressed, single channel multi-page TIFF (classic or BigTIFF) with one frame per page.
+    The offsets of all the pages are indexed once, when the source is made (or passed in), then every frame is a
+    single seek and read.
+
+    ImageJ stacks bigger than 4GB only hold the first page in the IFD chain, their other frames follow it
+    contiguously and are indexed from the number of images in the ImageJ description.
+    """
+
+    def __init__(self, path, offsets=None, frame_shape=None, dtype=None):
+        """
+
+        :param path: TIFF file
+        :param offsets: byte offset of each frame, indexed from the file if None
+        :param frame_shape: (rows, columns) of a frame, needed with offsets
+        :param dtype: numpy dtype of the pixels, needed with offsets
+        """
+        self.path = path
+        if offsets is None:
+            offsets, frame_shape, dtype = self._index(path)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.dtype = np.dtype(dtype)
+        self.frame_shape = tuple(frame_shape)
+        self.shape = (len(self.offsets),) + self.frame_shape
+        self._frame_bytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        self._file = None
+
+    def _read(self, offset, count):
+        if self._file is None:
+            self._file = io.open(self.path, 'rb')
+        self._file.seek(offset)
+        return self._file.read(count)
+
+    def get_frame(self, i):
+        data = self._read(int(self.offsets[i]), self._frame_bytes)
+        return np.frombuffer(data, dtype=self.dtype).reshape(self.frame_shape)
+
+    def get_window(self, start, stop):
+        raise NotImplementedError('TIFF stacks are 3d movies, they can not be used as window animations')
+
+    def get_frames(self, start, stop):
+        offsets = self.offsets[start:stop]
+        if len(offsets) > 1 and np.all(np.diff(offsets) == self._frame_bytes):
+            data = self._read(int(offsets[0]), self._frame_bytes * len(offsets))
+            return np.frombuffer(data, dtype=self.dtype).reshape((len(offsets),) + self.frame_shape)
+        return FrameSource.get_frames(self, start, stop)
+
+    def __getstate__(self):
+        return {'path': self.path, 'offsets': self.offsets, 'frame_shape': self.frame_shape,
+                'dtype': self.dtype.str}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @staticmethod
+    def _index(path):
+        """ Walk the IFD chain of a TIFF file
+
+        :param path: TIFF file
+        :return: offsets of the frames, frame shape and dtype
+        """
+        with io.open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            order = {b'II': '<', b'MM': '>'}.get(data[:2])
+            if order is None:
+                raise ValueError('Not a TIFF file: %s' % path)
+            version = struct.unpack(order + 'H', data[2:4])[0]
+            if version == 42:
+                offset_format, count_format, entry_size = 'I', 'H', 12
+                ifd = struct.unpack(order + 'I', data[4:8])[0]
+            elif version == 43:
+                offset_format, count_format, entry_size = 'Q', 'Q', 20
+                ifd = struct.unpack(order + 'Q', data[8:16])[0]
+            else:
+                raise ValueError('Not a TIFF file: %s' % path)
+            offset_size = struct.calcsize(offset_format)
+            count_size = struct.calcsize(count_format)
+            offsets = []
+            first = None
+            while ifd != 0:
+                n = struct.unpack(order + count_format, data[ifd:ifd + count_size])[0]
+                tags = {}
+                for j in range(n):
+                    start = ifd + count_size + j * entry_size
+                    tag, tag_type = struct.unpack(order + 'HH', data[start:start + 4])
+                    count = struct.unpack(order + offset_format, data[start + 4:start + 4 + offset_size])[0]
+                    if tag_type not in _TIFF_TYPES:
+                        continue
+                    value_format, size = _TIFF_TYPES[tag_type]
+                    value_start = start + 4 + offset_size
+                    if count * size > offset_size:
+                        value_start = struct.unpack(order + offset_format,
+                                                    data[value_start:value_start + offset_size])[0]
+                    if tag_type == 2:
+                        tags[tag] = data[value_start:value_start + count]
+                    else:
+                        tags[tag] = struct.unpack(order + '%d%s' % (count, value_format),
+                                                  data[value_start:value_start + count * size])
+                if first is None:
+                    first = tags
+                    if tags.get(259, (1,))[0] != 1:
+                        raise ValueError('Only uncompressed TIFF files are supported: %s' % path)
+                    if tags.get(277, (1,))[0] != 1:
+                        raise ValueError('Only single channel TIFF files are supported: %s' % path)
+                strip_offsets = tags[273]
+                strip_counts = tags[279]
+                if any(o + c != n_o for o, c, n_o in zip(strip_offsets, strip_counts, strip_offsets[1:])):
+                    raise ValueError('Only TIFF files with contiguous strips are supported: %s' % path)
+                offsets.append(strip_offsets[0])
+                ifd = struct.unpack(order + offset_format, data[ifd + count_size + n * entry_size:
+                                                                ifd + count_size + n * entry_size + offset_size])[0]
+        finally:
+            data.close()
+        frame_shape = (first[257][0], first[256][0])
+        key = (first.get(339, (1,))[0], first.get(258, (8,))[0])
+        if key not in _TIFF_DTYPES:
+            raise ValueError('Unsupported TIFF pixel type (sample format, bits) %s: %s' % (key, path))
+        dtype = np.dtype(order + _TIFF_DTYPES[key])
+        description = first.get(270, b'')
+        if len(offsets) == 1 and description.startswith(b'ImageJ='):
+            for line in description.decode('ascii', 'replace').splitlines():
+                if line.startswith('images='):
+                    n_images = int(line.split('=')[1])
+                    frame_bytes = int(np.prod(frame_shape)) * dtype.itemsize
+                    offsets = offsets[0] + np.arange(n_images, dtype=np.int64) * frame_bytes
+        return offsets, frame_shape, dtype
+
+
+def as_frame_source(data):
+    """ Make a FrameSource from the data given to Movie.add_image
+
+    :param data: FrameSource, numpy array (np.memmap too), chunked dataset (e.g. h5py.Dataset), or a path of a
+     .npy or .tif/.tiff file
+    :return: FrameSource
+    """
+    if isinstance(data, FrameSource):
+        return data
+    if isinstance(data, basestring):
+        extension = os.path.splitext(data)[1].lower()
+        if extension == '.npy':
+            return MemmapSource(data)
+        elif extension in ('.tif', '.tiff'):
+            return TiffSource(data)
+        else:
+            raise ValueError('Expected a .npy, .tif or .tiff file got: %s' % data)
+    if isinstance(data, np.memmap) and isinstance(data.base, mmap.mmap) and data.filename is not None:
+        return MemmapSource.from_memmap(data)
+    if not isinstance(data, np.ndarray) and getattr(data, 'chunks', None):
+        return ChunkedSource(data)
+    if not hasattr(data, 'shape'):
+        raise ValueError('Expected a numpy array or a FrameSource got: %s' % type(data))
+    return ArraySource(data)
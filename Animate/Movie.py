@@ -1,14 +1,26 @@
 from __future__ import print_function, division, unicode_literals
 
-import copy
-
 from matplotlib.animation import writers
-import matplotlib as mpl
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 
-from .Animation import Animation
+from .Animation import Animation, select_frames
+from .cache import RenderCache, render_key
+from .checkpoint import save_checkpointed
+from .FrameSource import as_frame_source
+from .gif import GifWriter
+from .outputs import MultiWriter, as_output
+from .RawPipeWriter import RawPipeWriter
 from .checks import *
+from .progress import PrintProgress, RenderProgress
+from .stats import stack_stats
+from .styles import custom_styles
+from .segments import save_segments
+
+# defaults of the draft preview (Movie.preview, Movie.save(preview=True))
+PREVIEW_STRIDE = 10
+PREVIEW_DPI = 40
 
 
 class Movie:
@@ -48,47 +60,19 @@ class Movie:
         self.labels = []
         self.annotations = []
         self.axes = []
-        self.styles = copy.deepcopy(plt.style.library)  # type: dict
+        self.style = style
+        # the style library, for the worker processes (the styles are not modified, no need to copy them)
+        self.styles = dict(plt.style.library)  # type: dict
         self._add_styles()
         if style is not None:
             plt.style.use(style)
 
     def _add_styles(self):
         """ Add 4 new styles to the original matplotlib library: dark and light versions for images and traces
+        (built once per process, see styles.custom_styles)
 
         """
-        styles = dict()
-        default = mpl.rcParamsDefault  # for light backgrounds
-        dark_background = plt.style.library['dark_background']
-
-        dark_img = copy.deepcopy(dark_background)
-        dark_img.update({u'axes.spines.top': False, u'axes.spines.right': False,
-                         u'axes.spines.bottom': False, u'axes.spines.left': False,
-                         u'axes.facecolor': (1, 1, 1, 0), u'axes.edgecolor': (1, 1, 1, 0),
-                         u'xtick.color': (1, 1, 1, 0), u'ytick.color': (1, 1, 1, 0), u'grid.alpha': 0,
-                         u'image.interpolation': 'None', u'image.cmap': 'viridis'})
-        styles[u'dark_img'] = dark_img
-
-        light_img = copy.deepcopy(default)
-        light_img.update({u'axes.spines.top': False, u'axes.spines.right': False,
-                          u'axes.spines.bottom': False, u'axes.spines.left': False,
-                          u'axes.facecolor': (1, 1, 1, 0), u'axes.edgecolor': (1, 1, 1, 0),
-                          u'xtick.color': (1, 1, 1, 0), u'ytick.color': (1, 1, 1, 0), u'grid.alpha': 0,
-                          u'image.interpolation': 'None'})
-        styles[u'light_img'] = light_img
-
-        dark_trace = copy.deepcopy(dark_background)
-        dark_trace.update({u'axes.spines.top': False, u'axes.spines.right': False, u'axes.labelsize': u'xx-large',
-                           u'axes.titlesize': u'xx-large', u'xtick.labelsize': 14, u'ytick.labelsize': 14})
-        styles[u'dark_trace'] = dark_trace
-
-        light_trace = copy.deepcopy(default)
-        light_trace.update({u'axes.spines.top': False, u'axes.spines.right': False, u'axes.labelsize': u'xx-large',
-                            u'axes.titlesize': u'xx-large', u'xtick.labelsize': 14, u'ytick.labelsize': 14})
-        styles[u'light_trace'] = light_trace
-
-        self.styles.update(styles)
-        plt.style.library.update(styles)
+        self.styles.update(custom_styles())
 
     def add_label(self, x, y, values, axis=0, s_format='%s', size=14, **kwargs):
         """
@@ -240,6 +224,52 @@ class Movie:
         self.annotations.append({'type': 'circle', 'axis': axis, 'x': x, 'y': y, 'radius': radius,
                                  'axis_type': axis_type, 'kwargs': kwargs})
 
+    def add_point_overlay(self, axis, xy, sizes=None, colors=None, axis_type='image', **kwargs):
+        """ add points that move every frame (tracked cells, keypoints, centroids) as one scatter collection that is
+        updated with one array write per frame, for thousands of points
+
+        :param axis: axis number starting at 0
+        :param xy: (frames, n, 2) x, y of the points in every frame, NaN for the points missing in a frame. Can be
+         memory mapped or the path of a .npy file (memory mapped): only the frames drawn are read
+        :param sizes: marker areas (points ** 2): None for the default, a number, (n,) per point or (frames, n) per
+         frame
+        :param colors: None for the default, a color, (n,) values or (n, 3 or 4) colors per point, or (frames, n)
+         values or (frames, n, 3 or 4) colors per frame. Values are colored by the cmap, vmin and vmax of kwargs
+        :param axis_type: 'image' for images, 'trace' for traces
+        :param kwargs: will be forwarded to plt.scatter (marker, cmap, vmin, vmax, edgecolors, alpha, ...)
+        :return:
+        """
+        check_axis(axis)
+        check_axis_type(axis_type)
+        if isinstance(xy, basestring):
+            xy = np.load(xy, mmap_mode='r')
+        if len(getattr(xy, 'shape', ())) != 3 or xy.shape[2] != 2:
+            raise ValueError('xy should be an array of shape (frames, n, 2) got: %s' % (getattr(xy, 'shape', xy),))
+        if len(self.images) == 0:
+            if len(self.traces) == 0:
+                raise RuntimeError('Can not add a point overlay when no data was added')
+            length = self.traces[0]['data'].shape[0]
+        else:
+            image = self.images[0]
+            length = image['data'].shape[0] if image['animation_type'] == 'movie' else image['data'].shape[1]
+        check_length(xy, length, 'xy')
+        n_points = xy.shape[1]
+        per_frame = {}
+        for name, value in (('sizes', sizes), ('colors', colors)):
+            if isinstance(value, basestring) or value is None or np.isscalar(value):
+                per_frame[name] = False
+                continue
+            value = np.asanyarray(value)
+            per_frame[name] = value.ndim >= 2 and value.shape[:2] == (length, n_points)
+            # a single color is a sequence of 3 or 4 numbers
+            per_point = value.shape[0] == n_points or (name == 'colors' and value.shape in ((3,), (4,)))
+            if not per_frame[name] and not per_point:
+                raise ValueError('%s should be per point (%d, ...) or per frame (%d, %d, ...) got: %s' %
+                                 (name, n_points, length, n_points, value.shape))
+        self.annotations.append({'type': 'points', 'axis': axis, 'xy': xy, 'sizes': sizes, 'colors': colors,
+                                 'sizes_per_frame': per_frame['sizes'], 'colors_per_frame': per_frame['colors'],
+                                 'axis_type': axis_type, 'kwargs': kwargs})
+
     def add_scale_bar(self, axis=0, x_offset=0, pixel_width=40, um_width='20', y=2, text_offset=1, line_kwargs=None,
                       text_kwargs=None):
         """
@@ -272,7 +302,7 @@ class Movie:
             check_dict(text_kwargs, name='text_kwargs')
             self.add_text_annotation(axis=axis, x=mid, y=y - text_offset, text=um_width + 'um', **text_kwargs)
 
-    def get_ylim(self, ylim_type, ylim_value, data):
+    def get_ylim(self, ylim_type, ylim_value, data, sample=1):
         """
 
         :param ylim_type: str:
@@ -283,33 +313,48 @@ class Movie:
         'p_both': clip to the ylim_value percentile from the bottom and top
         :param ylim_value: according to 'ylim_type'
         :param data: image or trace to work on
+        :param sample: for the percentile types, use every sample-th frame of data
         :return: tuple of min and max
         """
+        return self._get_ylim(ylim_type, ylim_value, data, sample)[:2]
+
+    def _get_ylim(self, ylim_type, ylim_value, data, sample=1):
+        """ get_ylim that also returns a bound on the error of the percentiles (see stats.stack_stats)
+
+        :return: tuple of min, max and error
+        """
         if ylim_type == 'set':
             if hasattr(ylim_value, '__len__') and len(ylim_value) == 2:
-                return ylim_value[0], ylim_value[1]
+                return ylim_value[0], ylim_value[1], 0
             else:
                 raise RuntimeError('ylim type set to set but len of ylim_value is not len 2')
         elif ylim_type == 'same':
             if len(self.images) > ylim_value:
-                return self.images[ylim_value]['ymin'], self.images[ylim_value]['ymax']
+                image = self.images[ylim_value]
+                return image['ymin'], image['ymax'], image.get('ylim_error', 0)
             else:
                 raise RuntimeError('Tried to have same y limits as %d but # of images is %d' % (ylim_value,
                                                                                                 len(self.images)))
         elif ylim_type == 'p_top':
-            return np.nanmin(data), np.nanpercentile(data, 100.0 - ylim_value)
+            stats = stack_stats(data, (100.0 - ylim_value,), sample)
+            return stats.min, stats.percentiles[100.0 - ylim_value], stats.error
         elif ylim_type == 'p_bottom':
-            return np.nanpercentile(data, ylim_value), np.nanmax(data)
+            stats = stack_stats(data, (ylim_value,), sample)
+            return stats.percentiles[ylim_value], stats.max, stats.error
         elif ylim_type == 'p_both':
-            return np.nanpercentile(data, ylim_value), np.nanpercentile(data, 100.0 - ylim_value)
+            stats = stack_stats(data, (ylim_value, 100.0 - ylim_value), sample)
+            return stats.percentiles[ylim_value], stats.percentiles[100.0 - ylim_value], stats.error
         else:
             raise RuntimeError("Expected 'p_top', 'p_bottom', 'p_both', 'set' or 'same' got: %s" % ylim_type)
 
     def add_image(self, data, animation_type='movie', style='dark_img', c_title=None, c_style='dark_background',
-                  ylim_type='p_top', ylim_value=0.1, window_size=29, window_step=1, is_rgb=False):
+                  ylim_type='p_top', ylim_value=0.1, window_size=29, window_step=1, is_rgb=False, ylim_sample=1,
+                  lut=False, lut_batch=16, downsample=None):
         """
 
-        :param data: 3d array (n, x, y) if type is movie or (x, y) if type is window
+        :param data: 3d array (n, x, y) if type is movie or (x, y) if type is window. Can also be a FrameSource,
+         a np.memmap, a chunked dataset (h5py.Dataset) or the path of a .npy or .tif file, these are read lazily
+         one frame at a time while rendering
         :param animation_type: type of movie animation. 'movie' assume a 3d movie. 'window' does a sliding window with
          window_size and window_step of a 2d array.
         :param c_title: title to put on the color bar
@@ -324,10 +369,28 @@ class Movie:
         >>> style=['dark_img', {'image.cmap': 'magma'}]
         :param window_size: size of window of the x axis of the movie to display
         :param window_step: step to advance in each frame of the animation
+        :param ylim_sample: compute the percentile limits from every ylim_sample-th frame only. Stacks bigger than a
+         few million values are read in chunks into a bounded histogram, the bound on the error of the limits is
+         kept in 'ylim_error' (0 for exact limits)
+        :param lut: if True color the frames with a lookup table of the colormap, lut_batch frames at a time, and draw
+         them as RGBA images. Faster when the image is drawn at least at its own resolution, slower when it is
+         shrunk (matplotlib colors the shrunk image). Colors can differ from the default path by one colormap step
+         for values on the edge of a step. Window animations keep the colored strip and only color the window_step
+         new columns of each frame
+        :param lut_batch: number of frames to color at once with lut
+        :param downsample: None to draw the full resolution frames, 'mean' or 'max' to bin them as they are read to
+         about the resolution of the image on the canvas (from fig_kwargs, the dpi and the layout), with the block
+         mean or max. Rows and columns of movies, rows and time columns of windows (binned after coloring with
+         lut)
         :return: Adds an image animation
         """
         if animation_type != 'movie' and animation_type != 'window':
             raise ValueError('animation type should be movie or window got: %s' % animation_type)
+        if downsample not in (None, 'mean', 'max'):
+            raise ValueError('downsample should be None, mean or max got: %s' % downsample)
+        source = as_frame_source(data)
+        if type(data) is not np.ndarray:
+            data = source
         if len(data.shape) != 3 and animation_type == 'movie':
             raise ValueError('Expected 3d numpy array when animation type is movie got: %s', data.shape)
         if len(data.shape) != 2 and animation_type == 'window' and not is_rgb:
@@ -340,12 +403,13 @@ class Movie:
         if (window_size & 1) != 1:
             raise ValueError('Window size must be odd got: %d' % window_size)
         img = dict()
-        img['ymin'], img['ymax'] = self.get_ylim(ylim_type, ylim_value, data)
+        img['ymin'], img['ymax'], img['ylim_error'] = self._get_ylim(ylim_type, ylim_value, data, ylim_sample)
         local_vars = locals()
         del local_vars['self']
         del local_vars['img']
         del local_vars['ylim_type']
         del local_vars['ylim_value']
+        del local_vars['ylim_sample']
         img.update(local_vars)
         self.images.append(img)
 
@@ -358,7 +422,8 @@ class Movie:
 
     def add_axis(self, x_label, y_label, style='dark_trace', running_line={'color': 'white', 'lw': 2},
                  bottom_left_ticks=True, ylim_type='p_top', ylim_value=0.1, tight_x=True,
-                 label_kwargs={'fontsize': 16}, legend_kwargs={'frameon': False}, **kwargs):
+                 label_kwargs={'fontsize': 16}, legend_kwargs={'frameon': False}, decimate=True, scroll=None,
+                 **kwargs):
         """
 
         :param x_label: x label
@@ -371,6 +436,12 @@ class Movie:
         :param running_line: if not None will display a line with the properties provided example:
          running_line = {'color': 'white', 'lw': 3}
          :param bottom_left_ticks: if True will only show the bottom left ticks of the axis
+        :param decimate: if True traces longer than twice the axis width in pixels are drawn with the min and max of
+         each half pixel only (visually lossless, drawing time independent of the trace length). A number sets the
+         number of buckets, False draws every point
+        :param scroll: None to show the whole traces, or the duration (in units of dt) of a moving x window centered
+         on the current frame. The traces are decimated from a min / max pyramid made once, so every frame draws
+         about the same number of points whatever the length and sampling rate of the traces. tight_x is ignored
         :return:
         """
         check_text(x_label, 'x_label')
@@ -381,28 +452,213 @@ class Movie:
         check_bool(tight_x, 'tight_x')
         check_dict(label_kwargs, 'label_kwargs')
         check_dict(legend_kwargs, 'legend_kwargs')
+        if not isinstance(decimate, bool):
+            check_number(decimate, 'decimate')
+        if scroll is not None:
+            check_number(scroll, 'scroll')
+            if scroll <= 0:
+                raise ValueError('scroll should be a positive duration got: %s' % scroll)
         local_vars = locals()
         del local_vars['self']
         self.axes.append(local_vars)
 
-    def save(self, path, writer_name='ffmpeg', fps=14, codec='h264'):
+    def save(self, path, writer_name='ffmpeg', fps=14, codec=None, workers=None, progress=None, report_path=None,
+             cache_static=False, frames=None, dpi=None, preview=False, backend='matplotlib', resize='nearest',
+             checkpoint=None, checkpoint_dir=None, cache=None, outputs=None, pipeline=None, writer_kwargs=None):
         """
 
         :param path: full path to save animation (path and filename without extension)
-        :param writer_name: could be 'ffmpeg' or 'imagemagick' for now
+        :param writer_name: could be 'ffmpeg', 'ffmpeg_raw' (streams the canvas buffer, no savefig per frame),
+         'gif' (GIF encoded in this process as the frames are rendered, see gif.GifWriter) or 'imagemagick'
         :param fps: frames oer second to save movie
-        :param codec: codec to use (h264 was tested to be good for power point on mac and windows)
-        :return:
+        :param codec: codec to use, defaults to h264 (h264 was tested to be good for power point on mac and windows)
+        :param workers: number of processes to render with. If > 1 the frames are split into contiguous chunks,
+         each rendered to a segment by its own process and then joined without re-encoding (ffmpeg writers only)
+        :param progress: True to print the progress (frames, fps, ETA, peak memory), or a RenderProgress instance
+         that gets the update / draw / write timings of every frame. With workers the timings arrive per segment
+        :param report_path: full path of a JSON render report (throughput, peak memory, timings of the stages)
+        :param cache_static: render the static artists (colorbars, trace lines, ticks, static annotations) once and
+         redraw only the changing ones every frame, pixel identical to a full redraw. Needs the 'ffmpeg_raw' writer
+        :param frames: frames to render: None for all, a slice (e.g. slice(100, 500, 10)) or a sequence of frame
+         indices. Labels, annotations and running lines show the values of the rendered frames
+        :param dpi: dpi of the saved frames, None for the figure dpi
+        :param preview: fast draft of the layout: every PREVIEW_STRIDE-th frame (if frames is None) at PREVIEW_DPI
+         (if dpi is None), nearest neighbor images and the intra-only mjpeg codec (if codec is None). See preview
+        :param backend: 'matplotlib' or 'numpy': draw the frames of image only movies with NumPy (lookup table
+         colormaps, nearest neighbor resizing and cached overlays and text) instead of matplotlib, close to but not
+         pixel identical with matplotlib. Needs the 'ffmpeg_raw' writer and nearest neighbor images, movies with
+         trace axes or variable annotations are drawn by matplotlib with a warning
+        :param resize: resizing of the images by the numpy backend: 'nearest' or 'block' (average the data pixels
+         of every canvas pixel when shrinking by 2 or more)
+        :param checkpoint: number of frames per segment to save a resumable render (ffmpeg writers only): segments
+         are recorded in a manifest as they are done and joined without re-encoding at the end. Saving again with
+         the same movie, data and arguments after an interruption only renders the missing segments
+        :param checkpoint_dir: directory of the segments and the manifest, defaults to the output path +
+         '.checkpoint', removed when the movie is saved
+        :param cache: directory of a render cache or a RenderCache (see cache.RenderCache). A movie saved before with
+         the same spec, data and render arguments is copied from the cache instead of rendered, if only the fps
+         changed the cached movie is remuxed without encoding the frames again (ffmpeg writers)
+        :param outputs: list of outputs to save from a single render instead of the writer_name movie: Output
+         instances or dicts with their type and arguments (see outputs.OUTPUT_TYPES), e.g.
+         [{'type': 'video', 'bitrate': 8000}, {'type': 'gif', 'step': 2}, {'type': 'stills', 'frames': [0]}].
+         Their paths are path + suffix + extension. Not with workers, checkpoint or cache
+        :param pipeline: number of frame buffers to draw ahead of the encoder: the frames are encoded by a thread
+         while the next ones are drawn (see pipeline.PipelinedWriter), the stall and queue metrics are in the
+         progress info and the report. Needs the 'ffmpeg_raw' writer or outputs
+        :param writer_kwargs: other arguments of the writer, e.g. {'palette': 'frame', 'dither': True} for 'gif' or
+         {'bitrate': 4000} for ffmpeg writers. Not with workers or checkpoint
+        :return: full path of the saved file (with the extension of the writer), or list of the files (and
+         directories of PNG frames) saved by outputs
         """
-        animation = Animation(self, fps=fps)
+        if workers is not None:
+            check_number(workers, 'workers')
+        if progress is True:
+            progress = PrintProgress()
+        elif progress is None and report_path is not None:
+            progress = RenderProgress()
+        elif progress is not None and not isinstance(progress, RenderProgress):
+            raise ValueError('progress should be True or a RenderProgress got: %s' % type(progress))
+        animation_kwargs = {}
+        if preview:
+            if frames is None:
+                frames = slice(None, None, PREVIEW_STRIDE)
+            if dpi is None:
+                dpi = PREVIEW_DPI
+            if codec is None:
+                codec = 'mjpeg'
+            animation_kwargs['interpolation'] = 'nearest'
+        if codec is None:
+            codec = 'h264'
+        frames = select_frames(self, frames)
+        if outputs is not None:
+            if (workers is not None and workers > 1) or checkpoint is not None or cache is not None:
+                raise ValueError('outputs are saved by one render, without workers, checkpoint or cache')
+            writer = MultiWriter([as_output(output) for output in outputs], fps, codec, frames)
+            animation = Animation(self, fps=fps, frames=frames, **animation_kwargs)
+            animation.render(path, writer, progress=progress, dpi=dpi, cache_static=cache_static, backend=backend,
+                             resize=resize, pipeline=pipeline)
+            if report_path is not None:
+                progress.save_report(report_path)
+            return writer.paths
         if writer_name in writers.avail:
             if 'ffmpeg' in writer_name:
                 path += '.mp4'
-            elif 'imagemagick' in writer_name:
+            elif 'imagemagick' in writer_name or writer_name == 'gif':
                 path += '.gif'
             else:
-                raise ValueError('writer_name not "ffmpeg" or "imagemagick" got: %s' % writer_name)
-            writer = writers[writer_name](fps=fps, codec=codec)
-            animation.save(path, writer=writer, savefig_kwargs={'facecolor': self.fig_color})
+                raise ValueError('writer_name not "ffmpeg", "gif" or "imagemagick" got: %s' % writer_name)
+            if writer_kwargs is None:
+                writer_kwargs = {}
+            elif (workers is not None and workers > 1) or checkpoint is not None:
+                raise ValueError('writer_kwargs are not supported with workers or checkpoint')
+            render_kwargs = {'dpi': dpi, 'cache_static': cache_static, 'backend': backend, 'resize': resize,
+                             'pipeline': pipeline}
+            if cache is not None:
+                if not isinstance(cache, RenderCache):
+                    cache = RenderCache(cache)
+                key = render_key(self, frames, writer_name, codec, animation_kwargs, render_kwargs, writer_kwargs)
+                bin_path = writers[writer_name].bin_path() if 'ffmpeg' in writer_name else None
+                fetched = cache.fetch(key, fps, path, writer_name, bin_path)
+                if fetched is not None:
+                    if progress is not None:
+                        progress.start(0, path=path, writer=writer_name, fps=fps, cache=fetched)
+                        progress.finish()
+                    if report_path is not None:
+                        progress.save_report(report_path)
+                    return path
+            if checkpoint is not None:
+                if 'ffmpeg' not in writer_name:
+                    raise ValueError('checkpoint is only supported with ffmpeg writers got: %s' % writer_name)
+                check_number(checkpoint, 'checkpoint')
+                save_checkpointed(self, path, writer_name, fps, codec, checkpoint, workers, progress, frames,
+                                  animation_kwargs, render_kwargs, checkpoint_dir)
+            elif workers is not None and workers > 1:
+                if 'ffmpeg' not in writer_name:
+                    raise ValueError('workers > 1 is only supported with ffmpeg writers got: %s' % writer_name)
+                save_segments(self, path, writer_name, fps, codec, workers, progress, frames, animation_kwargs,
+                              render_kwargs)
+            else:
+                animation = Animation(self, fps=fps, frames=frames, **animation_kwargs)
+                writer = writers[writer_name](fps=fps, codec=codec, **writer_kwargs)
+                animation.render(path, writer, savefig_kwargs={'facecolor': self.fig_color}, progress=progress,
+                                 **render_kwargs)
+            if cache is not None:
+                cache.store(key, fps, path)
+            if report_path is not None:
+                progress.save_report(report_path)
+            return path
         else:
             raise ValueError('Could not find %s in writers: %s' % (writer_name, writers.avail))
+
+    def preview(self, path, stride=PREVIEW_STRIDE, start=None, stop=None, dpi=PREVIEW_DPI, fps=14,
+                writer_name='ffmpeg_raw', **kwargs):
+        """ Save a fast draft of the movie to check the layout, styles and annotations: every stride-th frame
+        between start and stop, at a low dpi, with nearest neighbor images and the mjpeg codec
+
+        :param path: full path to save the preview (path and filename without extension)
+        :param stride: render every stride-th frame
+        :param start: first frame index (in frame_range order), None for the first
+        :param stop: stop frame index, None for the end
+        :param dpi: dpi of the preview frames
+        :param fps: frames per second
+        :param writer_name: see save
+        :param kwargs: forwarded to save (e.g. workers, progress)
+        :return: full path of the saved file
+        """
+        return self.save(path, writer_name=writer_name, fps=fps, frames=slice(start, stop, stride), dpi=dpi,
+                         preview=True, **kwargs)
+
+    def iter_frames(self, start=None, stop=None, step=None, copy=False, dpi=None, cache_static=False,
+                    backend='matplotlib', resize='nearest'):
+        """ Render the movie and yield every frame as an RGB array, to use the frames in-process without writing and
+        decoding a video. The figure is closed when the iteration ends.
+
+        >>> for rgb in movie.iter_frames(0, 100, copy=True): ...
+
+        :param start: first frame index (in frame_range order), None for the first
+        :param stop: stop frame index, None for the end
+        :param step: render every step-th frame
+        :param copy: False to yield a view of the canvas pixels, only valid until the next frame is drawn, True for
+         an array of its own
+        :param dpi: dpi of the frames, None for the figure dpi
+        :param cache_static: see save
+        :param backend: see save
+        :param resize: see save
+        :return: generator of (height, width, 3) uint8 arrays
+        """
+        frames = select_frames(self, slice(start, stop, step))
+        animation = Animation(self, frames=frames)
+        if not isinstance(animation.fig.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(animation.fig)
+        if dpi is not None and dpi != animation.fig.dpi:
+            animation.fig.set_dpi(dpi)
+        try:
+            for frame, buffer, update, draw in animation.frame_buffers(cache_static, backend, resize):
+                width, height = animation.fig.canvas.get_width_height()
+                rgb = np.frombuffer(buffer, np.uint8).reshape(height, width, 4)[:, :, :3]
+                yield rgb.copy() if copy else rgb
+        finally:
+            plt.close(animation.fig)
+
+    def iter_frame_batches(self, batch_size, start=None, stop=None, step=None, **kwargs):
+        """ Render the movie and yield the frames in batches (see iter_frames)
+
+        :param batch_size: number of frames per batch, the last batch can be smaller
+        :param start: first frame index (in frame_range order), None for the first
+        :param stop: stop frame index, None for the end
+        :param step: render every step-th frame
+        :param kwargs: forwarded to iter_frames (dpi, cache_static, backend, resize)
+        :return: generator of (n, height, width, 3) uint8 arrays
+        """
+        check_number(batch_size, 'batch_size')
+        if batch_size < 1:
+            raise ValueError('batch_size should be at least 1 got: %s' % batch_size)
+        n_frames = len(select_frames(self, slice(start, stop, step)))
+        batch = None
+        for i, rgb in enumerate(self.iter_frames(start, stop, step, copy=False, **kwargs)):
+            position = i % batch_size
+            if position == 0:
+                batch = np.empty((min(batch_size, n_frames - i),) + rgb.shape, np.uint8)
+            batch[position] = rgb
+            if position == len(batch) - 1:
+                yield batch
@@ -1,4 +1,5 @@
 from numpy import ndarray
+from Animate.FrameSource import FrameSource
 from typing import Union, List
 
 class Movie:
@@ -50,7 +51,7 @@ class Movie:
     def get_ylim(self, ylim_type: str, ylim_value: Union(tuple, float), data: ndarray):
         pass
 
-    def add_image(self, data: ndarray, style:Union(str, list), c_title: Union(None, str)=None,
+    def add_image(self, data: Union(ndarray, FrameSource, str), style:Union(str, list), c_title: Union(None, str)=None,
                   c_style: Union(list, str)='dark_background', ylim_type: str='p_top',
                   ylim_value: Union(float, tuple, list)=0.1):
         pass
@@ -0,0 +1,47 @@
+from __future__ import print_function, division, unicode_literals
+
+from matplotlib.animation import FFMpegWriter, writers
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+@writers.register('ffmpeg_raw')
+class RawPipeWriter(FFMpegWriter):
+    """ Pipe-based ffmpeg writer that draws the Agg canvas once per frame and writes its RGBA buffer straight
+    into the ffmpeg rawvideo pipe, without going through savefig.
+
+    The figure is saved as it is on the canvas: the face color is the figure patch color (set by Animation),
+    savefig keyword arguments are ignored.
+    """
+
+    def setup(self, fig, outfile, dpi=None):
+        if not isinstance(fig.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(fig)
+        if dpi is not None and dpi != fig.dpi:
+            fig.set_dpi(dpi)
+        FFMpegWriter.setup(self, fig, outfile, dpi)
+
+    @property
+    def frame_size(self):
+        """ A tuple (width, height) in pixels of a movie frame, the size of the canvas buffer """
+        return self.fig.canvas.get_width_height()
+
+    def grab_frame(self, **savefig_kwargs):
+        """ Draw the canvas and write it as the next frame
+
+        :param savefig_kwargs: ignored
+        :return:
+        """
+        self.fig.canvas.draw()
+        self.write_frame(self.fig.canvas.buffer_rgba())
+
+    def write_frame(self, buffer):
+        """ Write one frame of RGBA pixels (frame_size) to the encoder
+
+        :param buffer: object supporting the buffer protocol, e.g. canvas.buffer_rgba()
+        :return:
+        """
+        try:
+            self._proc.stdin.write(buffer)
+        except (IOError, OSError) as e:
+            out, err = self._proc.communicate()
+            raise IOError('Error saving animation to file (cause: %s) Stdout: %s StdError: %s' % (e, out, err))
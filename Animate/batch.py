@@ -0,0 +1,172 @@
+from __future__ import print_function, division, unicode_literals
+
+import multiprocessing
+import traceback
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+
+from . import Animation as animation_module
+from .Animation import select_frames
+from .checks import check_number
+from .progress import RenderProgress, timer
+from .segments import setup_worker
+
+# _EncoderSlots of the worker, set in every worker of render_many that limits the encoders
+_encoder_slots = None
+
+
+def movie_cost(movie, frames=None, dpi=None):
+    """ Estimated render cost of a movie, to schedule the longest ones first: frames times pixels per frame
+
+    :param movie: Movie instance
+    :param frames: frames to render (see Movie.save)
+    :param dpi: dpi of the frames, None for the figure dpi
+    :return: number of pixels to draw
+    """
+    fig_kwargs = movie.fig_kwargs if movie.fig_kwargs is not None else {}
+    width, height = fig_kwargs.get('figsize', mpl.rcParams['figure.figsize'])
+    if dpi is None:
+        dpi = fig_kwargs.get('dpi', mpl.rcParams['figure.dpi'])
+    return len(select_frames(movie, frames)) * width * height * dpi ** 2
+
+
+class _EncoderSlots(object):
+    """ Semaphore shared by the workers of render_many, held while a movie writer (its ffmpeg process) is open: the
+    figure set up and the limits of the next movies are done while the others are encoded. wait is the seconds waited
+    """
+
+    def __init__(self, semaphore):
+        self.semaphore = semaphore
+        self.wait = 0.0
+
+    def acquire(self):
+        start = timer()
+        self.semaphore.acquire()
+        self.wait += timer() - start
+
+    def release(self):
+        self.semaphore.release()
+
+
+def init_worker(semaphore):
+    global _encoder_slots
+    if semaphore is not None:
+        _encoder_slots = _EncoderSlots(semaphore)
+        animation_module.writer_slots = _encoder_slots
+
+
+def render_job(job, in_worker=True):
+    """ Save one movie, errors are returned in the result instead of raised
+
+    :param job: tuple of (index, movie, path, save_kwargs)
+    :param in_worker: True in a worker process: set it up for the movie and close its figures when done
+    :return: result dict (see render_many)
+    """
+    index, movie, path, save_kwargs = job
+    result = {'index': index, 'path': path, 'output': None, 'status': 'failed', 'error': None, 'traceback': None,
+              'frames': 0, 'wait': 0.0, 'seconds': 0.0}
+    start = timer()
+    try:
+        if in_worker:
+            setup_worker(movie)
+        if _encoder_slots is not None:
+            _encoder_slots.wait = 0.0
+        progress = RenderProgress()
+        result['output'] = movie.save(path, progress=progress, **save_kwargs)
+        result['frames'] = progress.done
+        result['status'] = 'done'
+    except Exception as e:
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+        result['traceback'] = traceback.format_exc()
+    finally:
+        if _encoder_slots is not None:
+            result['wait'] = _encoder_slots.wait
+        result['seconds'] = timer() - start - result['wait']
+        if in_worker:
+            plt.close('all')
+    return result
+
+
+def format_result(result, n_movies):
+    if result['status'] == 'done':
+        return 'movie %d/%d %s: %d frames in %.1f s' % (result['index'] + 1, n_movies, result['output'],
+                                                        result['frames'], result['seconds'])
+    return 'movie %d/%d %s: failed, %s' % (result['index'] + 1, n_movies, result['path'], result['error'])
+
+
+def render_many(movies, workers=None, max_encoders=None, progress=False, **save_kwargs):
+    """ Save many movies with a pool of processes, a whole movie per process. The movies are started longest first
+    (frames times frame pixels) so the last ones to finish are short, and a movie that fails does not stop the others.
+
+    >>> results = render_many([(movie_a, 'a'), (movie_b, 'b', {'fps': 30})], workers=4, writer_name='ffmpeg_raw')
+    >>> failed = [r for r in results if r['status'] == 'failed']
+
+    :param movies: list of (movie, path) or (movie, path, save_kwargs) with the path without extension as in
+     Movie.save and keyword arguments of Movie.save for that movie only
+    :param workers: number of processes, defaults to the number of cpus. 1 saves the movies in this process
+    :param max_encoders: maximal number of movies encoded (open writers, ffmpeg processes) at once, None for
+     workers. The other workers set up their next movie meanwhile and wait for an encoder to write its frames
+    :param progress: True to print a line when a movie is done or failed, or a function called with every result
+    :param save_kwargs: keyword arguments of Movie.save for all the movies (writer_name, fps, codec, dpi, ...), the
+     progress and workers of Movie.save are set by render_many
+    :return: list of results in the order of movies, dicts with:
+        index: position in movies
+        path: path given, output: path of the saved file (None if it failed)
+        status: 'done' or 'failed', error: the error message and traceback: its traceback (None if done)
+        frames: number of frames saved
+        wait: seconds waiting for an encoder, seconds: seconds to save the movie (without the wait)
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    check_number(workers, 'workers')
+    if workers < 1:
+        raise ValueError('workers should be at least 1 got: %s' % workers)
+    if max_encoders is not None:
+        check_number(max_encoders, 'max_encoders')
+        if max_encoders < 1:
+            raise ValueError('max_encoders should be at least 1 got: %s' % max_encoders)
+    jobs = []
+    costs = []
+    for index, item in enumerate(movies):
+        movie, path = item[0], item[1]
+        kwargs = dict(save_kwargs)
+        if len(item) > 2:
+            kwargs.update(item[2])
+        for name in ('progress', 'workers'):
+            if name in kwargs:
+                raise ValueError('%s of Movie.save is set by render_many' % name)
+        jobs.append((index, movie, path, kwargs))
+        try:
+            costs.append(movie_cost(movie, kwargs.get('frames'), kwargs.get('dpi')))
+        except Exception:
+            # fails again when it is rendered, with the error in its result
+            costs.append(0)
+    order = sorted(range(len(jobs)), key=lambda i: -costs[i])
+    jobs = [jobs[i] for i in order]
+
+    results = [None] * len(jobs)
+
+    def report(result):
+        results[result['index']] = result
+        if progress is True:
+            print(format_result(result, len(jobs)))
+        elif progress:
+            progress(result)
+
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            report(render_job(job, in_worker=False))
+        return results
+    n_processes = min(workers, len(jobs))
+    semaphore = None
+    if max_encoders is not None and max_encoders < n_processes:
+        semaphore = multiprocessing.Semaphore(max_encoders)
+    pool = multiprocessing.Pool(processes=n_processes, initializer=init_worker, initargs=(semaphore,))
+    try:
+        for result in pool.imap_unordered(render_job, jobs, chunksize=1):
+            report(result)
+    finally:
+        pool.close()
+        pool.join()
+    return results
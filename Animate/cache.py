@@ -0,0 +1,166 @@
+from __future__ import print_function, division, unicode_literals
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from .checkpoint import movie_key
+
+# default size of a render cache
+MAX_BYTES = 2 * 2 ** 30
+
+
+def render_key(movie, frames, writer_name, codec, animation_kwargs, render_kwargs, writer_kwargs=None):
+    """ Cache key of the frames of a saved movie: the Movie spec (images, traces, axes, labels, annotations, styles,
+    fig_kwargs, dt), a fingerprint of its data (see movie_key, every frame of the arrays is hashed) and the render
+    arguments. It is the same in every process, so a script or notebook run again finds its movies. fps is not part
+    of it, a movie saved at another fps is remuxed
+    """
+    # the pipeline does not change the frames
+    render_kwargs = dict((k, v) for k, v in render_kwargs.items() if k != 'pipeline')
+    return movie_key(movie, ([int(f) for f in frames], writer_name, codec, animation_kwargs, render_kwargs,
+                             writer_kwargs))
+
+
+def remux_fps(source, path, fps, source_fps, bin_path):
+    """ Copy a movie to another frame rate without encoding the frames again (ffmpeg -itsscale)
+
+    :param source: movie file
+    :param path: output file
+    :param fps: frames per second of the output
+    :param source_fps: frames per second of the source
+    :param bin_path: ffmpeg executable
+    :return:
+    """
+    command = [bin_path, '-y', '-loglevel', 'error', '-itsscale', repr(float(source_fps) / fps), '-i', source,
+               '-c', 'copy', path]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError('Could not remux %s into %s: %s' % (source, path, err.decode('utf-8', 'replace')))
+
+
+class RenderCache(object):
+    """ On-disk cache of saved movies, see Movie.save(cache=...). Entries are files named by the render_key and
+    the fps, the least recently used ones are removed when the cache is larger than max_bytes.
+
+        directory/<render_key>/<fps>.mp4
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        """
+
+        :param directory: directory of the cache, made if needed
+        :param max_bytes: size of the cache
+        """
+        if max_bytes <= 0:
+            raise ValueError('max_bytes should be positive got: %s' % max_bytes)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key, fps, extension):
+        return os.path.join(self.directory, key, '%r%s' % (float(fps), extension))
+
+    def entries(self, key=None):
+        """ Cached files, of one key or all
+
+        :return: list of (path, key, fps)
+        """
+        keys = [key] if key is not None else os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        entries = []
+        for key in keys:
+            key_directory = os.path.join(self.directory, key)
+            if not os.path.isdir(key_directory):
+                continue
+            for name in os.listdir(key_directory):
+                try:
+                    fps = float(os.path.splitext(name)[0])
+                except ValueError:
+                    # a file being stored
+                    continue
+                entries.append((os.path.join(key_directory, name), key, fps))
+        return entries
+
+    def fetch(self, key, fps, path, writer_name, bin_path=None):
+        """ Save a cached movie to path: a copy of the entry with the same fps or, for ffmpeg writers, another fps
+        remuxed
+
+        :param key: render_key of the movie
+        :param fps: frames per second wanted
+        :param path: output file
+        :param writer_name: writer the movie is saved with
+        :param bin_path: ffmpeg executable, needed to remux
+        :return: 'hit', 'remux' or None if the movie is not in the cache
+        """
+        extension = os.path.splitext(path)[1]
+        entry = self.entry_path(key, fps, extension)
+        if os.path.isfile(entry):
+            shutil.copyfile(entry, path)
+            self.touch(entry)
+            return 'hit'
+        if 'ffmpeg' not in writer_name or bin_path is None:
+            return None
+        others = [e for e in self.entries(key) if e[0].endswith(extension)]
+        if not others:
+            return None
+        source, key, source_fps = others[0]
+        remux_fps(source, path, fps, source_fps, bin_path)
+        self.touch(source)
+        self.store(key, fps, path)
+        return 'remux'
+
+    def store(self, key, fps, path):
+        """ Add a saved movie to the cache and remove the least recently used entries beyond max_bytes
+
+        :param key: render_key of the movie
+        :param fps: frames per second of the movie
+        :param path: movie file
+        :return: path of the entry
+        """
+        entry = self.entry_path(key, fps, os.path.splitext(path)[1])
+        key_directory = os.path.dirname(entry)
+        if not os.path.isdir(key_directory):
+            os.makedirs(key_directory)
+        # written under a temporary name, a reader never sees a partial entry
+        handle, temp_path = tempfile.mkstemp(prefix='.store_', dir=key_directory)
+        os.close(handle)
+        shutil.copyfile(path, temp_path)
+        if os.path.exists(entry) and os.name == 'nt':
+            os.remove(entry)
+        os.rename(temp_path, entry)
+        self.evict(keep=entry)
+        return entry
+
+    @staticmethod
+    def touch(entry):
+        # the modification time is the last use, access times are often not updated
+        os.utime(entry, None)
+
+    def size(self):
+        return sum(os.path.getsize(e[0]) for e in self.entries())
+
+    def evict(self, keep=None):
+        """ Remove the least recently used entries until the cache fits in max_bytes
+
+        :param keep: entry not to remove (the one just stored)
+        :return: list of removed entries
+        """
+        entries = [(os.path.getmtime(e[0]), os.path.getsize(e[0]), e[0]) for e in self.entries()]
+        total = sum(e[1] for e in entries)
+        removed = []
+        for mtime, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            os.remove(entry)
+            removed.append(entry)
+            total -= size
+            key_directory = os.path.dirname(entry)
+            if not os.listdir(key_directory):
+                os.rmdir(key_directory)
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
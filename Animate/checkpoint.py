@@ -0,0 +1,210 @@
+from __future__ import print_function, division, unicode_literals
+
+import binascii
+import hashlib
+import io
+import json
+import multiprocessing
+import numbers
+import os
+import shutil
+import types
+
+from matplotlib.animation import writers
+import numpy as np
+
+from .Animation import frame_range
+from .FrameSource import FrameSource
+from .segments import concat_segments, render_segment
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+MANIFEST = 'manifest.json'
+
+
+def _file_state(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime
+
+
+def movie_key(movie, params=()):
+    """ Fingerprint of a movie and the parameters of its render. The movie is hashed in a canonical form, the same in
+    every process (dict and set items are sorted): arrays are hashed by content, memory maps and file backed
+    FrameSources (.npy, TIFF, HDF5) by path, size and modification time, so large files are not read.
+
+    :param movie: Movie instance
+    :param params: other values the output depends on (frames, fps, codec, ...)
+    :return: hex digest
+    """
+    # id -> (object, token) of the arrays and sources seen, arrays are often in a Movie twice (data and source)
+    seen = {}
+    # ids of the containers being converted, to refuse cycles
+    active = set()
+
+    def sort_key(item):
+        return json.dumps(item[0], sort_keys=True)
+
+    def canonical(obj):
+        if isinstance(obj, np.generic) and not obj.dtype.hasobject:
+            return [type(obj).__name__, canonical(obj.item())]
+        if obj is None or isinstance(obj, (bool, float, basestring, numbers.Integral)):
+            return obj
+        if isinstance(obj, bytes):
+            return ['bytes', binascii.hexlify(obj).decode('ascii')]
+        if id(obj) in seen:
+            return seen[id(obj)][1]
+        if isinstance(obj, FrameSource) and getattr(obj, 'path', None) is not None:
+            state = obj.__getstate__() if hasattr(obj, '__getstate__') else None
+            token = ['file', type(obj).__name__, list(_file_state(obj.path)), canonical(state)]
+        elif isinstance(obj, np.memmap) and getattr(obj, 'filename', None) is not None:
+            token = ['memmap', list(_file_state(obj.filename)), obj.dtype.str, list(obj.shape), obj.offset]
+        elif isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+            data = np.ascontiguousarray(obj).reshape(-1).view(np.uint8)
+            token = ['array', obj.dtype.str, list(obj.shape), hashlib.sha1(data).hexdigest()]
+        else:
+            if id(obj) in active:
+                raise ValueError('The movie can not be checkpointed, it refers to itself through a %s' %
+                                 type(obj).__name__)
+            active.add(id(obj))
+            try:
+                return _canonical_container(obj, canonical, sort_key)
+            finally:
+                active.discard(id(obj))
+        seen[id(obj)] = obj, token
+        return token
+
+    canonical_form = canonical([movie, params])
+    return hashlib.sha1(json.dumps(canonical_form, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _canonical_container(obj, canonical, sort_key):
+    """ Canonical form (see movie_key) of containers and other objects, by their items or their pickled state """
+    if isinstance(obj, dict):
+        return ['dict', sorted(([canonical(k), canonical(v)] for k, v in obj.items()), key=sort_key)]
+    if isinstance(obj, (list, tuple)):
+        return [type(obj).__name__, [canonical(item) for item in obj]]
+    if isinstance(obj, (set, frozenset)):
+        return ['set', sorted(([canonical(item)] for item in obj), key=sort_key)]
+    if isinstance(obj, np.dtype):
+        return ['dtype', str(obj.descr) if obj.fields else obj.str]
+    if isinstance(obj, slice):
+        return ['slice', canonical(obj.start), canonical(obj.stop), canonical(obj.step)]
+    if isinstance(obj, np.ndarray):
+        return ['object array', list(obj.shape), [canonical(item) for item in obj.ravel()]]
+    name = '%s.%s' % (getattr(obj, '__module__', None), getattr(obj, '__qualname__', getattr(obj, '__name__', None)))
+    if isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType, types.MethodType)):
+        # by name, like pickle
+        return ['global', name]
+    if hasattr(obj, '__getstate__'):
+        state = obj.__getstate__()
+    elif hasattr(obj, '__dict__'):
+        state = obj.__dict__
+    else:
+        raise ValueError('The movie can not be checkpointed, its data can not be fingerprinted: %s' % type(obj))
+    return ['object', '%s.%s' % (type(obj).__module__, type(obj).__name__), canonical(state)]
+
+
+def read_manifest(directory):
+    """ Manifest of a checkpoint directory, None if there is none or it can not be read """
+    try:
+        with io.open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def write_manifest(directory, manifest):
+    """ Write the manifest atomically, a render killed while writing it keeps the previous one """
+    path = os.path.join(directory, MANIFEST)
+    temp_path = path + '.tmp'
+    with io.open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, indent=1, sort_keys=True))
+    if os.path.exists(path) and os.name == 'nt':
+        os.remove(path)
+    os.rename(temp_path, path)
+
+
+def save_checkpointed(movie, path, writer_name, fps, codec, segment_frames, workers=None, progress=None, frames=None,
+                      animation_kwargs=None, render_kwargs=None, checkpoint_dir=None):
+    """ Save a movie as segments of segment_frames frames, recorded in a manifest as they are done, then join them
+    without re-encoding. A render that is stopped can be started again with the same arguments and only renders the
+    segments that are missing. The manifest is keyed by movie_key, a changed movie, data file or render parameter
+    starts from scratch. The checkpoint directory is removed when the movie is saved.
+
+    :param movie: Movie instance
+    :param path: full path of the output file (with extension)
+    :param writer_name: ffmpeg based writer from matplotlib.animation.writers
+    :param fps: frames per second
+    :param codec: codec to use
+    :param segment_frames: number of frames per segment
+    :param workers: number of processes rendering segments, None to render them in this process
+    :param progress: RenderProgress, gets the frame timings of the segments rendered (not of the ones resumed)
+    :param frames: frame indices to render, None for frame_range(movie)
+    :param animation_kwargs: forwarded to Animation
+    :param render_kwargs: forwarded to Animation.render
+    :param checkpoint_dir: directory of the segments and the manifest, defaults to path + '.checkpoint'
+    :return:
+    """
+    if frames is None:
+        frames = frame_range(movie)
+    if animation_kwargs is None:
+        animation_kwargs = {}
+    if render_kwargs is None:
+        render_kwargs = {}
+    if checkpoint_dir is None:
+        checkpoint_dir = path + '.checkpoint'
+    segment_frames = int(segment_frames)
+    if segment_frames < 1:
+        raise ValueError('segment_frames should be at least 1 got: %s' % segment_frames)
+    extension = os.path.splitext(path)[1]
+    chunks = [frames[start:start + segment_frames] for start in range(0, len(frames), segment_frames)]
+    key = movie_key(movie, ([int(f) for f in frames], writer_name, fps, codec, segment_frames, extension,
+                            animation_kwargs, render_kwargs))
+    manifest = read_manifest(checkpoint_dir)
+    if manifest is None or manifest.get('key') != key:
+        # another movie or other parameters: start from scratch
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        manifest = {'key': key, 'n_frames': len(frames), 'segment_frames': segment_frames, 'segments': {}}
+    if not os.path.isdir(checkpoint_dir):
+        os.makedirs(checkpoint_dir)
+    segment_paths = [os.path.join(checkpoint_dir, 'segment_%05d%s' % (i, extension)) for i in range(len(chunks))]
+    done = manifest['segments']
+    missing = [i for i, segment_path in enumerate(segment_paths)
+               if str(i) not in done or not os.path.isfile(segment_path) or
+               os.path.getsize(segment_path) != done[str(i)]['size']]
+    for i in missing:
+        done.pop(str(i), None)
+    write_manifest(checkpoint_dir, manifest)
+
+    jobs = [(movie, chunks[i], segment_paths[i], writer_name, fps, codec, animation_kwargs, render_kwargs)
+            for i in missing]
+    if progress is not None:
+        progress.start(sum(len(chunks[i]) for i in missing), path=path, writer=writer_name, fps=fps,
+                       workers=workers, resumed_frames=len(frames) - sum(len(chunks[i]) for i in missing))
+
+    def segment_done(i, segment_path, timings):
+        done[str(i)] = {'size': os.path.getsize(segment_path), 'frames': [int(chunks[i][0]), int(chunks[i][-1])]}
+        write_manifest(checkpoint_dir, manifest)
+        if progress is not None:
+            for timing in timings:
+                progress.frame(*timing)
+
+    if workers is None or workers <= 1 or len(jobs) <= 1:
+        for i, job in zip(missing, jobs):
+            segment_path, timings = render_segment(job, in_worker=False)
+            segment_done(i, segment_path, timings)
+    elif jobs:
+        pool = multiprocessing.Pool(processes=min(workers, len(jobs)))
+        try:
+            for i, (segment_path, timings) in zip(missing, pool.imap(render_segment, jobs, chunksize=1)):
+                segment_done(i, segment_path, timings)
+        finally:
+            pool.close()
+            pool.join()
+    concat_segments(segment_paths, path, writers[writer_name].bin_path())
+    if progress is not None:
+        progress.finish()
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
@@ -0,0 +1,133 @@
+""" animate-render: validate and render movie specs (see Animate.spec)
+
+    animate-render session1.yml session2.json           # render
+    animate-render --validate specs/*.json              # check the specs only
+    animate-render --dry-run specs/*.json               # check the specs and the data, print what would be rendered
+    animate-render --workers 8 --max-encoders 4 specs/*.json
+
+matplotlib and the render modules are imported only when rendering, so --validate and --dry-run start quickly.
+"""
+from __future__ import print_function, division, unicode_literals
+
+import argparse
+import os
+import sys
+
+from .spec import DATA_ARGUMENTS, basestring, build_movie, data_path, load_spec, save_arguments, validate_spec
+
+
+def read_specs(paths):
+    """ Load and validate spec files
+
+    :param paths: spec file paths
+    :return: list of (path, spec, base_dir) of the valid specs and list of error messages
+    """
+    specs = []
+    errors = []
+    for path in paths:
+        base_dir = os.path.dirname(os.path.abspath(path))
+        try:
+            spec = load_spec(path)
+        except (IOError, OSError, ValueError) as e:
+            errors.append('%s: %s' % (path, e))
+            continue
+        spec_errors = validate_spec(spec, base_dir)
+        if spec_errors:
+            errors += ['%s: %s' % (path, error) for error in spec_errors]
+        else:
+            specs.append((path, spec, base_dir))
+    return specs, errors
+
+
+def describe(path, spec, base_dir):
+    """ Lines describing what a spec renders, with the shapes of its data files (read from their headers) """
+    from .FrameSource import as_frame_source
+    output, kwargs = save_arguments(spec, base_dir)
+    lines = ['%s -> %s (%s)' % (path, output, kwargs.get('writer_name', 'ffmpeg'))]
+    for step in spec['steps']:
+        method, step_kwargs = list(step.items())[0]
+        for name in DATA_ARGUMENTS.get(method, {}):
+            value = (step_kwargs or {}).get(name)
+            if isinstance(value, basestring):
+                # the headers only, .npy files are memory mapped
+                source = as_frame_source(data_path(value, base_dir))
+                lines.append('    %s %s: %s %s' % (method, name, value, tuple(source.shape)))
+    return lines
+
+
+def render(specs, workers=None, max_encoders=None, quiet=False):
+    """ Render valid specs, one after the other or with render_many when there are workers
+
+    :return: number of movies that failed
+    """
+    import matplotlib
+    # off-screen, before Movie imports pyplot
+    matplotlib.use('agg')
+    for path, spec, base_dir in specs:
+        directory = os.path.dirname(save_arguments(spec, base_dir)[0])
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+    if workers is None or workers <= 1:
+        from .progress import PrintProgress
+        failed = 0
+        for path, spec, base_dir in specs:
+            output, kwargs = save_arguments(spec, base_dir)
+            try:
+                movie = build_movie(spec, base_dir)
+                output = movie.save(output, progress=None if quiet else PrintProgress(), **kwargs)
+            except Exception as e:
+                failed += 1
+                print('%s: failed, %s: %s' % (path, type(e).__name__, e), file=sys.stderr)
+                continue
+            if not quiet:
+                print('%s -> %s' % (path, output))
+        return failed
+    from .batch import render_many
+    failed = 0
+    movies = []
+    for path, spec, base_dir in specs:
+        output, kwargs = save_arguments(spec, base_dir)
+        kwargs.pop('workers', None)
+        try:
+            movies.append((build_movie(spec, base_dir), output, kwargs))
+        except Exception as e:
+            failed += 1
+            print('%s: failed, %s: %s' % (path, type(e).__name__, e), file=sys.stderr)
+    results = render_many(movies, workers=workers, max_encoders=max_encoders, progress=not quiet)
+    return failed + sum(result['status'] == 'failed' for result in results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='animate-render', description='Render movies from JSON or YAML specs')
+    parser.add_argument('specs', nargs='+', help='spec files (.json, .yml, .yaml)')
+    parser.add_argument('--validate', action='store_true', help='only check the specs')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='check the specs and their data files and print what would be rendered')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='render the movies with this many processes (a whole movie per process)')
+    parser.add_argument('--max-encoders', type=int, default=None, help='maximal number of movies encoded at once')
+    parser.add_argument('--quiet', action='store_true', help='only print errors')
+    args = parser.parse_args(argv)
+    specs, errors = read_specs(args.specs)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors:
+        return 1
+    if args.validate:
+        if not args.quiet:
+            print('%d specs are valid' % len(specs))
+        return 0
+    if args.dry_run:
+        for path, spec, base_dir in specs:
+            try:
+                lines = describe(path, spec, base_dir)
+            except (IOError, OSError, ValueError) as e:
+                print('%s: %s' % (path, e), file=sys.stderr)
+                return 1
+            print('\n'.join(lines))
+        return 0
+    return 1 if render(specs, args.workers, args.max_encoders, args.quiet) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+from __future__ import print_function, division, unicode_literals
+
+from matplotlib.colors import to_rgba
+import numpy as np
+
+from .lut import apply_lut, make_lut, rgb_to_rgba
+from .static_layer import axes_artists
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+def compositor_support(movie):
+    """ Why a movie can not be drawn by the NumPy compositor
+
+    :param movie: Movie instance
+    :return: reason or None if it is supported
+    """
+    if len(movie.axes) > 0:
+        return 'trace axes are drawn by matplotlib only'
+    for annotation in movie.annotations:
+        if annotation['type'] == 'var_annotation':
+            return 'variable annotations are drawn by matplotlib only'
+        if annotation['type'] == 'points':
+            return 'point overlays are drawn by matplotlib only'
+    for label in movie.labels:
+        if 'bbox' in label['kwargs'] or label['kwargs'].get('rotation', 0) not in (0, None, 'horizontal'):
+            return 'labels with a bbox or a rotation are drawn by matplotlib only'
+        if any(label['kwargs'].get(k) for k in ('path_effects', 'usetex', 'wrap')):
+            return 'labels with path effects, usetex or wrapping are drawn by matplotlib only'
+        if '$' in label['s_format'] or any(isinstance(v, basestring) and '$' in v for v in label['values']):
+            return 'math text labels are drawn by matplotlib only'
+    return None
+
+
+def block_mean(data, factor_y, factor_x):
+    """ Mean of factor_y x factor_x blocks of the first two axes (the edges that do not fill a block are dropped) """
+    rows = data.shape[0] // factor_y * factor_y
+    columns = data.shape[1] // factor_x * factor_x
+    data = data[:rows, :columns]
+    shape = (rows // factor_y, factor_y, columns // factor_x, factor_x) + data.shape[2:]
+    return data.reshape(shape).mean(axis=(1, 3))
+
+
+def subpixel_floor(position):
+    """ Pixel index of positions, rounded to 1/256 pixel first like the Agg image interpolator """
+    return np.floor(np.round(position * 256) / 256).astype(int)
+
+
+class Panel(object):
+    """ Placement of one image on the canvas: the canvas pixels it covers and the data pixel of each of them """
+
+    def __init__(self, image, im, source, canvas_height, clip, resize):
+        """
+
+        :param image: Movie image dict
+        :param im: AxesImage drawn by matplotlib (extent, colormap, interpolation)
+        :param source: FrameSource of the image
+        :param canvas_height: height of the canvas in pixels
+        :param clip: Bbox the image is clipped to (its axes) in display coordinates
+        :param resize: 'nearest' or 'block' (block averaging before nearest when shrinking by 2 or more)
+        """
+        self.image = image
+        self.source = source
+        self.is_rgb = image['is_rgb']
+        self.lut = None if self.is_rgb else make_lut(im.cmap)
+        self.vmin, self.vmax = im.norm.vmin, im.norm.vmax
+        x0, y0, x1, y1 = im.get_window_extent().extents
+        shape = self.frame(0).shape
+        self.factor_y = self.factor_x = 1
+        if resize == 'block':
+            self.factor_y = max(int(shape[0] // max(y1 - y0, 1)), 1)
+            self.factor_x = max(int(shape[1] // max(x1 - x0, 1)), 1)
+        n_rows, n_columns = shape[0] // self.factor_y, shape[1] // self.factor_x
+        # like AxesImage._make_image: the image clipped to its axes is resampled to whole pixels and drawn at the
+        # rounded bottom left corner of the clipped box (display y is from the bottom)
+        left, right = max(x0, clip.x0), min(x1, clip.x1)
+        bottom, top = max(y0, clip.y0), min(y1, clip.y1)
+        width, height = int(np.ceil(right - left)), int(np.ceil(top - bottom))
+        if right <= left or top <= bottom:
+            width = height = 0
+        centers_x = left + (np.arange(width) + 0.5) * (right - left) / max(width, 1)
+        # from the top of the resampled image
+        centers_y = bottom + (height - np.arange(height) - 0.5) * (top - bottom) / max(height, 1)
+        self.columns = np.clip(subpixel_floor((centers_x - x0) / (x1 - x0) * n_columns), 0, n_columns - 1)
+        if im.origin == 'upper':
+            self.rows = subpixel_floor((y1 - centers_y) / (y1 - y0) * n_rows)
+        else:
+            self.rows = subpixel_floor((centers_y - y0) / (y1 - y0) * n_rows)
+        self.rows = np.clip(self.rows, 0, n_rows - 1)
+        column, row = int(np.floor(left + 0.5)), int(np.floor(canvas_height - (bottom + height) + 0.5))
+        self.canvas_rows = slice(max(row, 0), max(row + height, 0))
+        self.canvas_columns = slice(max(column, 0), max(column + width, 0))
+        self.rows = self.rows[self.canvas_rows.start - row:self.canvas_rows.stop - row]
+        self.columns = self.columns[self.canvas_columns.start - column:self.canvas_columns.stop - column]
+        # color before resizing when the panel has more pixels than the frame
+        self.color_first = len(self.rows) * len(self.columns) > n_rows * n_columns
+        self.opaque = self.is_rgb or bool(np.all(self.lut[:, 3] == 255))
+
+    def frame(self, frame):
+        if self.image['animation_type'] == 'movie':
+            return self.source.get_frame(frame)
+        return self.source.get_window(frame, frame + self.image['window_size'])
+
+    def colorize(self, data):
+        if self.is_rgb:
+            return rgb_to_rgba(data)
+        return apply_lut(data, self.lut, self.vmin, self.vmax)
+
+    def draw(self, canvas, frame):
+        data = self.frame(frame)
+        if self.factor_y > 1 or self.factor_x > 1:
+            dtype = data.dtype
+            data = block_mean(data, self.factor_y, self.factor_x)
+            if data.dtype != dtype:
+                # integer frames (e.g. RGB windows) keep their dtype, like FrameSource.bin_pixels
+                data = np.round(data).astype(dtype)
+        if self.color_first:
+            rgba = self.colorize(data)[self.rows][:, self.columns]
+        else:
+            rgba = self.colorize(data[self.rows][:, self.columns])
+        target = canvas[self.canvas_rows, self.canvas_columns]
+        # the colormap can be opaque but for the bad (NaN) color
+        if self.opaque or np.all(rgba[..., 3] == 255):
+            target[...] = rgba
+        else:
+            blend(target, rgba[..., :3], rgba[..., 3])
+
+
+def blend(target, rgb, alpha):
+    """ Draw straight (not premultiplied) RGB with alpha (uint8) over an opaque uint8 RGBA target, in place """
+    alpha = alpha.astype(np.uint16)[..., None]
+    target[..., :3] = (rgb * alpha + target[..., :3] * (255 - alpha) + 127) // 255
+
+
+def stamp_text(canvas, bitmap, left, bottom, rgba):
+    """ Draw a text bitmap like RendererAgg.draw_text_image (no rotation) on a uint8 RGBA canvas
+
+    :param bitmap: uint8 coverage bitmap (see SpriteText.sprites)
+    :param left: x of the left of the bitmap in canvas pixels
+    :param bottom: y of the bottom of the bitmap in canvas pixels from the top
+    :param rgba: color of the text (0 - 1)
+    """
+    height, width = bitmap.shape
+    left, bottom = int(left), int(bottom)
+    top = bottom - height
+    # clip to the canvas
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(bottom, canvas.shape[0]), min(left + width, canvas.shape[1])
+    if y1 <= y0 or x1 <= x0:
+        return
+    coverage = bitmap[y0 - top:y1 - top, x0 - left:x1 - left].astype(np.uint16)
+    if len(rgba) > 3 and rgba[3] < 1:
+        coverage = (coverage * int(round(255 * rgba[3]))) // 255
+    color = np.round(np.asarray(rgba[:3]) * 255).astype(np.uint16)
+    blend(canvas[y0:y1, x0:x1], color, coverage)
+
+
+class Compositor(object):
+    """ Draws frames of image only movies on a NumPy RGBA canvas instead of the matplotlib figure.
+
+    The layout comes from the figure: after one draw, everything below the images (figure and axes backgrounds,
+    colorbars) is kept as the base layer and the static artists above them (ticks, spines, annotations, scale bars)
+    as a transparent overlay. For every frame the panels are colored with a lookup table of their colormap and
+    resized with nearest neighbor (or block averaging) indexing into the canvas, the overlay is blended on top and
+    the labels are stamped from their cached sprites (see SpriteText). Frames are close to, but not pixel identical
+    with, the ones of matplotlib (edges of images and overlays can differ by a pixel or a rounding step).
+    """
+
+    def __init__(self, animation, resize='nearest'):
+        """
+
+        :param animation: Animation after _init_draw, with a frame drawn
+        :param resize: 'nearest' or 'block'
+        """
+        if resize not in ('nearest', 'block'):
+            raise ValueError('resize should be nearest or block got: %s' % resize)
+        self.animation = animation
+        self.resize = resize
+        self.fig = animation.fig
+        self.panels = []
+        self.base = None
+        self.canvas = None
+        self._overlay_index = None
+
+    def setup(self):
+        """ Build the layers from the figure
+
+        :return: None or the reason the figure can not be composited (then it should be drawn by matplotlib)
+        """
+        for im in self.animation.images:
+            if im.get_interpolation() not in ('nearest', 'none'):
+                return 'only nearest neighbor images are composited, got interpolation: %s' % im.get_interpolation()
+        canvas = self.fig.canvas
+        canvas.draw()
+        renderer = canvas.get_renderer()
+        for label in self.animation.labels:
+            if label.get_text() != '' and label.sprites(renderer) is None:
+                return 'the labels can not be drawn from sprites with this matplotlib version'
+        width, height = canvas.get_width_height()
+        image_axes = self.animation.img_axes
+        labels = set(id(label) for label in self.animation.labels)
+        images = set(id(im) for im in self.animation.images)
+        overlay = [a for ax in image_axes for a in axes_artists(ax)
+                   if id(a) not in images and id(a) not in labels]
+        for ax, im, image, source in zip(image_axes, self.animation.images, self.animation.movie.images,
+                                         self.animation.panel_sources):
+            self.panels.append(Panel(image, im, source, height, ax.bbox, self.resize))
+
+        hidden = list(self.animation.images) + list(self.animation.labels) + overlay
+        self.base = self._draw_without(hidden)
+        # the overlay alone, on a transparent canvas
+        others = ([self.fig.patch] + [ax.patch for ax in image_axes] +
+                  [ax for ax in self.fig.axes if ax not in image_axes] + self.fig.texts +
+                  list(self.animation.images) + list(self.animation.labels))
+        layer = self._draw_without(others)
+        alpha = layer[..., 3].ravel()
+        index = np.nonzero(alpha)[0]
+        self._overlay_index = index
+        self._overlay_rgb = layer.reshape(-1, 4)[index, :3].astype(np.uint16)
+        self._overlay_alpha = alpha[index].astype(np.uint16)[:, None]
+        self.canvas = np.empty((height, width, 4), dtype=np.uint8)
+        return None
+
+    def _draw_without(self, artists):
+        visible = [a.get_visible() for a in artists]
+        for a in artists:
+            a.set_visible(False)
+        try:
+            self.fig.canvas.draw()
+            width, height = self.fig.canvas.get_width_height()
+            return np.frombuffer(self.fig.canvas.buffer_rgba(), dtype=np.uint8).reshape(height, width, 4).copy()
+        finally:
+            for a, v in zip(artists, visible):
+                a.set_visible(v)
+
+    def draw(self, frame):
+        """ Draw a frame (the labels must have been updated by Animation._draw_frame)
+
+        :param frame: frame index
+        :return: (height, width, 4) uint8 canvas, valid until the next draw
+        """
+        canvas = self.canvas
+        canvas[...] = self.base
+        for panel in self.panels:
+            panel.draw(canvas, frame)
+        flat = canvas.reshape(-1, 4)
+        under = flat[self._overlay_index, :3]
+        flat[self._overlay_index, :3] = (self._overlay_rgb * self._overlay_alpha +
+                                         under * (255 - self._overlay_alpha) + 127) // 255
+        renderer = self.fig.canvas.get_renderer()
+        for label in self.animation.labels:
+            if not label.get_visible() or label.get_text() == '':
+                continue
+            rgba = to_rgba(label.get_color(), label.get_alpha())
+            for bitmap, left, bottom, angle in label.sprites(renderer):
+                stamp_text(canvas, bitmap, left, bottom, rgba)
+        return canvas
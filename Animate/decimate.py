@@ -0,0 +1,180 @@
+from __future__ import print_function, division, unicode_literals
+
+import math
+
+import numpy as np
+
+
+def _minmax_picks(blocks):
+    """ argmin and argmax of each row of a 2d array, ignoring NaNs, and the first NaN of the rows that have one.
+    argmin / argmax alone return the position of a NaN, which would hide the min and max of its row.
+
+    :param blocks: 2d numpy array, one bucket per row
+    :return: (argmin, argmax, rows with a NaN, column of their first NaN), a row of NaNs gives its first point
+    """
+    low, high = blocks.argmin(axis=1), blocks.argmax(axis=1)
+    nan_rows = np.arange(0)
+    if blocks.dtype.kind == 'f':
+        # argmin returns the first NaN of a row that has one
+        nan_rows = np.nonzero(np.isnan(blocks[np.arange(len(blocks)), low]))[0]
+    if len(nan_rows) == 0:
+        return low, high, nan_rows, nan_rows
+    rows = blocks[nan_rows]
+    nan = np.isnan(rows)
+    low[nan_rows] = np.where(nan, np.inf, rows).argmin(axis=1)
+    high[nan_rows] = np.where(nan, -np.inf, rows).argmax(axis=1)
+    return low, high, nan_rows, nan.argmax(axis=1)
+
+
+def minmax_indices(data, n_bins, chunk_size=2 ** 20):
+    """ Indices of the points of a trace to draw when it spans n_bins (e.g. pixel columns): the first and last points
+    and the min and max of each of n_bins equal buckets, in order. Drawn as a line these cover the same vertical
+    extent in each bucket as the full trace, so the decimation is visually lossless at that width. The first NaN of a
+    bucket is kept too, so gaps in the trace are drawn.
+
+    The data is read chunk_size points at a time, so memory mapped traces are never loaded whole.
+
+    :param data: 1d numpy array (np.memmap too)
+    :param n_bins: number of buckets
+    :param chunk_size: maximal number of points to read at once
+    :return: sorted int array of indices, all of them if the trace is not longer than 2 * n_bins
+    """
+    n = len(data)
+    if n <= 2 * n_bins:
+        return np.arange(n)
+    bucket = int(math.ceil(n / n_bins))
+    step = max(chunk_size // bucket, 1) * bucket
+    indices = [np.array([0, n - 1])]
+    for start in range(0, n, step):
+        chunk = np.asarray(data[start:start + step])
+        full = len(chunk) // bucket * bucket
+        if full > 0:
+            blocks = chunk[:full].reshape(-1, bucket)
+            offsets = start + np.arange(0, full, bucket)
+            low, high, nan_rows, nan = _minmax_picks(blocks)
+            indices.extend([offsets + low, offsets + high, offsets[nan_rows] + nan])
+        if full < len(chunk):
+            low, high, nan_rows, nan = _minmax_picks(chunk[None, full:])
+            indices.append(start + full + np.concatenate([low, high, nan]))
+    return np.unique(np.concatenate(indices))
+
+
+def decimate_trace(x, y, n_bins):
+    """ Min / max decimation of a trace to n_bins buckets (see minmax_indices)
+
+    :param x: x values, monotonic
+    :param y: y values
+    :param n_bins: number of buckets, e.g. twice the width in pixels of the axis
+    :return: decimated x and y arrays
+    """
+    if not hasattr(y, 'shape'):
+        y = np.asarray(y)
+    index = minmax_indices(y, n_bins)
+    return np.asarray(x)[index], np.asarray(y[index])
+
+
+class MinMaxPyramid(object):
+    """ Min / max of a trace over buckets of base, base * factor, base * factor ** 2 ... points, computed once so a
+    window of the trace is decimated (see minmax_indices) by slicing the level with the right bucket size: the number
+    of points drawn depends on the number of buckets wanted, not on the length of the window or the sampling rate.
+
+    Each level keeps the index and value of the min and of the max of every bucket (ignoring NaNs) and the index of
+    the first NaN of the buckets that have one, about 32 / (base - base / factor) bytes per point of the trace for
+    all the levels (half a float64 trace by default) plus 8 bytes per bucket with a NaN.
+    """
+
+    def __init__(self, data, base=16, factor=2, min_buckets=64, chunk_size=2 ** 20):
+        """
+
+        :param data: 1d numpy array (np.memmap too, read chunk_size points at a time)
+        :param base: bucket size of the finest level
+        :param factor: ratio of the bucket sizes of consecutive levels
+        :param min_buckets: no level with fewer buckets is made
+        :param chunk_size: maximal number of points to read at once
+        """
+        if int(base) < 2 or int(factor) < 2:
+            raise ValueError('base and factor should be at least 2 got: %s, %s' % (base, factor))
+        self.data = data
+        self.base = int(base)
+        self.factor = int(factor)
+        # (bucket size, min indices, min values, max indices, max values, first NaN of the buckets that have one)
+        self.levels = []
+        n = len(data)
+        if n < self.base * min_buckets:
+            return
+        level = self._first_level(chunk_size)
+        bucket = self.base
+        while True:
+            self.levels.append((bucket,) + level)
+            if len(level[0]) < self.factor * min_buckets:
+                break
+            level = self._merge(level, bucket)
+            bucket *= self.factor
+
+    def _first_level(self, chunk_size):
+        data, bucket = self.data, self.base
+        step = max(chunk_size // bucket, 1) * bucket
+        min_index, min_value, max_index, max_value, nan_index = [], [], [], [], []
+        for start in range(0, len(data), step):
+            chunk = np.asarray(data[start:start + step])
+            n_buckets = int(math.ceil(len(chunk) / bucket))
+            if n_buckets * bucket > len(chunk):
+                # the last bucket is padded with its last point
+                chunk = np.concatenate([chunk, np.repeat(chunk[-1:], n_buckets * bucket - len(chunk))])
+            blocks = chunk.reshape(n_buckets, bucket)
+            offsets = start + np.arange(0, n_buckets * bucket, bucket)
+            rows = np.arange(n_buckets)
+            low, high, nan_rows, nan = _minmax_picks(blocks)
+            min_index.append(np.minimum(offsets + low, len(data) - 1))
+            min_value.append(blocks[rows, low])
+            max_index.append(np.minimum(offsets + high, len(data) - 1))
+            max_value.append(blocks[rows, high])
+            nan_index.append(np.minimum(offsets[nan_rows] + nan, len(data) - 1))
+        return tuple(np.concatenate(a) for a in (min_index, min_value, max_index, max_value, nan_index))
+
+    def _merge(self, level, bucket):
+        """ Next level: factor consecutive buckets of size bucket in one """
+        min_index, min_value, max_index, max_value, nan_index = level
+        n_buckets = int(math.ceil(len(min_index) / self.factor))
+        pad = n_buckets * self.factor - len(min_index)
+        merged = []
+        for index, value, fill, pick in ((min_index, min_value, np.inf, np.argmin),
+                                         (max_index, max_value, -np.inf, np.argmax)):
+            if pad > 0:
+                index = np.concatenate([index, np.repeat(index[-1:], pad)])
+                value = np.concatenate([value, np.repeat(value[-1:], pad)])
+            index, value = index.reshape(n_buckets, self.factor), value.reshape(n_buckets, self.factor)
+            rows = np.arange(n_buckets)
+            # the min / max of a bucket is a NaN only if all its points are
+            choice = pick(np.where(np.isnan(value), fill, value) if value.dtype.kind == 'f' else value, axis=1)
+            merged.extend([index[rows, choice], value[rows, choice]])
+        # the first NaN of each merged bucket (nan_index is sorted)
+        merged.append(nan_index[np.unique(nan_index // (bucket * self.factor), return_index=True)[1]])
+        return tuple(merged)
+
+    def window(self, start, stop, n_bins):
+        """ Min / max decimation of data[start:stop] to about n_bins buckets (between n_bins and factor * n_bins)
+
+        :param start: first index
+        :param stop: stop index
+        :param n_bins: number of buckets, e.g. twice the width in pixels of the axis
+        :return: sorted indices and their values, all the points if the window is not longer than 2 * n_bins
+        """
+        start, stop = max(int(start), 0), min(int(stop), len(self.data))
+        if stop <= start:
+            return np.arange(0), np.asarray(self.data[:0])
+        levels = [level for level in self.levels if level[0] * n_bins <= stop - start]
+        if not levels:
+            # short enough to decimate the points themselves
+            chunk = np.asarray(self.data[start:stop])
+            index = minmax_indices(chunk, n_bins)
+            return start + index, chunk[index]
+        bucket, min_index, min_value, max_index, max_value, nan_index = levels[-1]
+        # the buckets overlapping the window, the line continues past the axis limits
+        first, last = start // bucket, (stop - 1) // bucket + 1
+        nans = nan_index[np.searchsorted(nan_index, first * bucket):np.searchsorted(nan_index, last * bucket)]
+        index = np.concatenate([min_index[first:last], max_index[first:last], nans])
+        value = np.concatenate([min_value[first:last], max_value[first:last], np.asarray(self.data[nans])])
+        # in the order of the trace, a point that is both the min and the max of its bucket (a flat bucket) once
+        index, unique = np.unique(index, return_index=True)
+        return index, value[unique]
@@ -0,0 +1,356 @@
+""" GIF writer that encodes the frames as they are rendered, with numpy only
+
+A palette of at most 255 colors is made from the first frames (the exact colors when there are few, as in most
+movies of colormapped images) or for every frame. Pixels are mapped to it with a lookup table of 15 bit colors,
+optionally with ordered dithering. Only the rectangle that changed since the last frame is written, its unchanged
+pixels are transparent (index 255), so the LZW encoder gets long runs and still movies are small.
+"""
+from __future__ import print_function, division, unicode_literals
+
+import struct
+
+from matplotlib.animation import AbstractMovieWriter, writers
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+
+# index of the transparent color, the palette has the other 255
+TRANSPARENT = 255
+MAX_COLORS = 255
+# 4x4 Bayer matrix, thresholds in (0, 1)
+BAYER = (np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]) + 0.5) / 16
+
+
+def pack_rgb(rgb):
+    """ 24 bit integers of (..., 3) uint8 colors """
+    rgb = rgb.astype(np.int32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def pack_rgb15(rgb):
+    """ 15 bit integers of (..., 3) uint8 colors, 5 bits per channel """
+    rgb = rgb.astype(np.int32) >> 3
+    return (rgb[..., 0] << 10) | (rgb[..., 1] << 5) | rgb[..., 2]
+
+
+def median_cut(colors, weights, n_colors):
+    """ Palette of a color histogram by median cut: the box of colors with the largest channel range is split at its
+    weighted median until there are n_colors boxes
+
+    :param colors: (n, 3) colors
+    :param weights: (n,) number of pixels of each color
+    :param n_colors: size of the palette
+    :return: (m, 3) uint8 palette, m <= n_colors, the weighted means of the boxes
+    """
+    def channel_ranges(c):
+        return np.ptp(c, axis=0) if len(c) > 1 else np.zeros(3)
+
+    boxes = [(colors.astype(float), weights.astype(float))]
+    ranges = [channel_ranges(boxes[0][0])]
+    while len(boxes) < n_colors:
+        i = int(np.argmax([r.max() for r in ranges]))
+        if ranges[i].max() <= 0:
+            break
+        c, w = boxes[i]
+        order = np.argsort(c[:, np.argmax(ranges[i])], kind='mergesort')
+        c, w = c[order], w[order]
+        cumulative = np.cumsum(w)
+        split = int(np.clip(np.searchsorted(cumulative, cumulative[-1] / 2) + 1, 1, len(c) - 1))
+        boxes[i] = c[:split], w[:split]
+        boxes.append((c[split:], w[split:]))
+        ranges[i] = channel_ranges(boxes[i][0])
+        ranges.append(channel_ranges(boxes[-1][0]))
+    return np.array([np.round(np.average(c, axis=0, weights=w)) for c, w in boxes]).astype(np.uint8)
+
+
+class Palette(object):
+    """ Colors of a GIF and the mapping of pixels to them """
+
+    def __init__(self, frames, dither=False):
+        """
+
+        :param frames: (..., 3) uint8 pixels to make the palette of
+        :param dither: ordered dithering of the colors that are not in the palette
+        """
+        rgb = frames.reshape(-1, 3)
+        packed = np.unique(pack_rgb(rgb))
+        if len(packed) <= MAX_COLORS:
+            # exact colors, looked up by their 24 bit value
+            self.colors = np.stack([(packed >> 16) & 255, (packed >> 8) & 255, packed & 255], axis=1).astype(np.uint8)
+            self.exact = packed
+        else:
+            bins = pack_rgb15(rgb)
+            counts = np.bincount(bins, minlength=2 ** 15)
+            used = np.nonzero(counts)[0]
+            means = np.stack([np.bincount(bins, rgb[:, c], minlength=2 ** 15)[used] / counts[used] for c in range(3)],
+                             axis=1)
+            self.colors = median_cut(means, counts[used], MAX_COLORS)
+            self.exact = None
+        self.dither = dither
+        self._lut = None
+
+    @property
+    def lut(self):
+        """ nearest palette color of every 15 bit color (bin centers), made when a color is not in the palette """
+        if self._lut is None:
+            levels = (np.arange(32) << 3) + 4.0
+            centers = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+            colors = self.colors.astype(float)
+            # squared distances without the norm of the centers, which does not change the nearest
+            distance = (colors ** 2).sum(axis=1)[None] - 2 * np.dot(centers, colors.T)
+            self._lut = distance.argmin(axis=1).astype(np.uint8)
+        return self._lut
+
+    def table(self):
+        """ 256 colors of the color table, the transparent index last """
+        table = np.zeros((256, 3), np.uint8)
+        table[:len(self.colors)] = self.colors
+        return table.tobytes()
+
+    def indices(self, rgb):
+        """ Palette index of every pixel
+
+        :param rgb: (height, width, 3) uint8 pixels
+        :return: (height, width) uint8 indices
+        """
+        if self.dither and self.exact is None:
+            height, width = rgb.shape[:2]
+            threshold = np.tile(BAYER, (height // 4 + 1, width // 4 + 1))[:height, :width]
+            # spread the error of the 8 levels of a 5 bit channel
+            rgb = np.clip(rgb + (threshold[:, :, None] - 0.5) * 8, 0, 255).astype(np.uint8)
+        if self.exact is None:
+            return self.lut[pack_rgb15(rgb)]
+        packed = pack_rgb(rgb)
+        indices = np.minimum(np.searchsorted(self.exact, packed), len(self.exact) - 1)
+        missing = self.exact[indices] != packed
+        indices = indices.astype(np.uint8)
+        if missing.any():
+            indices[missing] = self.lut[pack_rgb15(rgb[missing])]
+        return indices
+
+
+def lzw_encode(indices, min_code_size=8):
+    """ GIF LZW compression of palette indices, in sub-blocks
+
+    :param indices: uint8 array
+    :param min_code_size: bits of the indices
+    :return: bytes of the image data (minimum code size, sub-blocks and terminator)
+    """
+    clear = 1 << min_code_size
+    end = clear + 1
+    data = bytearray(np.ascontiguousarray(indices).tobytes())
+    out = bytearray()
+    buffer = 0
+    n_bits = 0
+    code_size = min_code_size + 1
+    table = {}
+    # local names, this loop runs for every pixel
+    lookup = table.get
+    append = out.append
+    next_code = end + 1
+    # clear code first
+    buffer |= clear << n_bits
+    n_bits += code_size
+    prefix = data[0]
+    for byte in data[1:]:
+        key = (prefix << 8) | byte
+        code = lookup(key)
+        if code is not None:
+            prefix = code
+            continue
+        buffer |= prefix << n_bits
+        n_bits += code_size
+        if n_bits >= 16:
+            append(buffer & 255)
+            append((buffer >> 8) & 255)
+            buffer >>= 16
+            n_bits -= 16
+        if next_code < 4096:
+            table[key] = next_code
+            if next_code == 1 << code_size:
+                code_size += 1
+            next_code += 1
+        else:
+            # full table: start again
+            buffer |= clear << n_bits
+            n_bits += code_size
+            table = {}
+            lookup = table.get
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = byte
+    buffer |= prefix << n_bits
+    n_bits += code_size
+    if next_code < 4096 and next_code == 1 << code_size:
+        # the decoder adds an entry when it reads the last code, it can need a bit more for the end code
+        code_size += 1
+    buffer |= end << n_bits
+    n_bits += code_size
+    while n_bits > 0:
+        out.append(buffer & 255)
+        buffer >>= 8
+        n_bits -= 8
+    blocks = bytearray([min_code_size])
+    for start in range(0, len(out), 255):
+        chunk = out[start:start + 255]
+        blocks.append(len(chunk))
+        blocks += chunk
+    blocks.append(0)
+    return bytes(blocks)
+
+
+@writers.register('gif')
+class GifWriter(AbstractMovieWriter):
+    """ Writes a looping GIF as the frames are rendered, in this process. Takes frame buffers like RawPipeWriter
+    (the Agg canvas is drawn once per frame), memory is the frames the palette is made of and the last frame.
+    """
+
+    def __init__(self, fps=5, codec=None, palette='global', palette_frames=8, dither=False, optimize=True,
+                 loop=0, **kwargs):
+        """
+
+        :param fps: frames per second, GIF delays are in 1/100 s: the delays alternate to keep the mean fps
+        :param codec: ignored
+        :param palette: 'global' for one palette made from the first palette_frames frames (colors of later
+         frames are mapped to their nearest), 'frame' for a palette per frame
+        :param palette_frames: number of frames the global palette is made of, kept in memory until it is made
+        :param dither: ordered dithering of the colors that are not in the palette
+        :param optimize: write only the rectangle that changed since the last frame, with its unchanged pixels
+         transparent
+        :param loop: number of times the GIF plays, 0 for ever
+        :param kwargs: other MovieWriter arguments (bitrate, extra_args, metadata) are ignored
+        """
+        if palette not in ('global', 'frame'):
+            raise ValueError('palette should be global or frame got: %s' % palette)
+        self.fps = fps
+        self.palette_type = palette
+        self.palette_frames = max(1, int(palette_frames))
+        self.dither = dither
+        self.optimize = optimize
+        self.loop = loop
+        self.fig = None
+        self._file = None
+        self._pending = []
+        self._palette = None
+        self._previous = None
+        self._time = 0.0
+        self._delay = 0
+
+    @classmethod
+    def isAvailable(cls):
+        return True
+
+    @property
+    def frame_size(self):
+        """ A tuple (width, height) in pixels of a movie frame, the size of the canvas buffer """
+        return self.fig.canvas.get_width_height()
+
+    def setup(self, fig, outfile, dpi=None):
+        if not isinstance(fig.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(fig)
+        if dpi is not None and dpi != fig.dpi:
+            fig.set_dpi(dpi)
+        self.fig = fig
+        self.outfile = outfile
+        self._file = open(outfile, 'wb')
+        self._pending = []
+        self._palette = None
+        self._previous = None
+        self._time = 0.0
+        self._delay = 0
+
+    def grab_frame(self, **savefig_kwargs):
+        """ Draw the canvas and write it as the next frame
+
+        :param savefig_kwargs: ignored
+        :return:
+        """
+        self.fig.canvas.draw()
+        self.write_frame(self.fig.canvas.buffer_rgba())
+
+    def write_frame(self, buffer):
+        """ Write one frame of RGBA pixels (frame_size)
+
+        :param buffer: object supporting the buffer protocol or array, e.g. canvas.buffer_rgba()
+        :return:
+        """
+        width, height = self.frame_size
+        rgb = np.frombuffer(buffer, np.uint8).reshape(height, width, 4)[:, :, :3]
+        if self.palette_type == 'frame':
+            self._write_header(None)
+            self._write_image(rgb, Palette(rgb, self.dither))
+        elif self._palette is None:
+            self._pending.append(rgb.copy())
+            if len(self._pending) == self.palette_frames:
+                self._flush_pending()
+        else:
+            self._write_image(rgb, self._palette)
+
+    def _flush_pending(self):
+        self._palette = Palette(np.array(self._pending), self.dither)
+        self._write_header(self._palette)
+        for rgb in self._pending:
+            self._write_image(rgb, self._palette)
+        self._pending = []
+
+    def _write_header(self, palette):
+        if self._file.tell() > 0:
+            return
+        width, height = self.frame_size
+        # global color table of 256 colors, or none with a palette per frame
+        flags = 0xF7 if palette is not None else 0x70
+        self._file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, flags, 0, 0))
+        if palette is not None:
+            self._file.write(palette.table())
+        # NETSCAPE2.0 application extension: loop count
+        self._file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', self.loop) + b'\x00')
+
+    def _next_delay(self):
+        """ delay of the next frame in 1/100 s, rounded so the total time is right """
+        self._time += 100.0 / self.fps
+        delay = int(round(self._time)) - self._delay
+        self._delay += delay
+        return max(delay, 1)
+
+    def _write_image(self, rgb, palette):
+        height, width = rgb.shape[:2]
+        indices = palette.indices(rgb)
+        left, top = 0, 0
+        transparent = False
+        if self.optimize and self._previous is not None and self.palette_type == 'global':
+            changed = (rgb != self._previous).any(axis=2)
+            rows = np.nonzero(changed.any(axis=1))[0]
+            columns = np.nonzero(changed.any(axis=0))[0]
+            if len(rows) == 0:
+                # nothing changed: one transparent pixel keeps the timing
+                indices = np.full((1, 1), TRANSPARENT, np.uint8)
+            else:
+                top, left = rows[0], columns[0]
+                crop = slice(top, rows[-1] + 1), slice(left, columns[-1] + 1)
+                indices = indices[crop].copy()
+                indices[~changed[crop]] = TRANSPARENT
+            transparent = True
+        if self.optimize and self.palette_type == 'global':
+            if self._previous is None:
+                self._previous = np.empty_like(rgb)
+            self._previous[...] = rgb
+        # graphic control extension: do not dispose (frames are drawn over the last one), delay and transparency
+        self._file.write(b'\x21\xf9\x04' + struct.pack('<BHBB', (1 << 2) | transparent, self._next_delay(),
+                                                       TRANSPARENT, 0))
+        image_height, image_width = indices.shape
+        flags = 0x87 if self.palette_type == 'frame' else 0
+        self._file.write(b'\x2c' + struct.pack('<HHHHB', left, top, image_width, image_height, flags))
+        if self.palette_type == 'frame':
+            self._file.write(palette.table())
+        self._file.write(lzw_encode(indices))
+
+    def finish(self):
+        if self._file is None:
+            return
+        try:
+            if self._pending:
+                self._flush_pending()
+            if self._file.tell() > 0:
+                self._file.write(b'\x3b')
+        finally:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,131 @@
+from __future__ import print_function, division, unicode_literals
+
+import numpy as np
+
+from .FrameSource import FrameSource
+
+
+def make_lut(cmap):
+    """ uint8 RGBA lookup table of a colormap: its cmap.N colors followed by the under, over and bad colors
+
+    :param cmap: matplotlib Colormap
+    :return: (cmap.N + 3, 4) uint8 array
+    """
+    n = cmap.N
+    samples = np.concatenate([(np.arange(n) + 0.5) / n, [-1.0, 2.0, np.nan]])
+    return cmap(np.ma.masked_invalid(samples), bytes=True)
+
+
+def apply_lut(data, lut, vmin, vmax):
+    """ Color scalar data with a lookup table, in one vectorized pass over any number of frames.
+    Same as AxesImage.to_rgba with a Normalize(vmin, vmax): values below vmin get the under color, above vmax the
+    over color and NaNs the bad color.
+
+    :param data: numpy array of any shape
+    :param lut: lookup table from make_lut
+    :param vmin: value of the first color
+    :param vmax: value of the last color
+    :return: uint8 array of shape data.shape + (4,)
+    """
+    n = len(lut) - 3
+    data = np.asarray(data)
+    # same precision as matplotlib.colors.Normalize: small integers in float32, floats as they are
+    dtype = data.dtype if data.dtype.kind == 'f' else np.promote_types(data.dtype, np.float32)
+    scaled = data.astype(dtype)
+    if vmax != vmin:
+        scaled -= vmin
+        scaled /= vmax - vmin
+    else:
+        scaled.fill(0)
+    scaled *= n
+    with np.errstate(invalid='ignore'):
+        scaled[scaled < 0] = -1
+        scaled[scaled == n] = n - 1
+        np.clip(scaled, -1, n, out=scaled)
+        index = scaled.astype(np.intp)
+    index[index > n - 1] = n + 1
+    index[index < 0] = n
+    if data.dtype.kind == 'f':
+        index[np.isnan(data)] = n + 2
+    return lut[index]
+
+
+def rgb_to_rgba(data):
+    """ uint8 RGBA of RGB data the way AxesImage draws it (floats are clipped to [0, 1]), for is_rgb windows
+
+    :param data: (..., 3) array
+    :return: uint8 array of shape data.shape[:-1] + (4,)
+    """
+    data = np.asarray(data)
+    out = np.empty(data.shape[:-1] + (4,), dtype=np.uint8)
+    if data.dtype == np.uint8:
+        out[..., :3] = data
+    else:
+        out[..., :3] = 255 * np.clip(data, 0, 1)
+    out[..., 3] = 255
+    return out
+
+
+class ColorizedSource(FrameSource):
+    """ Pre-colored uint8 RGBA frames of a FrameSource. Frames are colored a batch at a time with a lookup table, so
+    the images get RGBA data and matplotlib skips normalization and color mapping on every draw.
+
+    Windows (window animations) are kept in a colored ring buffer of the visible strip: when the window moves
+    forward only the new columns are read and colored. The ring is stored twice side by side, so every window is a
+    contiguous view of it, with no shifting.
+    """
+
+    def __init__(self, source, lut=None, vmin=0, vmax=1, batch=16, is_rgb=False):
+        """
+
+        :param source: FrameSource
+        :param lut: lookup table from make_lut (not used with is_rgb)
+        :param vmin: value of the first color
+        :param vmax: value of the last color
+        :param batch: number of frames to color at once
+        :param is_rgb: source has RGB data (window animation)
+        """
+        self.source = source
+        self.lut = lut
+        self.vmin = vmin
+        self.vmax = vmax
+        self.batch = max(int(batch), 1)
+        self.is_rgb = is_rgb
+        self.shape = tuple(source.shape[:-1] if is_rgb else source.shape) + (4,)
+        self.dtype = np.dtype(np.uint8)
+        self._batch_start = None
+        self._batch_data = None
+        self._strip = None
+        self._strip_start = None
+
+    def colorize(self, data):
+        if self.is_rgb:
+            return rgb_to_rgba(data)
+        return apply_lut(data, self.lut, self.vmin, self.vmax)
+
+    def get_frame(self, i):
+        if self._batch_start is None or not self._batch_start <= i < self._batch_start + len(self._batch_data):
+            self._batch_start = i
+            self._batch_data = self.colorize(self.source.get_frames(i, i + self.batch))
+        return self._batch_data[i - self._batch_start]
+
+    def get_frames(self, start, stop):
+        return self.colorize(self.source.get_frames(start, stop))
+
+    def get_window(self, start, stop):
+        """ Colored columns start:stop, a view of the ring buffer that is only valid until the next call """
+        width = stop - start
+        previous = self._strip_start
+        if self._strip is None or self._strip.shape[1] != 2 * width or not previous <= start < previous + width:
+            colored = self.colorize(self.source.get_window(start, stop))
+            self._strip = np.empty((colored.shape[0], 2 * width) + colored.shape[2:], dtype=np.uint8)
+            index = np.arange(start, stop) % width
+        else:
+            # only the columns that entered the window
+            colored = self.colorize(self.source.get_window(previous + width, stop))
+            index = np.arange(previous + width, stop) % width
+        self._strip[:, index] = colored
+        self._strip[:, index + width] = colored
+        self._strip_start = start
+        offset = start % width
+        return self._strip[:, offset:offset + width]
@@ -0,0 +1,298 @@
+from __future__ import print_function, division, unicode_literals
+
+import os
+
+from matplotlib.animation import AbstractMovieWriter
+from matplotlib.image import imsave
+import numpy as np
+
+from .gif import GifWriter
+from .RawPipeWriter import RawPipeWriter
+
+
+class Output(object):
+    """ Target of a render fanned out by MultiWriter. Gets the RGBA pixels (height, width, 4) of every frame it
+    takes, the frames are rendered once for all the outputs.
+    """
+    extension = ''
+
+    def __init__(self, suffix='', step=1):
+        """
+
+        :param suffix: added to the path given to Movie.save, to save outputs of the same type side by side
+        :param step: take every step-th rendered frame
+        """
+        if int(step) < 1:
+            raise ValueError('step should be at least 1 got: %s' % step)
+        self.suffix = suffix
+        self.step = int(step)
+        self.paths = []
+
+    def path(self, base):
+        return base + self.suffix + self.extension
+
+    def takes(self, position, frame):
+        """ Whether the frame at this position of the render is written to this output """
+        return position % self.step == 0
+
+    def setup(self, fig, base, dpi, fps, codec, frames):
+        """ Called before the first frame
+
+        :param fig: figure of the animation
+        :param base: path given to Movie.save (without extension)
+        :param dpi: dpi of the frames
+        :param fps: frames per second of the render
+        :param codec: codec given to Movie.save
+        :param frames: frame indices rendered
+        :return:
+        """
+        self.paths = []
+
+    def write(self, rgba, position, frame):
+        pass
+
+    def finish(self):
+        pass
+
+
+class VideoOutput(Output):
+    """ Movie encoded by ffmpeg, e.g. VideoOutput(bitrate=8000, suffix='_talk') """
+    extension = '.mp4'
+
+    def __init__(self, codec=None, bitrate=None, fps=None, extra_args=None, suffix='', step=1):
+        """
+
+        :param codec: codec to use, None for the codec of Movie.save
+        :param bitrate: bitrate in kbps, None for the default of the codec
+        :param fps: frames per second of this output, None for the fps of Movie.save
+        :param extra_args: other ffmpeg output arguments
+        :param suffix: see Output
+        :param step: see Output
+        """
+        Output.__init__(self, suffix, step)
+        self.codec = codec
+        self.bitrate = bitrate
+        self.fps = fps
+        self.extra_args = extra_args
+        self.writer = None
+
+    def make_writer(self, fps, codec):
+        return RawPipeWriter(fps=fps, codec=self.codec if self.codec is not None else codec, bitrate=self.bitrate,
+                             extra_args=self.extra_args)
+
+    def setup(self, fig, base, dpi, fps, codec, frames):
+        Output.setup(self, fig, base, dpi, fps, codec, frames)
+        self.writer = self.make_writer(self.fps if self.fps is not None else fps / self.step, codec)
+        self.writer.setup(fig, self.path(base), dpi)
+        self.paths = [self.path(base)]
+
+    def write(self, rgba, position, frame):
+        self.writer.write_frame(rgba)
+
+    def finish(self):
+        if self.writer is not None:
+            self.writer.finish()
+            self.writer = None
+
+
+class GifOutput(VideoOutput):
+    """ GIF encoded in this process as the frames are rendered (see gif.GifWriter), e.g. GifOutput(step=2) for half
+    the frames
+    """
+    extension = '.gif'
+
+    def __init__(self, fps=None, suffix='', step=1, palette='global', palette_frames=8, dither=False, optimize=True,
+                 loop=0):
+        """
+
+        :param fps: frames per second of this output, None for the fps of Movie.save
+        :param suffix: see Output
+        :param step: see Output
+        :param palette: palette, palette_frames, dither, optimize, loop: see gif.GifWriter
+        """
+        VideoOutput.__init__(self, fps=fps, suffix=suffix, step=step)
+        if palette not in ('global', 'frame'):
+            raise ValueError('palette should be global or frame got: %s' % palette)
+        self.gif_kwargs = {'palette': palette, 'palette_frames': palette_frames, 'dither': dither,
+                           'optimize': optimize, 'loop': loop}
+
+    def make_writer(self, fps, codec):
+        return GifWriter(fps=fps, **self.gif_kwargs)
+
+
+class PngSequence(Output):
+    """ One PNG file per frame in a directory: <path><suffix>_frames/frame_<frame index>.png """
+
+    def __init__(self, suffix='', step=1):
+        Output.__init__(self, suffix, step)
+        self.directory = None
+
+    def setup(self, fig, base, dpi, fps, codec, frames):
+        Output.setup(self, fig, base, dpi, fps, codec, frames)
+        self.directory = base + self.suffix + '_frames'
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self.paths = [self.directory]
+
+    def write(self, rgba, position, frame):
+        imsave(os.path.join(self.directory, 'frame_%05d.png' % frame), rgba)
+
+
+class StillFrames(Output):
+    """ PNG files of selected frames: <path><suffix>_<frame index>.png, e.g. a poster frame with StillFrames([0]) """
+
+    def __init__(self, frames, suffix=''):
+        """
+
+        :param frames: frame indices to save, frames that are not rendered are skipped
+        :param suffix: see Output
+        """
+        Output.__init__(self, suffix)
+        self.frames = set(int(f) for f in frames)
+        self.base = None
+
+    def setup(self, fig, base, dpi, fps, codec, frames):
+        Output.setup(self, fig, base, dpi, fps, codec, frames)
+        self.base = base
+
+    def takes(self, position, frame):
+        return frame in self.frames
+
+    def write(self, rgba, position, frame):
+        path = '%s%s_%05d.png' % (self.base, self.suffix, frame)
+        imsave(path, rgba)
+        self.paths.append(path)
+
+
+class ThumbnailStrip(Output):
+    """ One PNG of n evenly spaced frames side by side, shrunk to height pixels: <path><suffix>.png """
+    extension = '.png'
+
+    def __init__(self, n=8, height=120, suffix='_strip'):
+        """
+
+        :param n: number of frames in the strip
+        :param height: height of the strip in pixels
+        :param suffix: see Output
+        """
+        Output.__init__(self, suffix)
+        self.n = int(n)
+        self.height = int(height)
+        if self.n < 1 or self.height < 1:
+            raise ValueError('n and height should be at least 1 got: %s, %s' % (n, height))
+        self.positions = set()
+        self.thumbnails = []
+        self.strip_path = None
+
+    def setup(self, fig, base, dpi, fps, codec, frames):
+        Output.setup(self, fig, base, dpi, fps, codec, frames)
+        self.positions = set(np.linspace(0, len(frames) - 1, min(self.n, len(frames))).round().astype(int))
+        self.thumbnails = []
+        self.strip_path = self.path(base)
+
+    def takes(self, position, frame):
+        return position in self.positions
+
+    def write(self, rgba, position, frame):
+        height, width = rgba.shape[:2]
+        thumbnail_width = max(1, int(round(width * self.height / height)))
+        # pixel centers, nearest neighbor
+        rows = ((np.arange(self.height) + 0.5) * height / self.height).astype(int)
+        columns = ((np.arange(thumbnail_width) + 0.5) * width / thumbnail_width).astype(int)
+        self.thumbnails.append(rgba[rows][:, columns])
+
+    def finish(self):
+        if self.thumbnails:
+            imsave(self.strip_path, np.concatenate(self.thumbnails, axis=1))
+            self.paths = [self.strip_path]
+            self.thumbnails = []
+
+
+OUTPUT_TYPES = {'video': VideoOutput, 'gif': GifOutput, 'png': PngSequence, 'stills': StillFrames,
+                'strip': ThumbnailStrip}
+
+
+def as_output(output):
+    """ Output instance of an Output or of a dict with its type (see OUTPUT_TYPES) and arguments, e.g.
+    {'type': 'gif', 'step': 2}
+    """
+    if isinstance(output, Output):
+        return output
+    if isinstance(output, dict) and output.get('type') in OUTPUT_TYPES:
+        kwargs = dict(output)
+        return OUTPUT_TYPES[kwargs.pop('type')](**kwargs)
+    raise ValueError('Expected an Output or a dict with a type in %s got: %r' % (sorted(OUTPUT_TYPES), output))
+
+
+class MultiWriter(AbstractMovieWriter):
+    """ Writer that gives every rendered frame to several outputs, so a movie is rendered once for an mp4, a GIF,
+    PNG frames, stills and a thumbnail strip. Takes frame buffers (write_frame) like RawPipeWriter, only the encoding
+    is done once per output.
+    """
+
+    def __init__(self, outputs, fps, codec, frames):
+        """
+
+        :param outputs: list of Output
+        :param fps: frames per second of the render
+        :param codec: default codec of the video outputs
+        :param frames: frame indices rendered, in order
+        """
+        if len(outputs) == 0:
+            raise ValueError('At least one output is needed')
+        self.outputs = outputs
+        self.fps = fps
+        self.codec = codec
+        self.frames = frames
+        self.fig = None
+        self.position = 0
+        self.started = []
+
+    @property
+    def paths(self):
+        """ files (and directories of PNG sequences) saved by the outputs """
+        return [path for output in self.outputs for path in output.paths]
+
+    @property
+    def frame_size(self):
+        return self.fig.canvas.get_width_height()
+
+    def setup(self, fig, outfile, dpi=None):
+        """
+
+        :param fig: figure of the animation
+        :param outfile: path given to Movie.save (without extension)
+        :param dpi: dpi of the frames, None for the figure dpi
+        :return:
+        """
+        self.fig = fig
+        if dpi is not None and dpi != fig.dpi:
+            fig.set_dpi(dpi)
+        self.position = 0
+        self.started = []
+        for output in self.outputs:
+            output.setup(fig, outfile, fig.dpi, self.fps, self.codec, self.frames)
+            self.started.append(output)
+
+    def grab_frame(self, **savefig_kwargs):
+        self.fig.canvas.draw()
+        self.write_frame(self.fig.canvas.buffer_rgba())
+
+    def write_frame(self, buffer):
+        """ Give one frame of RGBA pixels (frame_size) to the outputs that take it
+
+        :param buffer: object supporting the buffer protocol or array, e.g. canvas.buffer_rgba()
+        :return:
+        """
+        width, height = self.frame_size
+        rgba = np.frombuffer(buffer, np.uint8).reshape(height, width, 4)
+        frame = self.frames[self.position]
+        for output in self.outputs:
+            if output.takes(self.position, frame):
+                output.write(rgba, self.position, frame)
+        self.position += 1
+
+    def finish(self):
+        for output in self.started:
+            output.finish()
+        self.started = []
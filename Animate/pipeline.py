@@ -0,0 +1,136 @@
+from __future__ import print_function, division, unicode_literals
+
+import threading
+
+from matplotlib.animation import AbstractMovieWriter
+import numpy as np
+
+from .progress import timer
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class PipelinedWriter(AbstractMovieWriter):
+    """ Writes the frames of a writer that takes frame buffers (ffmpeg_raw, MultiWriter) from a thread, so the next
+    frame is drawn while the encoder takes the last one. Frames are copied into depth preallocated buffers that are
+    reused: when they are all waiting for the encoder write_frame blocks (a stall) until one is free.
+
+    The write stage of RenderProgress is the time to hand the frame to the thread (the copy and the stalls), stats()
+    gives the queue depth and stall metrics.
+    """
+
+    def __init__(self, writer, depth=3):
+        """
+
+        :param writer: writer with a write_frame method
+        :param depth: number of frame buffers, the most frames drawn ahead of the encoder
+        """
+        if not hasattr(writer, 'write_frame'):
+            raise ValueError('the pipelined writer needs a writer that takes frame buffers (e.g. ffmpeg_raw) got: %s' %
+                             type(writer).__name__)
+        if int(depth) < 1:
+            raise ValueError('depth should be at least 1 got: %s' % depth)
+        self.writer = writer
+        self.depth = int(depth)
+        self._free = None
+        self._queued = None
+        self._thread = None
+        self._error = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.n_frames = 0
+        self.stalls = 0
+        self.stall_seconds = 0.0
+        self.queue_depths = []
+        self.encode_seconds = 0.0
+        self.idle_seconds = 0.0
+
+    @property
+    def fps(self):
+        return self.writer.fps
+
+    @property
+    def frame_size(self):
+        return self.writer.frame_size
+
+    def setup(self, fig, outfile, dpi=None):
+        self.writer.setup(fig, outfile, dpi)
+        width, height = self.frame_size
+        self._free = queue.Queue()
+        for i in range(self.depth):
+            self._free.put(np.empty((height, width, 4), np.uint8))
+        self._queued = queue.Queue()
+        self._error = None
+        self._reset_stats()
+        self._thread = threading.Thread(target=self._encode, name='PipelinedWriter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _encode(self):
+        while True:
+            waiting = timer()
+            buffer = self._queued.get()
+            started = timer()
+            self.idle_seconds += started - waiting
+            if buffer is None:
+                return
+            if self._error is None:
+                try:
+                    self.writer.write_frame(buffer)
+                except Exception as e:
+                    # keep taking the frames so write_frame does not wait for a free buffer forever
+                    self._error = e
+            self.encode_seconds += timer() - started
+            self._free.put(buffer)
+
+    def grab_frame(self, **savefig_kwargs):
+        self.writer.fig.canvas.draw()
+        self.write_frame(self.writer.fig.canvas.buffer_rgba())
+
+    def write_frame(self, buffer):
+        """ Copy a frame of RGBA pixels (frame_size) into a free buffer and queue it for the encoder
+
+        :param buffer: object supporting the buffer protocol or array, e.g. canvas.buffer_rgba()
+        :return:
+        """
+        if self._error is not None:
+            raise IOError('Error writing frames: %s' % self._error)
+        self.queue_depths.append(self._queued.qsize())
+        try:
+            frame = self._free.get_nowait()
+        except queue.Empty:
+            start = timer()
+            frame = self._free.get()
+            self.stalls += 1
+            self.stall_seconds += timer() - start
+        frame.reshape(-1)[:] = np.frombuffer(buffer, np.uint8)
+        self._queued.put(frame)
+        self.n_frames += 1
+
+    def finish(self):
+        """ Wait for the encoder to take the queued frames and finish the writer """
+        if self._thread is not None:
+            self._queued.put(None)
+            self._thread.join()
+            self._thread = None
+        self.writer.finish()
+        if self._error is not None:
+            raise IOError('Error writing frames: %s' % self._error)
+
+    def stats(self):
+        """ Metrics of the pipeline
+
+        :return: dict with the depth, frames written, stalls (write_frame waiting for a free buffer) and their
+         seconds, maximal and mean number of frames queued when a frame is written, seconds of the encoder thread
+         writing and waiting for frames
+        """
+        depths = np.array(self.queue_depths, dtype=float)
+        return {'depth': self.depth, 'frames': self.n_frames, 'stalls': self.stalls,
+                'stall_seconds': self.stall_seconds,
+                'max_queued': int(depths.max()) if len(depths) > 0 else 0,
+                'mean_queued': float(depths.mean()) if len(depths) > 0 else 0.0,
+                'encode_seconds': self.encode_seconds, 'encoder_idle_seconds': self.idle_seconds}
@@ -0,0 +1,188 @@
+from __future__ import print_function, division, unicode_literals
+
+import json
+import sys
+import timeit
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+timer = timeit.default_timer
+STAGES = ('update', 'draw', 'write')
+
+
+def peak_rss():
+    """ Peak resident memory in bytes of this process and of its finished child processes (render workers)
+
+    :return: bytes, None where the resource module is not available (windows)
+    """
+    if resource is None:
+        return None
+    # kilobytes on linux, bytes on mac
+    scale = 1 if sys.platform == 'darwin' else 1024
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage * scale
+
+
+class RenderProgress(object):
+    """ Progress and metrics hook of Movie.save. Gets the timings of every rendered frame split into the stages of
+    the frame pipeline:
+
+        update: updating the artists (Animation._draw_frame)
+        draw: drawing the canvas, None when the writer draws as part of grabbing the frame (stock writers)
+        write: handing the frame to the encoder (the whole grab_frame for stock writers)
+
+    Sub classes override log to show the progress, report gives throughput, ETA, peak memory and stage statistics.
+    """
+
+    def __init__(self):
+        self.n_frames = 0
+        self.info = {}
+        self.frames = []
+        self.start_time = None
+        self.end_time = None
+
+    def start(self, n_frames, **info):
+        """ Called once before the first frame
+
+        :param n_frames: number of frames to render
+        :param info: details of the render (path, writer, fps, ...) to put in the report
+        :return:
+        """
+        self.n_frames = n_frames
+        self.info = info
+        self.frames = []
+        self.start_time = timer()
+        self.end_time = None
+
+    def frame(self, frame, update, draw, write):
+        """ Called after every frame
+
+        :param frame: frame index
+        :param update: seconds spent updating the artists
+        :param draw: seconds spent drawing the canvas or None
+        :param write: seconds spent writing the frame
+        :return:
+        """
+        self.frames.append((frame, update, draw, write))
+        self.log()
+
+    def finish(self):
+        """ Called once after the last frame
+
+        :return:
+        """
+        self.end_time = timer()
+
+    def log(self):
+        pass
+
+    @property
+    def done(self):
+        return len(self.frames)
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0
+        return (self.end_time if self.end_time is not None else timer()) - self.start_time
+
+    @property
+    def throughput(self):
+        """ frames per second rendered so far """
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0
+
+    @property
+    def eta(self):
+        """ seconds left, None before the first frame """
+        throughput = self.throughput
+        if throughput == 0:
+            return None
+        return (self.n_frames - self.done) / throughput
+
+    def stage_stats(self):
+        """ total, mean and max seconds per stage, stages without timings are None
+
+        :return: dict stage -> dict
+        """
+        stats = {}
+        for i, stage in enumerate(STAGES):
+            values = np.array([f[i + 1] for f in self.frames if f[i + 1] is not None], dtype=float)
+            if len(values) == 0:
+                stats[stage] = None
+            else:
+                stats[stage] = {'total': float(values.sum()), 'mean': float(values.mean()),
+                                'max': float(values.max())}
+        return stats
+
+    def report(self):
+        """ Structured report of the render
+
+        :return: dict that can be saved as JSON
+        """
+        rss = peak_rss()
+        report = dict(self.info)
+        report.update({'n_frames': self.n_frames, 'frames_done': self.done, 'elapsed': self.elapsed,
+                       'throughput': self.throughput, 'peak_rss_mb': rss / 2.0 ** 20 if rss is not None else None,
+                       'stages': self.stage_stats(), 'frame_fields': ['frame'] + list(STAGES),
+                       'frames': [[int(f[0])] + list(f[1:]) for f in self.frames]})
+        return report
+
+    def save_report(self, path):
+        """ Write the report as JSON
+
+        :param path: full path of the JSON file
+        :return:
+        """
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=1)
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours > 0:
+        return '%d:%02d:%02d' % (hours, minutes, seconds)
+    return '%d:%02d' % (minutes, seconds)
+
+
+class PrintProgress(RenderProgress):
+    """ Prints one status line (frames, throughput, ETA and peak memory) at most every interval seconds """
+
+    def __init__(self, interval=1.0, stream=None):
+        """
+
+        :param interval: minimal seconds between two status lines
+        :param stream: file to print to, defaults to sys.stdout
+        """
+        RenderProgress.__init__(self)
+        self.interval = interval
+        self.stream = stream
+        self._last_log = None
+
+    def status(self):
+        rss = peak_rss()
+        line = 'frame %d/%d, %.1f fps, ETA %s' % (self.done, self.n_frames, self.throughput,
+                                                  format_seconds(self.eta))
+        if rss is not None:
+            line += ', peak RSS %d MB' % (rss // 2 ** 20)
+        return line
+
+    def log(self):
+        now = timer()
+        if self._last_log is None or now - self._last_log >= self.interval or self.done == self.n_frames:
+            self._last_log = now
+            print(self.status(), file=self.stream if self.stream is not None else sys.stdout)
+
+    def finish(self):
+        RenderProgress.finish(self)
+        print('rendered %d frames in %s (%.1f fps)' % (self.done, format_seconds(self.elapsed), self.throughput),
+              file=self.stream if self.stream is not None else sys.stdout)
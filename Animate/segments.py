@@ -0,0 +1,126 @@
+from __future__ import print_function, division, unicode_literals
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+
+from matplotlib.animation import writers
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .Animation import Animation, frame_range
+from .progress import RenderProgress
+
+
+def split_frames(frames, n_chunks):
+    """ Split frame indices into contiguous chunks of (almost) equal size
+
+    :param frames: sequence of frame indices (e.g. frame_range(movie))
+    :param n_chunks: number of chunks to make, empty chunks are dropped
+    :return: list of frame index slices
+    """
+    bounds = np.linspace(0, len(frames), n_chunks + 1).astype(int)
+    return [frames[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def setup_worker(movie):
+    """ Prepare a worker process to draw a movie: off-screen backend and the custom styles of the movie
+
+    :param movie: Movie instance
+    :return:
+    """
+    plt.switch_backend('agg')
+    plt.style.library.update(movie.styles)
+    if movie.style is not None:
+        plt.style.use(movie.style)
+
+
+def render_segment(job, in_worker=True):
+    """ Render a chunk of frames of a movie to its own file. In a worker process the figure is built off-screen from
+    the Movie spec and the custom styles are registered again.
+
+    :param job: tuple of (movie, frames, path, writer_name, fps, codec, animation_kwargs, render_kwargs), the
+     kwargs are forwarded to Animation and Animation.render
+    :param in_worker: True in a worker process (see setup_worker)
+    :return: path of the segment and the frame timings (see RenderProgress.frames)
+    """
+    movie, frames, path, writer_name, fps, codec, animation_kwargs, render_kwargs = job
+    if in_worker:
+        setup_worker(movie)
+    animation = Animation(movie, fps=fps, frames=frames, **animation_kwargs)
+    writer = writers[writer_name](fps=fps, codec=codec)
+    progress = RenderProgress()
+    animation.render(path, writer, savefig_kwargs={'facecolor': movie.fig_color}, progress=progress, **render_kwargs)
+    plt.close(animation.fig)
+    return path, progress.frames
+
+
+def concat_segments(segment_paths, path, bin_path):
+    """ Join segments encoded with the same codec into one file without re-encoding (ffmpeg concat demuxer)
+
+    :param segment_paths: segment files in order
+    :param path: output file
+    :param bin_path: ffmpeg executable
+    :return:
+    """
+    list_path = os.path.splitext(segment_paths[0])[0] + '_list.txt'
+    with open(list_path, 'w') as f:
+        for segment_path in segment_paths:
+            f.write("file '%s'\n" % os.path.abspath(segment_path).replace("'", "'\\''"))
+    command = [bin_path, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+               '-c', 'copy', path]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError('Could not join segments into %s: %s' % (path, err.decode('utf-8', 'replace')))
+
+
+def save_segments(movie, path, writer_name, fps, codec, workers, progress=None, frames=None, animation_kwargs=None,
+                  render_kwargs=None):
+    """ Save a movie by rendering contiguous chunks of frames in a pool of processes, each with its own figure,
+    and joining the encoded segments losslessly.
+
+    :param movie: Movie instance
+    :param path: full path of the output file (with extension)
+    :param writer_name: ffmpeg based writer from matplotlib.animation.writers
+    :param fps: frames per second
+    :param codec: codec to use
+    :param workers: number of processes
+    :param progress: RenderProgress, gets the frame timings of each segment when it is done
+    :param frames: frame indices to render, None for frame_range(movie)
+    :param animation_kwargs: forwarded to Animation in every worker
+    :param render_kwargs: forwarded to Animation.render in every worker
+    :return:
+    """
+    if frames is None:
+        frames = frame_range(movie)
+    if animation_kwargs is None:
+        animation_kwargs = {}
+    if render_kwargs is None:
+        render_kwargs = {}
+    chunks = split_frames(frames, workers)
+    extension = os.path.splitext(path)[1]
+    directory = tempfile.mkdtemp(prefix='segments_', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        jobs = [(movie, chunk, os.path.join(directory, 'segment_%05d%s' % (i, extension)), writer_name, fps, codec,
+                 animation_kwargs, render_kwargs) for i, chunk in enumerate(chunks)]
+        if progress is not None:
+            progress.start(len(frames), path=path, writer=writer_name, fps=fps, workers=workers)
+        segment_paths = []
+        pool = multiprocessing.Pool(processes=min(workers, len(jobs)))
+        try:
+            for segment_path, timings in pool.imap(render_segment, jobs, chunksize=1):
+                segment_paths.append(segment_path)
+                if progress is not None:
+                    for timing in timings:
+                        progress.frame(*timing)
+        finally:
+            pool.close()
+            pool.join()
+        concat_segments(segment_paths, path, writers[writer_name].bin_path())
+        if progress is not None:
+            progress.finish()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,275 @@
+""" Declarative movie specs: a JSON or YAML file that mirrors the Movie methods
+
+    movie:                  # keyword arguments of Movie()
+      dt: 0.05
+      fig_kwargs: {figsize: [8, 6]}
+    steps:                  # Movie method calls, in order
+      - add_image: {data: stack.npy, c_title: dF/F}
+      - add_axis: {x_label: time, y_label: dF/F}
+      - add_trace: {data: mean.npy, axis: 0, label: mean}
+      - add_time_label: {}
+      - add_scale_bar: {pixel_width: 50, um_width: '100'}
+    save:                   # keyword arguments of Movie.save
+      path: out/session1    # without extension
+      writer_name: ffmpeg_raw
+      frames: {start: 0, stop: 500, step: 2}
+
+Data is referenced by path (relative to the spec file): .npy (memory mapped) for any data argument and .tif/.tiff
+for images. This module only needs numpy, matplotlib is imported when a movie is built, so specs validate quickly.
+"""
+from __future__ import print_function, division, unicode_literals
+
+import io
+import json
+import os
+
+from .checks import *
+
+# Movie methods a spec can call: required arguments, optional arguments and whether other keyword arguments are
+# forwarded (to matplotlib)
+METHODS = {
+    'add_image': (('data',), ('animation_type', 'style', 'c_title', 'c_style', 'ylim_type', 'ylim_value',
+                              'window_size', 'window_step', 'is_rgb', 'ylim_sample', 'lut', 'lut_batch', 'downsample'),
+                  False),
+    'add_axis': (('x_label', 'y_label'), ('style', 'running_line', 'bottom_left_ticks', 'ylim_type', 'ylim_value',
+                                          'tight_x', 'label_kwargs', 'legend_kwargs', 'decimate', 'scroll'),
+                 True),
+    'add_trace': (('data',), ('axis',), True),
+    'add_label': (('x', 'y', 'values'), ('axis', 's_format', 'size'), True),
+    'add_time_label': ((), ('x', 'y', 'values', 'axis', 's_format', 'size'), True),
+    'add_annotation': (('axis', 'xy', 'xy_text', 'text'), ('axis_type',), True),
+    'add_variable_annotation': (('axis', 'xy_array', 'xy_text_array', 'text_array'), ('axis_type',), True),
+    'add_rectangle_annotation': (('axis', 'xy', 'width', 'height', 'angle'), ('axis_type',), True),
+    'add_line_annotation': (('axis', 'x', 'y'), ('axis_type',), True),
+    'add_text_annotation': (('axis', 'x', 'y', 'text'), ('axis_type',), True),
+    'add_circle_annotation': (('axis', 'x', 'y', 'radius'), ('axis_type',), True),
+    'add_point_overlay': (('axis', 'xy'), ('sizes', 'colors', 'axis_type'), True),
+    'add_scale_bar': ((), ('axis', 'x_offset', 'pixel_width', 'um_width', 'y', 'text_offset', 'line_kwargs',
+                           'text_kwargs'), False),
+}
+MOVIE_ARGUMENTS = ('style', 'dt', 'fig_kwargs', 'fig_color', 'height_ratio')
+# progress is given by the caller
+SAVE_ARGUMENTS = ('path', 'writer_name', 'fps', 'codec', 'workers', 'report_path', 'cache_static', 'frames', 'dpi',
+                  'preview', 'backend', 'resize', 'checkpoint', 'checkpoint_dir', 'cache', 'outputs',
+                  'pipeline', 'writer_kwargs')
+# arguments of Movie.save that are numbers (or None)
+SAVE_NUMBERS = ('fps', 'workers', 'dpi', 'checkpoint', 'pipeline')
+# arguments that can be the path of a data file, and the extensions they accept
+DATA_ARGUMENTS = {
+    'add_image': {'data': ('.npy', '.tif', '.tiff')},
+    'add_trace': {'data': ('.npy',)},
+    'add_label': {'values': ('.npy',)},
+    'add_time_label': {'values': ('.npy',)},
+    'add_variable_annotation': {'xy_array': ('.npy',), 'xy_text_array': ('.npy',), 'text_array': ('.npy',)},
+    # colors can be a color name
+    'add_point_overlay': {'xy': ('.npy',), 'sizes': ('.npy',)},
+}
+
+
+def _check_axis_type(value, name):
+    check_axis_type(value)
+
+
+def _check_axis(value, name):
+    check_axis(value)
+
+
+# the checks.py rules Movie applies to the arguments of each method
+CHECKS = {
+    'add_axis': {'x_label': check_text, 'y_label': check_text, 'running_line': check_dict,
+                 'bottom_left_ticks': check_bool, 'ylim_type': check_text, 'tight_x': check_bool,
+                 'label_kwargs': check_dict, 'legend_kwargs': check_dict},
+    'add_trace': {'axis': _check_axis},
+    'add_label': {'x': check_number, 'y': check_number, 'axis': _check_axis, 's_format': check_text},
+    'add_time_label': {'x': check_number, 'y': check_number, 'axis': _check_axis, 's_format': check_text},
+    'add_annotation': {'axis': _check_axis, 'xy': check_location, 'xy_text': check_location,
+                       'axis_type': _check_axis_type},
+    'add_variable_annotation': {'axis': _check_axis, 'axis_type': _check_axis_type},
+    'add_rectangle_annotation': {'axis': _check_axis, 'xy': check_location, 'width': check_number,
+                                 'height': check_number, 'angle': check_number, 'axis_type': _check_axis_type},
+    'add_line_annotation': {'axis': _check_axis, 'x': check_locations, 'y': check_locations,
+                            'axis_type': _check_axis_type},
+    'add_text_annotation': {'axis': _check_axis, 'x': check_number, 'y': check_number, 'text': check_text,
+                            'axis_type': _check_axis_type},
+    'add_circle_annotation': {'axis': _check_axis, 'x': check_number, 'y': check_number, 'radius': check_number,
+                              'axis_type': _check_axis_type},
+    'add_point_overlay': {'axis': _check_axis, 'axis_type': _check_axis_type},
+    'add_scale_bar': {'axis': _check_axis, 'x_offset': check_number, 'pixel_width': check_number,
+                      'um_width': check_text, 'y': check_number, 'text_offset': check_number,
+                      'line_kwargs': check_dict, 'text_kwargs': check_dict},
+}
+
+
+def load_spec(path):
+    """ Read a spec file, JSON or YAML (.yml, .yaml, needs PyYAML)
+
+    :param path: path of the spec
+    :return: spec dict
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with io.open(path, encoding='utf-8') as f:
+        if extension in ('.yml', '.yaml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError('PyYAML is needed to read %s' % path)
+            spec = yaml.safe_load(f)
+        elif extension == '.json':
+            spec = json.load(f)
+        else:
+            raise ValueError('Expected a .json, .yml or .yaml spec got: %s' % path)
+    if not isinstance(spec, dict):
+        raise ValueError('%s should hold a mapping got: %s' % (path, type(spec)))
+    return spec
+
+
+def data_path(value, base_dir):
+    """ Full path of a data file referenced by a spec """
+    return os.path.normpath(os.path.join(base_dir, os.path.expanduser(value)))
+
+
+def _unknown(kwargs, allowed, where):
+    return ['%s: unknown argument %s' % (where, name) for name in sorted(kwargs) if name not in allowed]
+
+
+def validate_step(index, step, base_dir, n_images, n_axes):
+    """ Errors of one step of a spec
+
+    :return: list of error messages
+    """
+    where = 'steps[%d]' % index
+    if not isinstance(step, dict) or len(step) != 1:
+        return ['%s: should be a mapping of one method name to its arguments got: %r' % (where, step)]
+    method, kwargs = list(step.items())[0]
+    where += ' %s' % method
+    if method not in METHODS:
+        return ['%s: unknown method, expected one of %s' % (where, ', '.join(sorted(METHODS)))]
+    if kwargs is None:
+        kwargs = {}
+    if not isinstance(kwargs, dict):
+        return ['%s: arguments should be a mapping got: %r' % (where, kwargs)]
+    required, optional, forwards = METHODS[method]
+    errors = ['%s: missing argument %s' % (where, name) for name in required if name not in kwargs]
+    if not forwards:
+        errors += _unknown(kwargs, required + optional, where)
+    for name, extensions in DATA_ARGUMENTS.get(method, {}).items():
+        value = kwargs.get(name)
+        if isinstance(value, basestring):
+            path = data_path(value, base_dir)
+            if os.path.splitext(path)[1].lower() not in extensions:
+                errors.append('%s: %s should be a %s file got: %s' % (where, name, ', '.join(extensions), value))
+            elif not os.path.isfile(path):
+                errors.append('%s: %s file not found: %s' % (where, name, path))
+    for name, check in CHECKS.get(method, {}).items():
+        if name in kwargs:
+            try:
+                check(kwargs[name], name)
+            except ValueError as e:
+                errors.append('%s: %s' % (where, e))
+            except TypeError as e:
+                # a check that does not expect the type of the value (e.g. len of a number)
+                errors.append('%s: %s is not valid: %s' % (where, name, e))
+    axis = kwargs.get('axis', 0)
+    if isinstance(axis, int):
+        if method == 'add_trace' and axis >= n_axes:
+            errors.append('%s: axis %d is added by a later add_axis step or not at all' % (where, axis))
+        elif method != 'add_trace' and method not in ('add_image', 'add_axis'):
+            if kwargs.get('axis_type', 'image') == 'image' and axis >= n_images:
+                errors.append('%s: there is no image %d' % (where, axis))
+            elif kwargs.get('axis_type') == 'trace' and axis >= n_axes:
+                errors.append('%s: there is no trace axis %d' % (where, axis))
+    return errors
+
+
+def validate_spec(spec, base_dir='.'):
+    """ Check a spec with the rules the Movie methods apply, without loading the data or matplotlib
+
+    :param spec: spec dict (see load_spec)
+    :param base_dir: directory the data paths are relative to (the directory of the spec file)
+    :return: list of error messages, empty if the spec is valid
+    """
+    errors = _unknown(spec, ('movie', 'steps', 'save'), 'spec')
+    movie = spec.get('movie', {})
+    if not isinstance(movie, dict):
+        errors.append('movie: should be a mapping of Movie arguments got: %r' % movie)
+    else:
+        errors += _unknown(movie, MOVIE_ARGUMENTS, 'movie')
+    steps = spec.get('steps', [])
+    if not isinstance(steps, list):
+        errors.append('steps: should be a list got: %r' % steps)
+        steps = []
+    n_images = n_axes = 0
+    for index, step in enumerate(steps):
+        errors += validate_step(index, step, base_dir, n_images, n_axes)
+        if isinstance(step, dict) and len(step) == 1:
+            n_images += 'add_image' in step
+            n_axes += 'add_axis' in step
+    if n_images == 0:
+        errors.append('steps: at least one add_image step is needed')
+    save = spec.get('save')
+    if not isinstance(save, dict):
+        errors.append('save: should be a mapping of Movie.save arguments with at least a path got: %r' % save)
+    else:
+        errors += _unknown(save, SAVE_ARGUMENTS, 'save')
+        if not isinstance(save.get('path'), basestring):
+            errors.append('save: path should be a string got: %r' % save.get('path'))
+        for name in SAVE_NUMBERS:
+            if save.get(name) is not None:
+                try:
+                    check_number(save[name], name)
+                except ValueError as e:
+                    errors.append('save: %s' % e)
+        frames = save.get('frames')
+        if isinstance(frames, dict):
+            errors += _unknown(frames, ('start', 'stop', 'step'), 'save: frames')
+        elif frames is not None and not isinstance(frames, list):
+            errors.append('save: frames should be a list of frame indices or a mapping of start, stop and step')
+    return errors
+
+
+def _load_data(value, base_dir):
+    import numpy as np
+    if isinstance(value, basestring):
+        return np.load(data_path(value, base_dir), mmap_mode='r')
+    return value
+
+
+def build_movie(spec, base_dir='.'):
+    """ Make the Movie of a valid spec (see validate_spec), data files are opened lazily (memory mapped)
+
+    :param spec: spec dict
+    :param base_dir: directory the data paths are relative to
+    :return: Movie instance
+    """
+    from .Movie import Movie
+    movie = Movie(**spec.get('movie', {}))
+    for step in spec.get('steps', []):
+        method, kwargs = list(step.items())[0]
+        kwargs = dict(kwargs or {})
+        for name in DATA_ARGUMENTS.get(method, {}):
+            if name not in kwargs:
+                continue
+            if method == 'add_image' and isinstance(kwargs[name], basestring):
+                # read one frame at a time by the FrameSource of the file
+                kwargs[name] = data_path(kwargs[name], base_dir)
+            else:
+                kwargs[name] = _load_data(kwargs[name], base_dir)
+        getattr(movie, method)(**kwargs)
+    return movie
+
+
+def save_arguments(spec, base_dir='.'):
+    """ Keyword arguments of Movie.save from the save section of a spec: paths relative to base_dir and frames
+    mapping as a slice
+
+    :return: path, dict of the other arguments
+    """
+    kwargs = dict(spec['save'])
+    path = data_path(kwargs.pop('path'), base_dir)
+    for name in ('report_path', 'checkpoint_dir', 'cache'):
+        if kwargs.get(name) is not None:
+            kwargs[name] = data_path(kwargs[name], base_dir)
+    frames = kwargs.get('frames')
+    if isinstance(frames, dict):
+        kwargs['frames'] = slice(frames.get('start'), frames.get('stop'), frames.get('step'))
+    return path, kwargs
@@ -0,0 +1,310 @@
+from __future__ import print_function, division, unicode_literals
+
+from collections import OrderedDict
+import math
+
+import matplotlib as mpl
+from matplotlib.backends.backend_agg import RendererAgg, get_hinting_flag
+from matplotlib.cbook import is_math_text
+from matplotlib.colors import to_rgba
+from matplotlib.font_manager import findfont, get_font
+from matplotlib.ft2font import KERNING_DEFAULT
+from matplotlib.text import Text
+import numpy as np
+
+# default size of the sprites of an animation
+MAX_BYTES = 8 * 2 ** 20
+# laid out by FT2Font.set_text to check the layout of _FontMetrics, with kerned pairs and descenders
+PROBE = 'lp0123456789.:-AVWTy'
+
+
+def format_labels(s_format, values, frames):
+    """ Strings of a label for the frames of an animation, formatted in one pass before rendering
+
+    :param s_format: string format of the label
+    :param values: values of the label, by frame index
+    :param frames: frame indices rendered
+    :return: dict of frame index to string
+    """
+    frames = np.asarray(frames, dtype=int)
+    array = np.asarray(values)
+    if array.ndim == 1:
+        strings = np.char.mod(s_format, array[frames]).tolist()
+    else:
+        # tuples of values
+        strings = [s_format % values[frame] for frame in frames]
+    return dict(zip(frames.tolist(), strings))
+
+
+class SpriteCache(object):
+    """ Least recently used cache of rendered glyphs (see SpriteText), bounded by the bytes of their bitmaps, and
+    the metrics of their fonts
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        """
+
+        :param max_bytes: size of the cache, the least recently used sprites are dropped beyond it
+        """
+        if max_bytes <= 0:
+            raise ValueError('max_bytes should be positive got: %s' % max_bytes)
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._sprites = OrderedDict()
+        # _FontMetrics by font, they are small and not evicted
+        self._fonts = {}
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def get(self, key):
+        """
+
+        :return: the sprite or None if it is not cached
+        """
+        if key not in self._sprites:
+            self.misses += 1
+            return None
+        self.hits += 1
+        sprite = self._sprites.pop(key)
+        self._sprites[key] = sprite
+        return sprite[0]
+
+    def put(self, key, sprite, n_bytes):
+        if key in self._sprites:
+            self.n_bytes -= self._sprites.pop(key)[1]
+        self._sprites[key] = (sprite, n_bytes)
+        self.n_bytes += n_bytes
+        while self.n_bytes > self.max_bytes and len(self._sprites) > 1:
+            self.n_bytes -= self._sprites.popitem(last=False)[1][1]
+            self.evictions += 1
+
+    def metrics(self, prop, dpi):
+        """
+
+        :param prop: FontProperties
+        :param dpi: dpi of the renderer
+        :return: _FontMetrics of the font
+        """
+        key = (hash(prop), dpi, get_hinting_flag(), mpl.rcParams['text.hinting_factor'])
+        metrics = self._fonts.get(key)
+        if metrics is None:
+            metrics = self._fonts[key] = _FontMetrics(key, prop, dpi)
+        return metrics
+
+    def stats(self):
+        return {'sprites': len(self._sprites), 'bytes': self.n_bytes, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+
+class _FontMetrics(object):
+    """ Glyph metrics and kerning of a font at a size, and the layout of strings from them like FT2Font.set_text
+    (in 26.6 fixed point pixels)
+    """
+
+    def __init__(self, key, prop, dpi):
+        self.key = key
+        self.prop = prop.copy()
+        self.dpi = dpi
+        self.flags = key[2]
+        self.hinting_factor = key[3]
+        self._glyphs = {}
+        self._kerning = {}
+        self.valid = self._check()
+        # cbox of 'lp', the line height of Text
+        self.lp = self.layout('lp')[1] if self.valid else None
+
+    def font(self):
+        """ The FT2Font RendererAgg draws the font with (see RendererAgg._get_agg_font) """
+        font = get_font(findfont(self.prop))
+        font.clear()
+        font.set_size(self.prop.get_size_in_points(), self.dpi)
+        return font
+
+    def glyph(self, c):
+        """
+
+        :return: (glyph index, advance, (xmin, ymin, xmax, ymax) of the glyph from the pen, 0 for no outline)
+        """
+        glyph = self._glyphs.get(c)
+        if glyph is None:
+            font = self.font()
+            loaded = font.load_char(ord(c), flags=self.flags)
+            # the glyphs are loaded wider by the hinting factor, the advance of set_text is scaled back (rounded)
+            advance = (2 * loaded.horiAdvance + self.hinting_factor) // (2 * self.hinting_factor)
+            glyph = self._glyphs[c] = (font.get_char_index(ord(c)), advance, tuple(loaded.bbox))
+        return glyph
+
+    def kerning(self, left, right):
+        if (left, right) not in self._kerning:
+            self._kerning[left, right] = self.font().get_kerning(left, right, KERNING_DEFAULT)
+        return self._kerning[left, right]
+
+    def layout(self, s):
+        """
+
+        :return: list of (character, pen), (xmin, ymin, xmax, ymax) of the string and its advance
+        """
+        pens = []
+        x_min = y_min = 32000
+        x_max = y_max = -32000
+        pen = 0
+        previous = 0
+        for c in s:
+            index, advance, (g_x_min, g_y_min, g_x_max, g_y_max) = self.glyph(c)
+            if previous and index:
+                pen += self.kerning(previous, index)
+            if (g_x_min, g_y_min, g_x_max, g_y_max) != (0, 0, 0, 0):
+                g_x_min += pen
+                g_x_max += pen
+            x_min, y_min = min(x_min, g_x_min), min(y_min, g_y_min)
+            x_max, y_max = max(x_max, g_x_max), max(y_max, g_y_max)
+            pens.append((c, pen))
+            pen += advance
+            previous = index
+        if x_min > x_max:
+            x_min = y_min = x_max = y_max = 0
+        return pens, (x_min, y_min, x_max, y_max), pen
+
+    def render(self, c, phase, antialiased):
+        """ Bitmap of a glyph like FT2Font.draw_glyphs_to_bitmap draws it with the pen at a subpixel phase: the
+        glyph is rasterized at a whole pixel and shifted by the phase
+
+        :param c: character
+        :param phase: x of the pen in the pixel, in 1/64 pixels
+        :param antialiased: see the text.antialiased rcParam
+        :return: (uint8 coverage bitmap, left, top in pixels from the pen) or False if the glyph has no outline
+        """
+        x_min, y_min, x_max, y_max = self.glyph(c)[2]
+        if (x_min, y_min, x_max, y_max) == (0, 0, 0, 0):
+            return False
+        font = self.font()
+        font.set_text(c, 0, flags=self.flags)
+        font.draw_glyphs_to_bitmap(antialiased=antialiased)
+        left, top = int(math.floor(x_min / 64)), int(math.ceil(y_max / 64))
+        width, height = int(math.ceil(x_max / 64)) - left, top - int(math.floor(y_min / 64))
+        # the glyph is at the left of the image, its rows start below the top of the cbox
+        row = int(y_max / 64 - top + 1)
+        bitmap = np.array(font.get_image(), dtype=np.uint8)[row:row + height, :width]
+        if phase:
+            shifted = np.zeros((height, width + 1))
+            shifted[:, :-1] = bitmap * (1 - phase / 64)
+            shifted[:, 1:] += bitmap * (phase / 64)
+            bitmap = np.round(shifted).astype(np.uint8)
+        return bitmap, left, top
+
+    def _check(self):
+        """ Whether the layout of PROBE is the one of FT2Font.set_text, it is not with other versions of the font
+        API, then the texts are drawn by Text
+        """
+        try:
+            pens, (x_min, y_min, x_max, y_max), advance = self.layout(PROBE)
+            self.render(PROBE[0], 0, True)
+            font = self.font()
+            font.set_text(PROBE, 0, flags=self.flags)
+            return (tuple(font.get_width_height()) == (advance, y_max - y_min) and font.get_descent() == -y_min and
+                    font.get_bitmap_offset()[0] == x_min)
+        except (AttributeError, TypeError, ValueError):
+            return False
+
+
+class SpriteText(Text):
+    """ Text drawn from a cache of its rendered glyphs: a string is laid out from the metrics of its glyphs like
+    FT2Font.set_text and each glyph is rasterized once per subpixel position, after that drawing a string only
+    copies its glyphs into one bitmap that is blended by the Agg canvas. Frames are close to the ones of Text, the
+    glyphs rasterized at whole pixels are shifted to their subpixel position. Texts that are not single line,
+    horizontal plain strings on an Agg canvas (math text, usetex, rotation, a bbox, path effects, wrapping) are drawn
+    by Text.
+    """
+
+    def __init__(self, x, y, text, cache, **kwargs):
+        """
+
+        :param cache: SpriteCache, can be shared by several texts
+        :param kwargs: see Text
+        """
+        Text.__init__(self, x, y, text, **kwargs)
+        self.sprite_cache = cache
+
+    def _glyph(self, metrics, c, phase, antialiased):
+        key = metrics.key + (c, phase, antialiased)
+        glyph = self.sprite_cache.get(key)
+        if glyph is None:
+            glyph = metrics.render(c, phase, antialiased)
+            self.sprite_cache.put(key, glyph, 64 + (glyph[0].nbytes if glyph is not False else 0))
+        return glyph
+
+    def sprites(self, renderer):
+        """ Rendered lines of the text
+
+        :param renderer: RendererAgg
+        :return: list of (uint8 coverage bitmap, left, bottom, angle) of the lines, as RendererAgg.draw_text gives
+         them to draw_text_image, or None if the text can not be drawn from sprites
+        """
+        if (self.get_usetex() or self._bbox_patch is not None or self.get_path_effects() or self.get_wrap() or
+                self.get_rotation() != 0 or not isinstance(renderer, RendererAgg)):
+            return None
+        s = self.get_text()
+        if '\n' in s or is_math_text(s):
+            return None
+        s = s.replace(r'\$', '$')
+        metrics = self.sprite_cache.metrics(self.get_fontproperties(), renderer.dpi)
+        if not metrics.valid:
+            return None
+        x, y = self.get_transform().transform_point((float(self.convert_xunits(self._x)),
+                                                     float(self.convert_yunits(self._y))))
+        if not np.isfinite(x) or not np.isfinite(y):
+            return None
+        pens, (x_min, y_min, x_max, y_max), advance = metrics.layout(s)
+        # alignment of the line like Text._get_layout, its height and descent are at least the ones of 'lp'
+        width = advance / 64
+        descent = max(-y_min, -metrics.lp[1]) / 64
+        height = max(y_max - y_min, metrics.lp[3] - metrics.lp[1]) / 64
+        x -= {'left': 0, 'center': width / 2, 'right': width}[self.get_horizontalalignment()]
+        y += {'baseline': 0, 'bottom': descent, 'top': descent - height, 'center': descent - height / 2,
+              'center_baseline': (descent - height) / 2}[self.get_verticalalignment()]
+        y = renderer.height - y
+
+        # the glyphs where FT2Font.draw_glyphs_to_bitmap puts them (the C casts truncate), or-ed like FT2Image
+        antialiased = mpl.rcParams['text.antialiased']
+        image = np.zeros(((y_max - y_min) // 64 + 2, (x_max - x_min) // 64 + 2), dtype=np.uint8)
+        for c, pen in pens:
+            whole, phase = divmod(pen, 64) if antialiased else ((pen + 32) // 64, 0)
+            glyph = self._glyph(metrics, c, phase, antialiased)
+            if glyph is False:
+                continue
+            bitmap, left, top = glyph
+            row, column = int(y_max / 64 - top + 1), int(whole + left - x_min / 64)
+            target = image[row:row + bitmap.shape[0], column:column + bitmap.shape[1]]
+            target |= bitmap[:target.shape[0], :target.shape[1]]
+        return [(image, np.round(x + x_min / 64), np.round(y - y_min / 64) + 1, 0)]
+
+    def draw(self, renderer):
+        if renderer is not None:
+            self._renderer = renderer
+        if not self.get_visible() or self.get_text() == '':
+            return
+        sprites = self.sprites(renderer)
+        if sprites is None:
+            Text.draw(self, renderer)
+            return
+        renderer.open_group('text', self.get_gid())
+        gc = renderer.new_gc()
+        gc.set_url(self._url)
+        self._set_gc_clip(gc)
+        rgba = to_rgba(self.get_color(), self.get_alpha())
+        # like the spans of RendererAgg.draw_text_image: the color rounded to bytes and its alpha times the coverage
+        color = (np.array(rgba[:3]) * 255 + 0.5).astype(np.uint8)
+        alpha = int(rgba[3] * 255 + 0.5)
+        for bitmap, left, bottom, angle in sprites:
+            image = np.empty(bitmap.shape + (4,), dtype=np.uint8)
+            image[..., :3] = color
+            image[..., 3] = (bitmap.astype(np.uint16) + 1) * alpha >> 8
+            # draw_image takes the rows from the bottom
+            renderer.draw_image(gc, left, renderer.height - bottom, image[::-1])
+        gc.restore()
+        renderer.close_group('text')
+        self.stale = False
@@ -0,0 +1,143 @@
+from __future__ import print_function, division, unicode_literals
+
+from matplotlib.axes import Axes
+from matplotlib.transforms import Bbox
+
+
+def figure_artists(fig):
+    """ Top level artists of a figure in the order Figure.draw draws them """
+    return sorted((a for a in fig.patches + fig.lines + fig.artists + fig.images + fig.axes + fig.texts + fig.legends
+                   if not a.get_animated()), key=lambda a: a.get_zorder())
+
+
+def axes_artists(ax):
+    """ Children of an axes in the order Axes.draw draws them (after the axes patch), the axes must have been drawn
+    once so the zorder of the axis is set """
+    artists = ax.get_children()
+    artists.remove(ax.patch)
+    if not (ax.axison and ax.get_frame_on()):
+        artists = [a for a in artists if a not in ax.spines.values()]
+    if not ax.axison:
+        artists = [a for a in artists if a is not ax.xaxis and a is not ax.yaxis]
+    artists = [a for a in artists if not a.get_animated() or a in ax.images]
+    return sorted(artists, key=lambda a: a.get_zorder())
+
+
+def extent(artist, renderer, pad=2):
+    """ Display bounding box of an artist, padded for antialiasing and line widths
+
+    :return: Bbox or None if it is not known
+    """
+    try:
+        if hasattr(artist, 'get_tightbbox') and not hasattr(artist, 'get_text'):
+            bbox = artist.get_tightbbox(renderer)
+        else:
+            bbox = artist.get_window_extent(renderer)
+    except Exception:
+        return None
+    if bbox is None:
+        return None
+    if hasattr(artist, 'get_linewidth'):
+        line_width = artist.get_linewidth()
+        if not hasattr(line_width, '__len__'):
+            pad += line_width * renderer.points_to_pixels(1)
+    return bbox.padded(pad)
+
+
+def overlaps(a, b):
+    return a is None or b is None or a.overlaps(b)
+
+
+class StaticLayer(object):
+    """ Draws a figure as a cached background plus the artists that change between frames.
+
+    The background is everything drawn below the dynamic artists: in an axes with dynamic artists, the artists
+    before the first dynamic one in drawing (zorder) order. The rest of that axes, and any top level artist drawn
+    later over it, is drawn on top of the restored background for every frame, in the same order as Figure.draw,
+    so frames are pixel identical to a full draw. A frame where a dynamic artist moved over a static artist that
+    is drawn later (e.g. a label over a colorbar) falls back to a full draw.
+    """
+
+    def __init__(self, fig, dynamic):
+        """
+
+        :param fig: figure with an Agg canvas, drawn at least once
+        :param dynamic: artists that change between frames (Animation._drawn_artists)
+        """
+        self.fig = fig
+        self.dynamic = dynamic
+        self.background = None
+        # lists of artists drawn over the background, and the dynamic artists in each
+        self.layers = []
+        self.layer_dynamic = []
+        # (number of layers drawn before, extent) of the static top level artists drawn after dynamic ones
+        self.static_above = []
+        self.full_draws = 0
+
+    def setup(self):
+        canvas = self.fig.canvas
+        canvas.draw()
+        renderer = canvas.get_renderer()
+        dynamic_ids = set(id(a) for a in self.dynamic)
+        regions = []
+        for item in figure_artists(self.fig):
+            if isinstance(item, Axes):
+                children = axes_artists(item)
+                first = next((i for i, a in enumerate(children) if id(a) in dynamic_ids), None)
+                if first is not None:
+                    tail = children[first:]
+                    self.layers.append(tail)
+                    self.layer_dynamic.append([a for a in tail if id(a) in dynamic_ids])
+                    region = extent(item, renderer)
+                    for a in tail:
+                        if region is not None and id(a) not in dynamic_ids:
+                            bbox = extent(a, renderer)
+                            region = Bbox.union([region, bbox]) if bbox is not None else None
+                    regions.append(region)
+                    continue
+            if len(regions) == 0:
+                continue
+            bbox = extent(item, renderer)
+            if any(overlaps(bbox, region) for region in regions):
+                self.layers.append([item])
+                self.layer_dynamic.append([])
+                regions.append(bbox)
+            else:
+                self.static_above.append((len(self.layers), bbox))
+        hidden = [a for layer in self.layers for a in layer]
+        visible = [a.get_visible() for a in hidden]
+        for a in hidden:
+            a.set_visible(False)
+        try:
+            canvas.draw()
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+        finally:
+            for a, v in zip(hidden, visible):
+                a.set_visible(v)
+
+    def _moved_over_static(self, renderer):
+        for i, dynamic in enumerate(self.layer_dynamic):
+            for a in dynamic:
+                bbox = extent(a, renderer)
+                for n_before, static in self.static_above:
+                    if i < n_before and overlaps(bbox, static):
+                        return True
+        return False
+
+    def draw(self):
+        """ Draw the current frame on the canvas
+
+        :return:
+        """
+        canvas = self.fig.canvas
+        if self.background is None:
+            self.setup()
+        renderer = canvas.get_renderer()
+        if self._moved_over_static(renderer):
+            self.full_draws += 1
+            canvas.draw()
+            return
+        canvas.restore_region(self.background)
+        for layer in self.layers:
+            for a in layer:
+                a.draw(renderer)
@@ -0,0 +1,174 @@
+from __future__ import print_function, division, unicode_literals
+
+from collections import namedtuple
+import math
+
+import numpy as np
+
+from .FrameSource import FrameSource
+
+StackStats = namedtuple('StackStats', ['min', 'max', 'percentiles', 'error', 'count'])
+StackStats.__doc__ = """ min, max and percentiles (dict percentile -> value) of the counted (non NaN) values,
+error is a bound on the absolute error of the percentiles (0 when exact) """
+
+
+class StreamingHistogram(object):
+    """ Histogram with a fixed number of bins that is updated one chunk of values at a time.
+
+    Integer data of up to 16 bits is counted per value, so its percentiles are exact. Other data uses n_bins equal
+    bins over the range seen so far. When a chunk falls outside of it the range is widened by merging neighbouring
+    bins (2, 4, 8, ... into 1), so memory stays bounded and the error of a percentile is at most one bin width.
+    """
+
+    def __init__(self, n_bins=2 ** 14):
+        self.n_bins = n_bins
+        self.counts = None
+        self.lo = None
+        self.width = None
+        self.exact = False
+        self.min = np.nan
+        self.max = np.nan
+        self.count = 0
+
+    def update(self, values):
+        """ Add a chunk of values
+
+        :param values: numpy array of any shape
+        :return:
+        """
+        values = np.asarray(values).ravel()
+        if values.size == 0:
+            return
+        v_min, v_max = values.min(), values.max()
+        if values.dtype.kind == 'f' and (np.isnan(v_min) or np.isnan(v_max)):
+            # only chunks that have NaNs pay for the mask
+            values = values[~np.isnan(values)]
+            if values.size == 0:
+                return
+            v_min, v_max = values.min(), values.max()
+        self.min = v_min if self.count == 0 else min(self.min, v_min)
+        self.max = v_max if self.count == 0 else max(self.max, v_max)
+        self.count += values.size
+        if self.counts is None:
+            self._start(values.dtype, v_min, v_max)
+        if self.exact:
+            if self.lo != 0:
+                values = values.astype(np.int32) - self.lo
+            self.counts += np.bincount(values, minlength=self.n_bins)
+            return
+        if v_min < self.lo or v_max >= self.lo + self.n_bins * self.width:
+            self._widen(v_min, v_max)
+        index = ((values - self.lo) / self.width).astype(np.int64)
+        np.clip(index, 0, self.n_bins - 1, out=index)
+        self.counts += np.bincount(index, minlength=self.n_bins)
+
+    def _start(self, dtype, v_min, v_max):
+        if dtype.kind in 'uib' and dtype.itemsize <= 2:
+            self.exact = True
+            self.n_bins = 2 ** (8 * dtype.itemsize)
+            self.lo = -2 ** (8 * dtype.itemsize - 1) if dtype.kind == 'i' else 0
+            self.width = 1
+        else:
+            self.lo = float(v_min)
+            span = float(v_max) - float(v_min)
+            self.width = span / (self.n_bins - 1) if span > 0 else 1.0
+        self.counts = np.zeros(self.n_bins, dtype=np.int64)
+
+    def _widen(self, v_min, v_max):
+        # the occupied bins must still fit after shifting the range by whole (merged) bins
+        occupied = np.nonzero(self.counts)[0]
+        v_min = min(float(v_min), self.lo + occupied[0] * self.width)
+        v_max = max(float(v_max), self.lo + (occupied[-1] + 1) * self.width)
+        factor = 1
+        while True:
+            width = self.width * factor
+            shift = int(math.ceil((self.lo - v_min) / width))
+            if self.lo - shift * width + self.n_bins * width > v_max:
+                break
+            factor *= 2
+        counts = np.zeros(self.n_bins, dtype=np.int64)
+        np.add.at(counts, shift + occupied // factor, self.counts[occupied])
+        self.counts = counts
+        self.lo -= shift * width
+        self.width = width
+
+    @property
+    def error(self):
+        return 0 if self.exact else self.width
+
+    def percentile(self, q):
+        """ Same as np.nanpercentile with linear interpolation of all the values counted so far
+
+        :param q: percentile between 0 and 100
+        :return: value
+        """
+        if self.count == 0:
+            return np.nan
+        cumulative = np.cumsum(self.counts)
+        rank = q / 100.0 * (self.count - 1)
+        below = int(math.floor(rank))
+        above = int(math.ceil(rank))
+        # bins of the two values around the rank, a value is at the center of its bin (or is the bin if exact)
+        index = np.searchsorted(cumulative, [below, above], side='right')
+        values = self.lo + (index + (0 if self.exact else 0.5)) * self.width
+        value = values[0] + (rank - below) * (values[1] - values[0])
+        return min(max(value, self.min), self.max)
+
+
+def iter_chunks(data, sample=1, chunk_size=2 ** 22):
+    """ Yield chunks of frames (first axis) of an array or a FrameSource
+
+    :param data: numpy array or FrameSource
+    :param sample: use every sample-th frame
+    :param chunk_size: maximal number of values in a chunk
+    :return: generator of arrays
+    """
+    n = data.shape[0]
+    frame_size = int(np.prod(data.shape[1:]))
+    step = max(chunk_size // max(frame_size, 1), 1) * sample
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        if isinstance(data, FrameSource):
+            if sample == 1:
+                yield data.get_frames(start, stop)
+            else:
+                yield np.stack([data.get_frame(i) for i in range(start, stop, sample)])
+        else:
+            yield data[start:stop:sample]
+
+
+def stack_stats(data, percentiles=(), sample=1, n_bins=2 ** 14, chunk_size=2 ** 22):
+    """ min, max and percentiles of an image stack or trace in one pass and bounded memory.
+
+    Data that fits in a single chunk (and is not sampled) gets the exact np.nanpercentile values. Bigger data
+    is read chunk by chunk (one frame at a time for a FrameSource) into a StreamingHistogram.
+
+    :param data: numpy array, FrameSource or list
+    :param percentiles: percentiles to compute (0 - 100)
+    :param sample: use every sample-th frame
+    :param n_bins: number of bins of the histogram
+    :param chunk_size: maximal number of values to read at once
+    :return: StackStats
+    """
+    if not isinstance(data, FrameSource):
+        data = np.asarray(data)
+    if sample == 1 and int(np.prod(data.shape)) <= chunk_size:
+        if isinstance(data, FrameSource):
+            data = data.get_frames(0, data.shape[0])
+        values = data.ravel()
+        v_min, v_max = values.min(), values.max()
+        if values.dtype.kind == 'f' and (np.isnan(v_min) or np.isnan(v_max)):
+            values = values[~np.isnan(values)]
+            if values.size == 0:
+                return StackStats(np.nan, np.nan, dict((q, np.nan) for q in percentiles), 0, 0)
+            v_min, v_max = values.min(), values.max()
+        if len(percentiles) > 0:
+            result = dict(zip(percentiles, np.percentile(values, percentiles)))
+        else:
+            result = {}
+        return StackStats(v_min, v_max, result, 0, values.size)
+    histogram = StreamingHistogram(n_bins)
+    for chunk in iter_chunks(data, sample, chunk_size):
+        histogram.update(chunk)
+    result = dict((q, histogram.percentile(q)) for q in percentiles)
+    return StackStats(histogram.min, histogram.max, result, histogram.error, histogram.count)
@@ -0,0 +1,106 @@
+from __future__ import print_function, division, unicode_literals
+
+import contextlib
+import copy
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+# dark and light styles for images and traces, built once per process
+_custom_styles = None
+# style key -> full rcParams of the style applied after a reset to the defaults
+_resolved = {}
+
+
+def custom_styles():
+    """ The dark and light versions of the styles for images and traces (dark_img, light_img, dark_trace and
+    light_trace), built once and registered in plt.style.library
+
+    :return: dict of style name -> rcParams dict (shared, do not modify)
+    """
+    global _custom_styles
+    if _custom_styles is None:
+        styles = dict()
+        default = mpl.rcParamsDefault  # for light backgrounds
+        dark_background = plt.style.library['dark_background']
+
+        dark_img = copy.deepcopy(dark_background)
+        dark_img.update({u'axes.spines.top': False, u'axes.spines.right': False,
+                         u'axes.spines.bottom': False, u'axes.spines.left': False,
+                         u'axes.facecolor': (1, 1, 1, 0), u'axes.edgecolor': (1, 1, 1, 0),
+                         u'xtick.color': (1, 1, 1, 0), u'ytick.color': (1, 1, 1, 0), u'grid.alpha': 0,
+                         u'image.interpolation': 'None', u'image.cmap': 'viridis'})
+        styles[u'dark_img'] = dark_img
+
+        light_img = copy.deepcopy(default)
+        light_img.update({u'axes.spines.top': False, u'axes.spines.right': False,
+                          u'axes.spines.bottom': False, u'axes.spines.left': False,
+                          u'axes.facecolor': (1, 1, 1, 0), u'axes.edgecolor': (1, 1, 1, 0),
+                          u'xtick.color': (1, 1, 1, 0), u'ytick.color': (1, 1, 1, 0), u'grid.alpha': 0,
+                          u'image.interpolation': 'None'})
+        styles[u'light_img'] = light_img
+
+        dark_trace = copy.deepcopy(dark_background)
+        dark_trace.update({u'axes.spines.top': False, u'axes.spines.right': False, u'axes.labelsize': u'xx-large',
+                           u'axes.titlesize': u'xx-large', u'xtick.labelsize': 14, u'ytick.labelsize': 14})
+        styles[u'dark_trace'] = dark_trace
+
+        light_trace = copy.deepcopy(default)
+        light_trace.update({u'axes.spines.top': False, u'axes.spines.right': False, u'axes.labelsize': u'xx-large',
+                            u'axes.titlesize': u'xx-large', u'xtick.labelsize': 14, u'ytick.labelsize': 14})
+        styles[u'light_trace'] = light_trace
+        _custom_styles = styles
+    # again when the library was reloaded
+    if any(name not in plt.style.library for name in _custom_styles):
+        plt.style.library.update(_custom_styles)
+    return _custom_styles
+
+
+def style_key(style):
+    """ Hashable key of a style specification (name, dict of rcParams or list of them) """
+    if isinstance(style, basestring):
+        return style
+    if hasattr(style, 'keys'):
+        return tuple(sorted((key, repr(value)) for key, value in style.items()))
+    return tuple(style_key(s) for s in style)
+
+
+def resolve_style(style):
+    """ Full rcParams of a style applied after a reset to the defaults, the ones plt.style.context(style,
+    after_reset=True) sets. Resolved and validated once per process and style: later changes to a named style in the
+    library are not seen.
+
+    :param style: style name, dict of rcParams or list of them (composed in order)
+    :return: dict of rcParam -> validated value (shared, do not modify)
+    """
+    key = style_key(style)
+    resolved = _resolved.get(key)
+    if resolved is None:
+        custom_styles()
+        with plt.style.context(style, after_reset=True):
+            resolved = dict.copy(mpl.rcParams)
+        _resolved[key] = resolved
+    return resolved
+
+
+@contextlib.contextmanager
+def style_context(style):
+    """ Use a style for the artists made in the context, like plt.style.context(style, after_reset=True). The values
+    of the resolved style are swapped in and out of rcParams as they are, without resetting to the defaults and
+    validating every rcParam again for each panel.
+
+    :param style: see resolve_style
+    :return: the resolved rcParams
+    """
+    resolved = resolve_style(style)
+    initial = dict.copy(mpl.rcParams)
+    dict.update(mpl.rcParams, resolved)
+    try:
+        yield resolved
+    finally:
+        dict.update(mpl.rcParams, initial)
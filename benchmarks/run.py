@@ -0,0 +1,251 @@
+""" Benchmarks of the Movie / Animation render pipeline
+
+Every case changes one parameter of the base workload (see workloads.BASE) and runs in its own process, so the
+peak memory is that of the case. For each case the results have:
+
+    add_image: seconds in Movie.add_image (limits computation)
+    init_images, init_traces: seconds to set up the image panels and the trace axes
+    first_frame: seconds from building the Animation to the first drawn frame
+    save: Movie.save seconds, frames per second, seconds to the first written frame and per stage timings
+    peak_rss_mb: peak resident memory of the case
+
+Usage:
+    python -m benchmarks.run [--quick] [--only n_frames,writer] [--output results.json]
+    python -m benchmarks.run --compare old.json new.json [--threshold 0.1]
+"""
+from __future__ import print_function, division, unicode_literals
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import matplotlib
+from matplotlib.animation import writers
+import matplotlib.pyplot as plt
+import numpy as np
+
+from Animate.Animation import Animation
+from Animate.progress import RenderProgress, peak_rss, timer
+from benchmarks.workloads import BASE, make_movie
+
+# parameter: values, each value is a case, with the parameters of the base workload otherwise
+SWEEPS = [('n_frames', [50, 200, 800]),
+          ('resolution', [64, 256, 512]),
+          ('n_images', [2, 4]),
+          ('n_axes', [1, 3]),
+          ('mode', ['window']),
+          ('trace_length', [1000, 10000, 100000]),
+          ('labels', [True]),
+          ('var_annotations', [True]),
+          ('dtype', ['uint16']),
+          ('writer', ['ffmpeg_raw', 'imagemagick'])]
+QUICK_SWEEPS = [('n_frames', [20]),
+                ('resolution', [64]),
+                ('n_images', [2]),
+                ('n_axes', [1]),
+                ('mode', ['window']),
+                ('trace_length', [500]),
+                ('labels', [True]),
+                ('var_annotations', [True]),
+                ('writer', ['ffmpeg_raw'])]
+QUICK_BASE = {'n_frames': 10, 'resolution': 32}
+# parameters of the cases of a sweep that only make sense with them: traces longer than the frame count need a
+# window animation, and a trace axis to draw them
+FORCED = {'trace_length': {'mode': 'window', 'n_axes': 1}}
+
+
+def make_cases(sweeps, base, only=None):
+    """ One case for the base workload and one for every value of every sweep
+
+    :param sweeps: list of (parameter, values)
+    :param base: parameters of the base workload
+    :param only: parameters to sweep, None for all
+    :return: list of (name, parameters)
+    """
+    cases = [('base', dict(base))]
+    for parameter, values in sweeps:
+        if only is not None and parameter not in only:
+            continue
+        for value in values:
+            if base.get(parameter) == value:
+                continue
+            params = dict(base)
+            params[parameter] = value
+            params.update(FORCED.get(parameter, {}))
+            cases.append(('%s=%s' % (parameter, value), params))
+    return cases
+
+
+class FirstFrameProgress(RenderProgress):
+    """ Also keeps the time the first frame was written """
+
+    def __init__(self):
+        RenderProgress.__init__(self)
+        self.first_frame = None
+
+    def frame(self, frame, update, draw, write):
+        RenderProgress.frame(self, frame, update, draw, write)
+        if self.first_frame is None:
+            self.first_frame = timer()
+
+
+class SetupAnimation(Animation):
+    """ Animation that times the set up of its panels """
+
+    def _init_images(self):
+        start = timer()
+        Animation._init_images(self)
+        self.init_images = timer() - start
+
+    def _init_traces(self):
+        start = timer()
+        Animation._init_traces(self)
+        self.init_traces = timer() - start
+
+
+def run_case(job):
+    """ Run one case, in its own process
+
+    :param job: (name, parameters, directory for the output)
+    :return: dict of results
+    """
+    name, params, directory = job
+    # no display in the worker processes
+    plt.switch_backend('Agg')
+    result = {'name': name, 'params': params}
+    if params['writer'] not in writers.avail:
+        result['skipped'] = 'writer %s is not available' % params['writer']
+        return result
+    movie, result['add_image'] = make_movie(**params)
+
+    start = timer()
+    animation = SetupAnimation(movie)
+    animation._init_draw()
+    animation._draw_frame(animation.frames[0])
+    animation.fig.canvas.draw()
+    result['first_frame'] = timer() - start
+    result['init_images'] = animation.init_images
+    result['init_traces'] = getattr(animation, 'init_traces', 0)
+    plt.close('all')
+
+    progress = FirstFrameProgress()
+    start = timer()
+    movie.save(os.path.join(directory, name.replace('=', '_')), writer_name=params['writer'], progress=progress)
+    elapsed = timer() - start
+    result['save'] = {'seconds': elapsed, 'fps': progress.done / elapsed, 'frames': progress.done,
+                      'first_frame': progress.first_frame - start, 'stages': progress.stage_stats()}
+    rss = peak_rss()
+    result['peak_rss_mb'] = rss / 2.0 ** 20 if rss is not None else None
+    return result
+
+
+def git_commit():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.STDOUT,
+                                      cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases, output=None):
+    """ Run benchmark cases and save the results
+
+    :param cases: list of (name, parameters) from make_cases
+    :param output: full path of the JSON results, None to not save
+    :return: results dict
+    """
+    results = {'meta': {'date': datetime.datetime.now().isoformat(), 'commit': git_commit(),
+                        'python': sys.version.split()[0], 'numpy': np.__version__,
+                        'matplotlib': matplotlib.__version__, 'platform': platform.platform(),
+                        'cpus': multiprocessing.cpu_count()},
+               'cases': []}
+    directory = tempfile.mkdtemp(prefix='benchmarks_')
+    try:
+        for name, params in cases:
+            # a fresh process per case for its own peak memory
+            pool = multiprocessing.Pool(processes=1, maxtasksperchild=1)
+            try:
+                result = pool.apply(run_case, ((name, params, directory),))
+            finally:
+                pool.close()
+                pool.join()
+            results['cases'].append(result)
+            print(format_result(result))
+            sys.stdout.flush()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=1)
+    return results
+
+
+def format_result(result):
+    if 'skipped' in result:
+        return '%-24s skipped: %s' % (result['name'], result['skipped'])
+    save = result['save']
+    rss = result['peak_rss_mb']
+    return '%-24s %7.1f fps  first frame %6.3fs  save %7.2fs  add_image %6.3fs  traces %6.3fs  rss %s' % (
+        result['name'], save['fps'], save['first_frame'], save['seconds'], result['add_image'],
+        result['init_traces'], '%.0f MB' % rss if rss is not None else '?')
+
+
+def compare(old_path, new_path, threshold=0.1):
+    """ Print the change in fps and first frame time of the cases in both results
+
+    :param old_path: JSON results of the reference run
+    :param new_path: JSON results to compare
+    :param threshold: relative change counted as a regression
+    :return: names of the regressed cases
+    """
+    with open(old_path) as f:
+        old = dict((c['name'], c) for c in json.load(f)['cases'] if 'skipped' not in c)
+    with open(new_path) as f:
+        new = [c for c in json.load(f)['cases'] if 'skipped' not in c]
+    regressions = []
+    for case in new:
+        if case['name'] not in old:
+            continue
+        reference = old[case['name']]
+        fps = case['save']['fps'] / reference['save']['fps'] - 1
+        first = case['save']['first_frame'] / reference['save']['first_frame'] - 1
+        regressed = fps < -threshold or first > threshold
+        if regressed:
+            regressions.append(case['name'])
+        print('%-24s fps %+6.1f%%  first frame %+6.1f%%%s' % (case['name'], 100 * fps, 100 * first,
+                                                              '  REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the AnimateImages render pipeline')
+    parser.add_argument('--quick', action='store_true', help='small workloads, to check the benchmarks run')
+    parser.add_argument('--only', default=None, help='comma separated parameters to sweep (base always runs)')
+    parser.add_argument('--output', default=None, help='JSON file for the results')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two JSON results')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    args = parser.parse_args(argv)
+    if args.compare:
+        regressions = compare(args.compare[0], args.compare[1], args.threshold)
+        return 1 if regressions else 0
+    only = args.only.split(',') if args.only else None
+    if args.quick:
+        base = dict(BASE)
+        base.update(QUICK_BASE)
+        cases = make_cases(QUICK_SWEEPS, base, only)
+    else:
+        cases = make_cases(SWEEPS, BASE, only)
+    run(cases, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
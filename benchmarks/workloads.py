@@ -0,0 +1,92 @@
+from __future__ import print_function, division, unicode_literals
+
+import numpy as np
+
+from Animate.Movie import Movie
+from Animate.progress import timer
+
+# the base workload, every benchmark case changes one or more of these
+BASE = {'n_frames': 100, 'resolution': 128, 'n_images': 1, 'n_axes': 0, 'trace_length': None, 'mode': 'movie',
+        'labels': False, 'var_annotations': False, 'writer': 'ffmpeg', 'dtype': 'float32'}
+
+
+def make_image(n_frames, resolution, mode='movie', columns=None, dtype='float32', seed=0):
+    """ Synthetic image data: smooth moving blobs plus noise, so codecs and limits see realistic data
+
+    :param n_frames: number of frames of a movie animation
+    :param resolution: pixels of a (square) frame, or rows of a window animation
+    :param mode: 'movie' (n_frames, resolution, resolution) or 'window' (resolution, columns)
+    :param columns: columns of a window animation
+    :param dtype: numpy dtype of the data
+    :param seed: random seed
+    :return: numpy array
+    """
+    random = np.random.RandomState(seed)
+    if mode == 'movie':
+        y, x = np.mgrid[:resolution, :resolution] / float(resolution)
+        t = np.arange(n_frames)[:, None, None] / 20.0
+        data = np.sin(2 * np.pi * (x + 0.3 * np.cos(t))) * np.cos(2 * np.pi * (y + 0.3 * np.sin(t)))
+        data = data + 0.2 * random.randn(n_frames, resolution, resolution)
+    elif mode == 'window':
+        x = np.arange(columns) / 20.0
+        data = np.sin(x)[None, :] + 0.2 * random.randn(resolution, columns)
+    else:
+        raise ValueError('mode should be movie or window got: %s' % mode)
+    if np.dtype(dtype).kind in 'ui':
+        data = (data - data.min()) / (data.max() - data.min()) * min(np.iinfo(dtype).max, 4095)
+    return data.astype(dtype)
+
+
+def make_trace(length, seed=0):
+    random = np.random.RandomState(seed)
+    return np.cumsum(random.randn(length))
+
+
+def make_movie(n_frames=100, resolution=128, n_images=1, n_axes=0, trace_length=None, mode='movie',
+               labels=False, var_annotations=False, dtype='float32', window_size=29, seed=0, **kwargs):
+    """ Build a Movie for a benchmark case
+
+    In a movie animation traces have one sample per frame. In a window animation the traces have trace_length
+    samples (the columns of the images) and the window steps so there are about n_frames frames.
+
+    :param n_frames: number of frames to render
+    :param resolution: see make_image
+    :param n_images: number of image panels
+    :param n_axes: number of trace axes, each with two traces
+    :param trace_length: samples of a trace in a window animation, None for n_frames + window_size
+    :param mode: 'movie' or 'window'
+    :param labels: add a time label and a text label that change every frame
+    :param var_annotations: add a variable annotation on every image panel (movie animations only)
+    :param dtype: numpy dtype of the images
+    :param window_size: window size of a window animation
+    :param seed: random seed
+    :param kwargs: ignored (other benchmark parameters, e.g. writer)
+    :return: Movie and the seconds spent in add_image (mostly the limits computation)
+    """
+    if var_annotations and mode != 'movie':
+        raise ValueError('variable annotations are sized by the movie frames, use mode="movie"')
+    m = Movie(dt=1.0 / 14)
+    if mode == 'movie':
+        length = n_frames
+        window_step = 1
+    else:
+        length = n_frames + window_size if trace_length is None else max(trace_length, window_size + 1)
+        window_step = max((length - window_size) // n_frames, 1)
+    add_image_time = 0
+    for i in range(n_images):
+        data = make_image(n_frames, resolution, mode, length, dtype, seed + i)
+        start = timer()
+        m.add_image(data, animation_type=mode, window_size=window_size, window_step=window_step)
+        add_image_time += timer() - start
+    for i in range(n_axes):
+        m.add_axis('time (s)', 'value %d' % i)
+        for j in range(2):
+            m.add_trace(make_trace(length, seed + 10 * i + j), axis=i)
+    if labels:
+        m.add_time_label(values=np.arange(length) * m.dt)
+        m.add_label(0.6, 0.9, np.arange(length), s_format='frame %d')
+    if var_annotations:
+        for i in range(n_images):
+            xy = np.stack([np.linspace(0, resolution - 1, length)] * 2, axis=1)
+            m.add_variable_annotation(i, xy, xy + 5, ['%d' % k for k in range(length)], color='white')
+    return m, add_image_time
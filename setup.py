@@ -17,7 +17,7 @@ with open(path.join(here, 'requirements-dev.txt'), encoding='utf-8') as f:
 
 setup(
     name='animateimages',
-    packages=find_packages(exclude=['dist', 'docs', 'test']),
+    packages=find_packages(exclude=['dist', 'docs', 'test', 'benchmarks']),
     version='0.2.4',
     description="Animation of matplotlib images",
     long_description=long_description,
@@ -38,5 +38,9 @@ setup(
     install_requires=requires,
     extras_require={
         'dev': requires_dev,
+        'yaml': ['pyyaml'],
+    },
+    entry_points={
+        'console_scripts': ['animate-render=Animate.cli:main'],
     },
 )
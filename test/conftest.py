@@ -1,8 +1,48 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
 import pytest
 import matplotlib.pyplot as plt
+from Animate.Movie import Movie
 
 
 @pytest.yield_fixture(autouse=True)
 def run_around_tests():
     yield
     plt.close('all')
+
+
+@pytest.fixture
+def make_movie():
+    """ Factory of small test movies: an image with a colorbar and a time label
+
+    make_movie(data=6, figsize=None, c_title='value', time_label=True, trace=False, **image_kwargs), data is the
+    image data or a number of random 10x10 frames, trace adds an axis with a random trace
+    """
+    def make(data=6, figsize=None, c_title='value', time_label=True, trace=False, **image_kwargs):
+        if isinstance(data, int):
+            data = np.random.rand(data, 10, 10)
+        movie_kwargs = {} if figsize is None else {'fig_kwargs': {'figsize': figsize}}
+        m = Movie(dt=1.0 / 14, **movie_kwargs)
+        m.add_image(data, c_title=c_title, **image_kwargs)
+        if trace:
+            m.add_axis('t', 'v')
+            m.add_trace(np.random.rand(m.images[0]['data'].shape[0]))
+        if time_label:
+            m.add_time_label()
+        return m
+    return make
+
+
+@pytest.fixture
+def run_python():
+    """ run_python(script, hash_seed): output of a python script run in another process with a hash seed (dict and
+    set order), from the root of the repository
+    """
+    def run(script, hash_seed):
+        env = dict(os.environ, PYTHONHASHSEED=str(hash_seed), MPLBACKEND='Agg')
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return subprocess.check_output([sys.executable, '-c', script], cwd=root, env=env).strip()
+    return run
@@ -179,3 +179,16 @@ def test_style():
     assert mpl.rcParams['figure.facecolor'] == 'w'
     _ = Movie(style='dark_background')
     assert mpl.rcParams['figure.facecolor'] == 'black'
+
+
+def test_init_draw_twice():
+    m = Movie(dt=1.0 / 14)
+    img = np.arange(100).reshape(4, 5, 5)
+    m.add_image(img, style='dark_img', c_title='c')
+    m.add_axis('x', 'y')
+    m.add_trace(np.arange(4))
+    a = Animation(m)
+    a._init_draw()
+    n_axes = len(a.fig.axes)
+    a._init_draw()
+    assert len(a.fig.axes) == n_axes == 3
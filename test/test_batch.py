@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from matplotlib.animation import writers
+from Animate import Animation
+from Animate.batch import movie_cost, render_many
+from Animate.progress import RenderProgress
+
+
+def test_movie_cost(make_movie):
+    m = make_movie(10, figsize=(4, 4))
+    assert movie_cost(m) == 10 * 16 * m.fig_kwargs.get('dpi', 100) ** 2
+    assert movie_cost(m, frames=slice(None, None, 2), dpi=10) == 5 * 16 * 100
+    assert movie_cost(make_movie(10, figsize=(8, 8))) > movie_cost(make_movie(20, figsize=(4, 4)))
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_render_many(tmpdir, make_movie):
+    movies = [(make_movie(4, figsize=(4, 4)), tmpdir.join('short').strpath),
+              (make_movie(12, figsize=(4, 4)), tmpdir.join('long').strpath, {'fps': 7}),
+              (make_movie(4, figsize=(4, 4)), tmpdir.join('broken').strpath, {'frames': [100]})]
+    seen = []
+    results = render_many(movies, workers=2, max_encoders=1, progress=seen.append, writer_name='ffmpeg_raw')
+    assert [r['index'] for r in results] == [0, 1, 2]
+    assert len(seen) == 3
+    assert [r['status'] for r in results] == ['done', 'done', 'failed']
+    assert [r['frames'] for r in results[:2]] == [4, 12]
+    assert results[1]['output'] == tmpdir.join('long.mp4').strpath
+    assert os.path.getsize(results[1]['output']) > 0
+    assert 'Frame 100 is not a frame of the movie' in results[2]['error']
+    assert results[2]['output'] is None
+
+    # in this process
+    results = render_many(movies[:1], workers=1, writer_name='ffmpeg_raw')
+    assert results[0]['status'] == 'done'
+    with pytest.raises(ValueError):
+        render_many(movies + [(make_movie(4, figsize=(4, 4)), tmpdir.join('segments').strpath, {'workers': 2})],
+                    workers=2)
+    with pytest.raises(ValueError):
+        render_many(movies, workers=0)
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_encoder_slots(tmpdir, make_movie, monkeypatch):
+    events = []
+
+    class Slots(object):
+        def acquire(self):
+            events.append('acquire')
+
+        def release(self):
+            events.append('release')
+
+    class Progress(RenderProgress):
+        def start(self, *args, **kwargs):
+            events.append('start')
+            RenderProgress.start(self, *args, **kwargs)
+
+    # the slot is only held while the writer is open
+    monkeypatch.setattr(Animation, 'writer_slots', Slots())
+    make_movie(4).save(tmpdir.join('slots').strpath, writer_name='ffmpeg_raw', progress=Progress())
+    assert events == ['acquire', 'start', 'release']
@@ -0,0 +1,91 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from matplotlib.animation import writers
+from Animate.cache import RenderCache, render_key
+from Animate.progress import RenderProgress
+
+
+def test_render_key(make_movie):
+    img = np.random.rand(5, 10, 10)
+    key = render_key(make_movie(img), range(5), 'ffmpeg_raw', 'h264', {}, {})
+    assert render_key(make_movie(img.copy()), range(5), 'ffmpeg_raw', 'h264', {}, {}) == key
+    assert render_key(make_movie(img), range(4), 'ffmpeg_raw', 'h264', {}, {}) != key
+    assert render_key(make_movie(img), range(5), 'ffmpeg_raw', 'h264', {}, {'dpi': 50}) != key
+    m = make_movie(img)
+    m.add_label(0.5, 0.5, ['a'] * 5)
+    assert render_key(m, range(5), 'ffmpeg_raw', 'h264', {}, {}) != key
+    changed = img.copy()
+    changed[2, 3, 3] = 2
+    assert render_key(make_movie(changed), range(5), 'ffmpeg_raw', 'h264', {}, {}) != key
+
+    # every frame of a large stack is part of the key
+    img = np.random.rand(40, 300, 300)
+    key = render_key(make_movie(img), range(40), 'ffmpeg_raw', 'h264', {}, {})
+    changed = img.copy()
+    changed[2] = changed[2, ::-1]
+    assert render_key(make_movie(changed), range(40), 'ffmpeg_raw', 'h264', {}, {}) != key
+
+
+KEY_SCRIPT = """
+import numpy as np
+from Animate.Movie import Movie
+from Animate.cache import render_key
+m = Movie(dt=0.5, fig_kwargs={'figsize': (3, 3)})
+m.add_image(np.arange(600.).reshape(6, 10, 10), c_title='value', style={'image.cmap': 'magma'})
+m.add_time_label()
+print(render_key(m, range(6), 'gif', None, {'blit': True}, {'dpi': 50, 'cache_static': True, 'backend': 'numpy'},
+                 {'palette': 'frame', 'dither': True, 'loop': 0}))
+"""
+
+
+def test_render_key_processes(run_python):
+    # a notebook or pipeline step run again finds its movie in the cache
+    assert len(set(run_python(KEY_SCRIPT, hash_seed) for hash_seed in (1, 2, 3))) == 1
+
+
+def test_evict(tmpdir):
+    cache = RenderCache(tmpdir.join('cache').strpath, max_bytes=250)
+    source = tmpdir.join('movie.mp4').strpath
+    with open(source, 'wb') as f:
+        f.write(b'0' * 100)
+    now = time.time()
+    for i, key in enumerate(['a', 'b', 'c']):
+        entry = cache.store(key, 14, source)
+        os.utime(entry, (now - 100 + i, now - 100 + i))
+    assert sorted(e[1] for e in cache.entries()) == ['b', 'c']
+    # b is used, c is the least recently used one
+    assert cache.fetch('b', 14, tmpdir.join('out.mp4').strpath, 'ffmpeg') == 'hit'
+    cache.store('d', 14, source)
+    assert sorted(e[1] for e in cache.entries()) == ['b', 'd']
+    assert cache.size() == 200
+    assert cache.fetch('c', 14, tmpdir.join('out.mp4').strpath, 'ffmpeg') is None
+    with pytest.raises(ValueError):
+        RenderCache(tmpdir.strpath, max_bytes=0)
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_save_cache(tmpdir, make_movie):
+    cache = RenderCache(tmpdir.join('cache').strpath)
+    path = tmpdir.join('movie').strpath
+    m = make_movie(np.random.rand(8, 10, 10))
+    progress = RenderProgress()
+    m.save(path, writer_name='ffmpeg_raw', cache=cache, progress=progress)
+    assert progress.done == 8 and len(cache.entries()) == 1
+    os.remove(path + '.mp4')
+
+    progress = RenderProgress()
+    assert m.save(path, writer_name='ffmpeg_raw', cache=cache, progress=progress) == path + '.mp4'
+    assert progress.done == 0 and progress.info['cache'] == 'hit'
+    assert os.path.getsize(path + '.mp4') > 0
+
+    progress = RenderProgress()
+    m.save(path, writer_name='ffmpeg_raw', fps=28, cache=cache.directory, progress=progress)
+    assert progress.done == 0 and progress.info['cache'] == 'remux'
+    assert sorted(e[2] for e in cache.entries()) == [14, 28]
+
+    progress = RenderProgress()
+    m.save(path, writer_name='ffmpeg_raw', dpi=50, cache=cache, progress=progress)
+    assert progress.done == 8
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+from matplotlib.animation import writers
+from Animate.checkpoint import movie_key, read_manifest, save_checkpointed
+from Animate.progress import RenderProgress
+
+
+def test_movie_key(tmpdir, make_movie):
+    img = np.random.rand(6, 10, 10)
+    key = movie_key(make_movie(img), (14,))
+    assert movie_key(make_movie(img.copy()), (14,)) == key
+    assert movie_key(make_movie(img), (30,)) != key
+    changed = img.copy()
+    changed[3, 4, 5] += 1
+    assert movie_key(make_movie(changed), (14,)) != key
+
+    path = tmpdir.join('stack.npy').strpath
+    np.save(path, img)
+    key = movie_key(make_movie(path))
+    assert movie_key(make_movie(path)) == key
+    np.save(path, changed)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert movie_key(make_movie(path)) != key
+
+
+KEY_SCRIPT = """
+import numpy as np
+from Animate.Movie import Movie
+from Animate.checkpoint import movie_key
+m = Movie(dt=0.5, fig_kwargs={'figsize': (3, 3)})
+m.add_image(np.arange(600.).reshape(6, 10, 10), c_title='value', style={'image.cmap': 'magma'})
+m.add_time_label()
+print(movie_key(m, (14, {'codec': 'h264', 'names': {'a', 'b', 'c', 'd', 'e'}})))
+"""
+
+
+def test_movie_key_processes(run_python):
+    # the key of a restarted render matches the manifest whatever the dict and set order of the process
+    keys = set(run_python(KEY_SCRIPT, hash_seed) for hash_seed in (1, 2, 3))
+    assert len(keys) == 1
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_save_resume(tmpdir, monkeypatch, make_movie):
+    import Animate.checkpoint as checkpoint
+    render_segment = checkpoint.render_segment
+    rendered = []
+    stop_after = [2]
+
+    def record_segment(job, in_worker=True):
+        if len(rendered) == stop_after[0]:
+            raise KeyboardInterrupt
+        rendered.append(list(job[1]))
+        return render_segment(job, in_worker)
+
+    path = tmpdir.join('resume.mp4').strpath
+    checkpoint_dir = tmpdir.join('checkpoint').strpath
+    m = make_movie(np.random.rand(10, 10, 10))
+    monkeypatch.setattr(checkpoint, 'render_segment', record_segment)
+    with pytest.raises(KeyboardInterrupt):
+        m.save(path[:-4], writer_name='ffmpeg_raw', checkpoint=3, checkpoint_dir=checkpoint_dir)
+    assert rendered == [[0, 1, 2], [3, 4, 5]]
+    assert sorted(read_manifest(checkpoint_dir)['segments']) == ['0', '1']
+    assert not os.path.exists(path)
+
+    # only the missing segments are rendered again
+    rendered[:] = []
+    stop_after[0] = None
+    progress = RenderProgress()
+    m.save(path[:-4], writer_name='ffmpeg_raw', checkpoint=3, checkpoint_dir=checkpoint_dir, progress=progress)
+    assert rendered == [[6, 7, 8], [9]]
+    assert progress.done == 4
+    assert os.path.getsize(path) > 0
+    assert not os.path.exists(checkpoint_dir)
+
+    # other parameters start from scratch
+    os.makedirs(checkpoint_dir)
+    rendered[:] = []
+    m.save(path[:-4], writer_name='ffmpeg_raw', checkpoint=5, checkpoint_dir=checkpoint_dir)
+    assert rendered == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+    with pytest.raises(ValueError):
+        m.save(path[:-4], writer_name='imagemagick', checkpoint=5)
+    with pytest.raises(ValueError):
+        save_checkpointed(m, path, 'ffmpeg_raw', 14, None, 0)
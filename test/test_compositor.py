@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.animation import writers
+from Animate.Movie import Movie
+from Animate.Animation import Animation
+from Animate.compositor import Compositor, block_mean, compositor_support
+from Animate.progress import RenderProgress
+
+
+def composite_both(m, resize='nearest'):
+    """ frames drawn by matplotlib and by a Compositor """
+    a = Animation(m)
+    a._init_draw()
+    reference = []
+    for frame in a.frames:
+        a._draw_frame(frame)
+        a.fig.canvas.draw()
+        reference.append(np.frombuffer(a.fig.canvas.buffer_rgba(), np.uint8).copy())
+    compositor = Compositor(a, resize)
+    assert compositor.setup() is None
+    composited = []
+    for frame in a.frames:
+        a._draw_frame(frame)
+        composited.append(compositor.draw(frame).ravel().copy())
+    plt.close(a.fig)
+    return reference, composited, compositor
+
+
+def test_compositor_movie():
+    img = np.random.rand(4, 32, 32)
+    m = Movie(dt=0.5, fig_kwargs={'figsize': (6, 4)})
+    m.add_image(img, c_title='value')
+    m.add_image(img[:, ::-1], style=['dark_img', {'image.cmap': 'magma'}])
+    m.add_time_label()
+    m.add_scale_bar(0, x_offset=2, pixel_width=10, um_width='10um', y=28)
+    m.add_circle_annotation(1, 15, 15, 4, fill=False, color='white')
+    reference, composited, compositor = composite_both(m)
+    for r, c in zip(reference, composited):
+        difference = np.abs(r.astype(int) - c)
+        # colormap steps and text antialiasing only
+        assert difference.max() <= 8
+        assert np.mean(difference > 0) < 0.01
+
+
+def test_compositor_window_rgb():
+    m = Movie(dt=0.1, fig_kwargs={'figsize': (4, 4)})
+    m.add_image(np.random.rand(12, 100), animation_type='window', window_size=21, window_step=5)
+    m.add_image(np.random.rand(15, 100, 3), animation_type='window', window_size=21, window_step=5, is_rgb=True)
+    reference, composited, compositor = composite_both(m)
+    for r, c in zip(reference, composited):
+        assert np.abs(r.astype(int) - c).max() <= 8
+
+
+def test_compositor_block():
+    img = np.random.rand(3, 400, 400)
+    m = Movie(dt=1, fig_kwargs={'figsize': (2, 2)})
+    m.add_image(img)
+    a = Animation(m)
+    a._init_draw()
+    a._draw_frame(0)
+    compositor = Compositor(a, 'block')
+    assert compositor.setup() is None
+    panel = compositor.panels[0]
+    assert panel.factor_x >= 2 and panel.factor_y >= 2
+    canvas = compositor.draw(1)
+    block = block_mean(img[1], panel.factor_y, panel.factor_x)
+    expected = panel.colorize(block[panel.rows][:, panel.columns])
+    assert np.array_equal(canvas[panel.canvas_rows, panel.canvas_columns], expected)
+    plt.close(a.fig)
+
+    assert np.allclose(block_mean(np.arange(20.).reshape(4, 5), 2, 2), [[3, 5], [13, 15]])
+    with pytest.raises(ValueError):
+        Compositor(a, 'bilinear')
+
+    # uint8 RGB windows stay uint8 after averaging
+    m = Movie(dt=1, fig_kwargs={'figsize': (2, 2)})
+    m.add_image(np.full((400, 800, 3), 60, dtype=np.uint8), animation_type='window', window_size=401, window_step=5,
+                is_rgb=True)
+    a = Animation(m)
+    a._init_draw()
+    a._draw_frame(0)
+    compositor = Compositor(a, 'block')
+    assert compositor.setup() is None
+    panel = compositor.panels[0]
+    assert panel.factor_x >= 2 and panel.factor_y >= 2
+    canvas = compositor.draw(0)
+    assert np.all(canvas[panel.canvas_rows, panel.canvas_columns] == [60, 60, 60, 255])
+    plt.close(a.fig)
+
+
+def test_compositor_support():
+    img = np.random.rand(4, 10, 10)
+    m = Movie(dt=1)
+    m.add_image(img)
+    m.add_time_label()
+    assert compositor_support(m) is None
+    m.add_label(0.5, 0.5, ['a', 'b', 'c', 'd'], bbox={'facecolor': 'white'})
+    assert 'bbox' in compositor_support(m)
+    m = Movie(dt=1)
+    m.add_image(img)
+    m.add_axis('t', 'v')
+    m.add_trace(img.mean(axis=(1, 2)))
+    assert 'trace axes' in compositor_support(m)
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_save_numpy(tmpdir):
+    path = tmpdir.join('numpy').relto('')
+    m = Movie(dt=1.0 / 14)
+    img = np.random.rand(6, 10, 10)
+    m.add_image(img, c_title='value')
+    m.add_time_label()
+    progress = RenderProgress()
+    m.save(path, writer_name='ffmpeg_raw', backend='numpy', progress=progress)
+    assert os.path.getsize(path + '.mp4') > 0
+    assert progress.done == 6
+    with pytest.raises(ValueError):
+        m.save(path, writer_name='ffmpeg', backend='numpy')
+    with pytest.raises(ValueError):
+        m.save(path, writer_name='ffmpeg_raw', backend='cairo')
+
+    m.add_axis('t', 'v')
+    m.add_trace(img.mean(axis=(1, 2)))
+    with pytest.warns(UserWarning, match='trace axes'):
+        m.save(path, writer_name='ffmpeg_raw', backend='numpy')
+    assert os.path.getsize(path + '.mp4') > 0
@@ -0,0 +1,154 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.animation import writers
+import pytest
+from Animate.Movie import Movie
+from Animate.Animation import Animation
+from Animate.decimate import MinMaxPyramid, decimate_trace, minmax_indices
+
+
+def test_minmax_indices():
+    data = np.random.randn(1003)
+    assert np.array_equal(minmax_indices(data, 600), np.arange(1003))
+    index = minmax_indices(data, 10)
+    assert index[0] == 0 and index[-1] == 1002
+    assert np.all(np.diff(index) > 0)
+    for start in range(0, 1003, 101):
+        block = data[start:start + 101]
+        assert start + block.argmin() in index
+        assert start + block.argmax() in index
+    # chunked reads give the same points
+    assert np.array_equal(minmax_indices(data, 10, chunk_size=250), index)
+
+    data[500] = np.nan
+    x, y = decimate_trace(np.arange(1003), data, 10)
+    assert np.isnan(y).sum() == 1
+    assert np.nanmax(y) == np.nanmax(data) and np.nanmin(y) == np.nanmin(data)
+    # the min and max of the bucket of the NaN are kept
+    data[501], data[502] = 50, -50
+    x, y = decimate_trace(np.arange(1003), data, 10)
+    assert np.isnan(y).sum() == 1 and 50 in y and -50 in y
+    assert np.isnan(decimate_trace(np.arange(1003), np.full(1003, np.nan), 10)[1]).all()
+
+
+def test_memmap_trace(tmpdir):
+    data = np.cumsum(np.random.randn(50000))
+    path = tmpdir.join('trace.dat').strpath
+    data.tofile(path)
+    trace = np.memmap(path, dtype=data.dtype, mode='r', shape=data.shape)
+    x, y = decimate_trace(np.arange(50000), trace, 100)
+    assert type(y) is np.ndarray and len(y) <= 202
+    assert y.max() == data.max() and y.min() == data.min()
+
+
+def test_animation_decimate():
+    img = np.random.rand(5, 20029)
+    trace = np.cumsum(np.random.randn(20029))
+    m = Movie(dt=0.01)
+    m.add_image(img, animation_type='window', window_size=29, window_step=5000)
+    m.add_axis('t', 'v')
+    m.add_trace(trace)
+    m.add_axis('t', 'v', decimate=False)
+    m.add_trace(trace, axis=1)
+    m.add_axis('t', 'v', decimate=50)
+    m.add_trace(trace, axis=2)
+    a = Animation(m)
+    a._init_draw()
+    width = a.trace_axes[0].get_window_extent().width
+    assert len(a.traces[0].get_xdata()) <= 4 * np.ceil(width) + 2
+    assert len(a.traces[1].get_xdata()) == 20029
+    assert len(a.traces[2].get_xdata()) <= 102
+    assert np.allclose(a.trace_axes[0].get_ylim(), a.trace_axes[1].get_ylim())
+    assert a.traces[0].get_ydata().max() == trace.max()
+
+
+@pytest.mark.skipif('ffmpeg' not in writers.avail, reason='No ffmpeg to save with')
+def test_decimate_render_dpi(tmpdir):
+    # two buckets per pixel of the saved frames, at the render dpi of the stock writers
+    m = Movie(dt=0.01, fig_kwargs={'dpi': 50})
+    m.add_image(np.random.rand(3, 50001), animation_type='window', window_size=1, window_step=25000)
+    m.add_axis('t', 'v')
+    m.add_trace(np.cumsum(np.random.randn(50001)))
+    lengths = []
+    for dpi in (None, 200):
+        a = Animation(m)
+        a.render(tmpdir.join('%s.mp4' % dpi).strpath, writers['ffmpeg'](fps=5), dpi=dpi)
+        width = a.trace_axes[0].get_window_extent().width
+        lengths.append(len(a.traces[0].get_xdata()))
+        plt.close(a.fig)
+    assert lengths[0] <= 4 * np.ceil(width) + 2 < 3 * 4 * width <= lengths[1]
+
+
+def test_minmax_pyramid():
+    data = np.cumsum(np.random.randn(100003))
+    pyramid = MinMaxPyramid(data)
+    buckets = [level[0] for level in pyramid.levels]
+    assert buckets[0] == 16 and all(b * 2 == c for b, c in zip(buckets, buckets[1:]))
+    # a short window is decimated from the points
+    index, values = pyramid.window(100, 500, 100)
+    assert np.array_equal(index, minmax_indices(data[100:500], 100) + 100)
+    for start, stop in ((0, 100003), (20000, 60011), (60000, 100003)):
+        index, values = pyramid.window(start, stop, 200)
+        assert 400 <= len(index) <= 1600 + 4
+        assert np.all(np.diff(index) >= 0) and np.array_equal(values, data[index])
+        # the extent of the window is kept
+        assert values.max() == data[start:stop].max() and values.min() == data[start:stop].min()
+    data[5000] = np.nan
+    index, values = MinMaxPyramid(data).window(0, 20000, 200)
+    assert np.isnan(values).sum() == 1
+    # the min and max of the buckets of a NaN are kept, at every level
+    data[100], data[101], data[102] = np.nan, 50, -50
+    pyramid = MinMaxPyramid(data)
+    for start, stop in ((0, 20000), (0, 100003)):
+        index, values = pyramid.window(start, stop, 200)
+        assert np.isnan(values).sum() == 2 and 50 in values and -50 in values
+    data[:4096] = np.nan
+    index, values = MinMaxPyramid(data).window(0, 100003, 200)
+    assert 0 in index and np.nanmax(values) == np.nanmax(data) and np.nanmin(values) == np.nanmin(data)
+    assert len(MinMaxPyramid(data[:500]).levels) == 0
+
+
+def test_animation_scroll():
+    n = 20000
+    trace = np.cumsum(np.random.randn(n))
+    m = Movie(dt=0.01)
+    m.add_image(np.random.rand(n, 4, 4))
+    with pytest.raises(ValueError):
+        m.add_axis('t', 'v', scroll=0)
+    m.add_axis('t', 'v', scroll=10)
+    m.add_trace(trace)
+    m.add_axis('t', 'v', scroll=10, decimate=False)
+    m.add_trace(trace, axis=1)
+    a = Animation(m, frames=[0, 10000, n - 1])
+    a._init_draw()
+    lengths = []
+    for frame in a.frames:
+        a._draw_frame(frame)
+        assert np.allclose(a.trace_axes[0].get_xlim(), (frame * 0.01 - 5, frame * 0.01 + 5))
+        assert a.trace_axes[0].xaxis in a._drawn_artists
+        x = a.traces[0].get_xdata()
+        assert x.min() <= max(frame * 0.01 - 5, 0) and x.max() >= min(frame * 0.01 + 5, (n - 1) * 0.01)
+        lengths.append(len(x))
+        # every point of the window without decimation
+        assert len(a.traces[1].get_xdata()) >= 500
+    width = a.trace_axes[0].get_window_extent().width
+    assert lengths[1] <= 8 * np.ceil(width) + 4
+    # the y limits are from the whole trace
+    assert a.trace_axes[0].get_ylim()[1] >= np.percentile(trace, 80)
+    # the pyramid is made once
+    pyramid = a.scroll_axes[0][3][0][1]
+    a._init_draw()
+    assert a.scroll_axes[0][3][0][1] is pyramid
+
+
+def test_scroll_static_layer():
+    trace = np.cumsum(np.random.randn(3000))
+    m = Movie(dt=0.01)
+    m.add_image(np.random.rand(3000, 4, 4))
+    m.add_axis('t', 'v', scroll=5)
+    m.add_trace(trace)
+    reference = [f.copy() for f in m.iter_frames(0, 3000, 1000)]
+    cached = [f.copy() for f in m.iter_frames(0, 3000, 1000, cache_static=True)]
+    for a, b in zip(reference, cached):
+        assert np.array_equal(a, b)
+    assert not np.array_equal(reference[0], reference[1])
@@ -0,0 +1,241 @@
+import pickle
+import struct
+
+import matplotlib.pyplot as plt
+from matplotlib.animation import writers
+import pytest
+import numpy as np
+from Animate.Movie import Movie
+from Animate.Animation import Animation
+from Animate.FrameSource import (ArraySource, BinnedSource, ChunkedSource, MemmapSource, TiffSource, as_frame_source,
+                                 bin_pixels)
+
+
+def write_tiff(path, stack, description=None, n_ifd=None):
+    """ minimal little endian, uncompressed, one strip per page TIFF writer """
+    n, rows, cols = stack.shape
+    n_ifd = n if n_ifd is None else n_ifd
+    bits = stack.dtype.itemsize * 8
+    sample_format = 3 if stack.dtype.kind == 'f' else 1
+    frame_bytes = rows * cols * stack.dtype.itemsize
+    description = description.encode('ascii') + b'\0' if description is not None else None
+    entries = 9 if description is not None else 8
+    ifd_size = 2 + entries * 12 + 4
+    data_offset = 8 + n_ifd * ifd_size + (len(description) if description is not None else 0)
+    with open(path, 'wb') as f:
+        f.write(b'II' + struct.pack('<HI', 42, 8))
+        for i in range(n_ifd):
+            tags = [(256, 4, 1, cols), (257, 4, 1, rows), (258, 3, 1, bits), (259, 3, 1, 1), (262, 3, 1, 1),
+                    (273, 4, 1, data_offset + i * frame_bytes), (279, 4, 1, frame_bytes),
+                    (339, 3, 1, sample_format)]
+            if description is not None:
+                tags.append((270, 2, len(description), 8 + n_ifd * ifd_size))
+            tags.sort()
+            f.write(struct.pack('<H', len(tags)))
+            for tag, tag_type, count, value in tags:
+                f.write(struct.pack('<HHII', tag, tag_type, count, value))
+            next_ifd = 8 + (i + 1) * ifd_size if i + 1 < n_ifd else 0
+            f.write(struct.pack('<I', next_ifd))
+        if description is not None:
+            f.write(description)
+        f.write(stack.astype('<' + stack.dtype.str[1:]).tobytes())
+
+
+def test_array_source():
+    img = np.arange(100).reshape(4, 5, 5)
+    source = as_frame_source(img)
+    assert isinstance(source, ArraySource)
+    assert source.shape == (4, 5, 5)
+    assert np.array_equal(source.get_frame(2), img[2])
+    assert np.array_equal(source.get_frames(1, 3), img[1:3])
+    img = np.arange(100).reshape(5, 20)
+    assert np.array_equal(as_frame_source(img).get_window(3, 8), img[:, 3:8])
+
+    with pytest.raises(ValueError) as ex:
+        as_frame_source([1, 2, 3])
+    assert 'Expected a numpy array or a FrameSource' in str(ex.value)
+
+
+def test_memmap_source(tmpdir):
+    img = np.arange(240, dtype=np.float32).reshape(4, 6, 10)
+    path = tmpdir.join('raw.dat').strpath
+    img.tofile(path)
+    source = MemmapSource(path, dtype=np.float32, shape=(4, 6, 10))
+    assert np.array_equal(source.get_frame(3), img[3])
+    source = pickle.loads(pickle.dumps(source))
+    assert np.array_equal(source.get_frame(1), img[1])
+
+    mm = np.memmap(path, dtype=np.float32, mode='r', shape=(4, 6, 10))
+    source = as_frame_source(mm)
+    assert isinstance(source, MemmapSource)
+    assert len(pickle.dumps(source)) < img.nbytes
+    assert np.array_equal(source.get_frames(0, 4), img)
+
+    path = tmpdir.join('data.npy').strpath
+    np.save(path, img)
+    source = as_frame_source(path)
+    assert source.shape == img.shape
+    assert np.array_equal(pickle.loads(pickle.dumps(source)).get_frame(2), img[2])
+
+    with pytest.raises(ValueError) as ex:
+        MemmapSource(tmpdir.join('raw.dat').strpath)
+    assert 'dtype and shape are needed' in str(ex.value)
+
+
+def test_tiff_source(tmpdir):
+    img = np.arange(3 * 4 * 5, dtype=np.uint16).reshape(3, 4, 5) * 100
+    path = tmpdir.join('stack.tif').strpath
+    write_tiff(path, img)
+    source = as_frame_source(path)
+    assert isinstance(source, TiffSource)
+    assert source.shape == (3, 4, 5)
+    assert source.dtype == np.dtype('<u2')
+    for i in range(3):
+        assert np.array_equal(source.get_frame(i), img[i])
+    assert np.array_equal(source.get_frames(0, 3), img)
+    source = pickle.loads(pickle.dumps(source))
+    assert np.array_equal(source.get_frame(2), img[2])
+
+    img = np.random.rand(6, 3, 2).astype(np.float32)
+    path = tmpdir.join('imagej.tif').strpath
+    write_tiff(path, img, description='ImageJ=1.52\nimages=6\nslices=6\n', n_ifd=1)
+    source = TiffSource(path)
+    assert source.shape == (6, 3, 2)
+    assert np.array_equal(source.get_frame(5), img[5])
+
+    path = tmpdir.join('fail.tif').strpath
+    with open(path, 'wb') as f:
+        f.write(b'XX' + b'\0' * 10)
+    with pytest.raises(ValueError) as ex:
+        TiffSource(path)
+    assert 'Not a TIFF file' in str(ex.value)
+
+
+class Dataset(object):
+    """ HDF5 style chunked dataset that counts reads """
+
+    def __init__(self, data, chunks):
+        self.data = data
+        self.shape = data.shape
+        self.dtype = data.dtype
+        self.chunks = chunks
+        self.reads = 0
+
+    def __getitem__(self, item):
+        self.reads += 1
+        return self.data[item]
+
+
+def test_chunked_source():
+    img = np.arange(10 * 4 * 4).reshape(10, 4, 4)
+    dataset = Dataset(img, chunks=(4, 4, 4))
+    source = as_frame_source(dataset)
+    assert isinstance(source, ChunkedSource)
+    assert source.block == 4
+    for i in range(10):
+        assert np.array_equal(source.get_frame(i), img[i])
+    assert dataset.reads == 3
+
+
+def test_movie_with_source(tmpdir):
+    img = np.arange(3 * 4 * 5, dtype=np.uint16).reshape(3, 4, 5)
+    path = tmpdir.join('stack.tif').strpath
+    write_tiff(path, img)
+    m = Movie(dt=0.5)
+    m.add_image(path, ylim_type='set', ylim_value=(0, 50))
+    m.add_time_label()
+    assert isinstance(m.images[0]['data'], TiffSource)
+    assert np.allclose(m.labels[0]['values'], np.arange(3) * 0.5)
+    a = Animation(m)
+    a._init_draw()
+    a._draw_frame(2)
+    assert np.array_equal(a.images[0].get_array(), img[2])
+
+    m = Movie(dt=0.5)
+    m.add_image(as_frame_source(img), ylim_type='p_both', ylim_value=10)
+    assert np.isclose(m.images[0]['ymin'], np.percentile(img, 10))
+
+    img = np.arange(100).reshape(5, 20)
+    m = Movie(dt=1)
+    m.add_image(ArraySource(img), animation_type='window', window_size=5)
+    a = Animation(m)
+    a._init_draw()
+    a._draw_frame(3)
+    assert np.array_equal(a.images[0].get_array(), img[:, 3:8])
+
+
+def test_bin_pixels():
+    data = np.random.rand(2, 7, 10)
+    binned = bin_pixels(data, 3, 4, axis=1)
+    assert binned.shape == (2, 3, 3)
+    # the edge blocks take the pixels left
+    assert np.allclose(binned[1, 2, 2], data[1, 6:, 8:].mean())
+    assert np.allclose(binned[0, 1, 0], data[0, 3:6, :4].mean())
+    assert np.array_equal(bin_pixels(data[0], 3, 4, 'max'), bin_pixels(data, 3, 4, 'max', axis=1)[0])
+    assert bin_pixels(data[0], 3, 4, 'max')[2, 1] == data[0, 6:, 4:8].max()
+    assert bin_pixels(data[0], 1, 1) is not None and np.array_equal(bin_pixels(data[0], 1, 1), data[0])
+    rgb = np.random.randint(0, 256, (5, 9, 3)).astype(np.uint8)
+    binned = bin_pixels(rgb, 2, 2)
+    assert binned.dtype == np.uint8 and binned.shape == (3, 5, 3)
+    assert binned[0, 0, 1] == np.round(rgb[:2, :2, 1].mean())
+
+    source = BinnedSource(ArraySource(data), 3, 4, 'max')
+    assert source.shape == (2, 3, 3)
+    assert np.array_equal(source.get_frames(0, 2)[1], source.get_frame(1))
+    window = BinnedSource(ArraySource(data[0]), 3, 4, window=True)
+    assert window.shape == (3, 10) and window.get_window(2, 9).shape == (3, 2)
+    with pytest.raises(ValueError):
+        BinnedSource(ArraySource(data), 2, 2, 'median')
+
+
+def test_downsample():
+    data = np.zeros((2, 1200, 1000))
+    # one bright pixel, dropped by nearest neighbor resampling but kept by max pooling
+    data[:, 601, 503] = 1
+    with pytest.raises(ValueError):
+        Movie().add_image(data, downsample='median')
+    frames = {}
+    for downsample in (None, 'max'):
+        m = Movie(dt=1, fig_kwargs={'figsize': (3, 3), 'dpi': 100})
+        m.add_image(data, style='dark_img', ylim_type='set', ylim_value=(0, 1), downsample=downsample)
+        a = Animation(m)
+        a._init_draw()
+        if downsample is not None:
+            factor_y, factor_x = a.frame_sources[0].factor_y, a.frame_sources[0].factor_x
+            assert factor_y == factor_x and factor_y >= 4
+            assert a.images[0].get_array().shape == (-(-1200 // factor_y), -(-1000 // factor_x))
+            # the axis has the limits of the full resolution image
+            assert np.allclose(a.img_axes[0].get_xlim(), (-0.5, 999.5))
+            assert np.allclose(a.img_axes[0].get_ylim(), (1199.5, -0.5))
+        plt.close(a.fig)
+        frames[downsample] = [f.copy() for f in m.iter_frames()]
+    assert frames['max'][0].max() > 200
+    assert frames[None][0].max() < frames['max'][0].max()
+
+    # colored windows are binned after coloring, the numpy backend draws the binned frames too
+    smooth = np.outer(np.sin(np.linspace(0, 3, 600)), np.cos(np.linspace(0, 20, 3000)))
+    rendered = []
+    for downsample, backend in ((None, 'matplotlib'), ('mean', 'matplotlib'), ('mean', 'numpy')):
+        m = Movie(dt=1, fig_kwargs={'figsize': (3, 3), 'dpi': 50})
+        m.add_image(smooth, animation_type='window', window_size=1001, window_step=1000, lut=True,
+                    downsample=downsample)
+        rendered.append([f.copy().astype(int) for f in m.iter_frames(backend=backend)])
+    assert len(rendered[1]) == 2
+    assert np.abs(rendered[0][1] - rendered[1][1]).mean() < 3
+    assert np.abs(rendered[1][1] - rendered[2][1]).mean() < 3
+
+
+@pytest.mark.skipif('ffmpeg' not in writers.avail, reason='No ffmpeg to save with')
+def test_downsample_render_dpi(tmpdir):
+    # the stock writers save at the render dpi without changing the figure dpi, the bins are for the saved frames
+    m = Movie(dt=1, fig_kwargs={'figsize': (2, 2), 'dpi': 100})
+    m.add_image(np.random.rand(2, 400, 400), downsample='mean')
+    factors = []
+    for writer_name, dpi in (('ffmpeg', None), ('ffmpeg', 400), ('ffmpeg_raw', 400)):
+        a = Animation(m)
+        a.render(tmpdir.join('%s_%s.mp4' % (writer_name, dpi)).strpath, writers[writer_name](fps=5), dpi=dpi)
+        source = a.frame_sources[0]
+        factors.append((source.factor_y, source.factor_x) if isinstance(source, BinnedSource) else (1, 1))
+        plt.close(a.fig)
+    assert min(factors[0]) >= 2
+    assert factors[1] == factors[2] == (1, 1)
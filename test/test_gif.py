@@ -0,0 +1,93 @@
+import binascii
+import os
+
+import numpy as np
+import pytest
+from Animate.Movie import Movie
+from Animate.gif import Palette, lzw_encode, median_cut
+from Animate.progress import RenderProgress
+
+
+def lzw_decode(data):
+    """ GIF LZW decoder of lzw_encode output """
+    data = bytearray(data)
+    min_code_size = data[0]
+    stream = bytearray()
+    i = 1
+    while data[i]:
+        stream += data[i + 1:i + 1 + data[i]]
+        i += data[i] + 1
+    bits = int(binascii.hexlify(bytes(stream[::-1])), 16)
+    clear = 1 << min_code_size
+    position = 0
+    code_size = min_code_size + 1
+    table = []
+    previous = None
+    out = bytearray()
+    while True:
+        code = (bits >> position) & ((1 << code_size) - 1)
+        position += code_size
+        if code == clear:
+            table = [bytearray([i]) for i in range(clear)] + [None, None]
+            code_size = min_code_size + 1
+            previous = None
+            continue
+        if code == clear + 1:
+            return bytes(out)
+        if previous is None:
+            entry = table[code]
+        else:
+            entry = table[code] if code < len(table) else table[previous] + table[previous][:1]
+            table.append(table[previous] + entry[:1])
+            if len(table) == 1 << code_size and code_size < 12:
+                code_size += 1
+        out += entry
+        previous = code
+
+
+def test_lzw():
+    rng = np.random.RandomState(0)
+    for data in [np.zeros(1, np.uint8), np.zeros(5000, np.uint8), rng.randint(0, 256, 20000).astype(np.uint8),
+                 rng.randint(0, 3, 70000).astype(np.uint8), np.arange(256, dtype=np.uint8).repeat(30)]:
+        assert lzw_decode(lzw_encode(data)) == data.tobytes()
+    # long runs compress
+    assert len(lzw_encode(np.zeros(10000, np.uint8))) < 300
+
+
+def test_palette():
+    rng = np.random.RandomState(1)
+    colors = rng.randint(0, 256, (50, 3)).astype(np.uint8)
+    frames = colors[rng.randint(0, 50, (2, 20, 30))]
+    palette = Palette(frames)
+    assert palette.exact is not None
+    indices = palette.indices(frames[0])
+    assert np.array_equal(palette.colors[indices], frames[0])
+
+    frames = rng.randint(0, 256, (2, 40, 40, 3)).astype(np.uint8)
+    palette = Palette(frames, dither=True)
+    assert palette.exact is None and len(palette.colors) <= 255
+    indices = palette.indices(frames[0])
+    assert indices.max() < len(palette.colors)
+    assert np.abs(palette.colors[indices].astype(int) - frames[0]).mean() < 30
+
+    assert len(median_cut(np.array([[0, 0, 0], [255, 255, 255]]), np.array([1, 1]), 8)) == 2
+
+
+def test_save_gif(tmpdir):
+    path = tmpdir.join('movie').strpath
+    m = Movie(dt=1.0 / 14, fig_kwargs={'figsize': (3, 2)})
+    m.add_image(np.random.rand(10, 10, 10), c_title='value')
+    m.add_time_label()
+    progress = RenderProgress()
+    assert m.save(path, writer_name='gif', progress=progress) == path + '.gif'
+    assert progress.done == 10
+    with open(path + '.gif', 'rb') as f:
+        data = f.read()
+    assert data.startswith(b'GIF89a') and data.endswith(b'\x3b')
+    # a graphic control extension per frame
+    assert data.count(b'\x21\xf9\x04') == 10
+    size = len(data)
+    m.save(path, writer_name='gif', writer_kwargs={'palette': 'frame', 'optimize': False})
+    assert os.path.getsize(path + '.gif') > size
+    with pytest.raises(ValueError):
+        m.save(path, writer_name='gif', writer_kwargs={'palette': 'octree'})
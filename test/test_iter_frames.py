@@ -0,0 +1,36 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from Animate.Animation import Animation
+
+
+def test_iter_frames(make_movie):
+    m = make_movie(7, figsize=(3, 2), trace=True)
+    frames = [rgb.copy() for rgb in m.iter_frames(1, 6, 2)]
+    assert len(frames) == 3
+    assert frames[0].shape == (200, 300, 3) and frames[0].dtype == np.uint8
+    assert len(plt.get_fignums()) == 0
+
+    # the same pixels as a canvas drawn by matplotlib
+    a = Animation(m)
+    a._init_draw()
+    a._draw_frame(3)
+    a.fig.canvas.draw()
+    reference = np.frombuffer(a.fig.canvas.buffer_rgba(), np.uint8).reshape(200, 300, 4)[:, :, :3]
+    assert np.array_equal(frames[1], reference)
+    plt.close(a.fig)
+
+    copies = list(m.iter_frames(copy=True, dpi=50))
+    assert len(copies) == 7 and copies[0].shape == (100, 150, 3)
+    assert copies[0].flags['C_CONTIGUOUS']
+    assert not np.array_equal(copies[0], copies[6])
+
+
+def test_iter_frame_batches(make_movie):
+    m = make_movie(7, figsize=(3, 2), trace=True)
+    batches = list(m.iter_frame_batches(3, dpi=50))
+    assert [len(b) for b in batches] == [3, 3, 1]
+    frames = np.concatenate(batches)
+    assert np.array_equal(frames, np.array(list(m.iter_frames(copy=True, dpi=50))))
+    with pytest.raises(ValueError):
+        next(m.iter_frame_batches(0))
@@ -0,0 +1,88 @@
+import copy
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import Normalize
+from Animate.Movie import Movie
+from Animate.Animation import Animation
+from Animate.FrameSource import ArraySource
+from Animate.lut import ColorizedSource, apply_lut, make_lut
+
+
+def test_apply_lut():
+    # a copy, set_under / set_over / set_bad change the registered colormap
+    cmap = copy.copy(plt.get_cmap('viridis'))
+    cmap.set_under('red')
+    cmap.set_over('blue')
+    cmap.set_bad('green')
+    lut = make_lut(cmap)
+    assert lut.shape == (cmap.N + 3, 4)
+    for data, vmin, vmax in [(np.random.rand(3, 20, 20).astype(np.float32), 0.1, 0.9),
+                             (np.random.randn(2, 30, 30) * 100, -50, 150),
+                             (np.random.randint(0, 4096, (4, 16, 16)).astype(np.uint16), 100, 4000),
+                             (np.random.randint(-1000, 1000, (4, 16, 16)), -500, 500)]:
+        expected = cmap(Normalize(vmin, vmax)(data), bytes=True)
+        assert np.array_equal(apply_lut(data, lut, vmin, vmax), expected)
+    data = np.array([[np.nan, 0.5], [-1, 2]])
+    assert np.array_equal(apply_lut(data, lut, 0, 1), cmap(np.ma.masked_invalid(data), bytes=True))
+
+
+def test_colorized_source():
+    img = np.random.rand(10, 8, 8)
+    lut = make_lut(plt.get_cmap('gray'))
+    source = ColorizedSource(ArraySource(img), lut, 0, 1, batch=4)
+    assert source.shape == (10, 8, 8, 4)
+    for i in range(10):
+        assert np.array_equal(source.get_frame(i), apply_lut(img[i], lut, 0, 1))
+    assert np.array_equal(source.get_frames(2, 5), apply_lut(img[2:5], lut, 0, 1))
+
+    rgb = np.random.rand(8, 30, 3)
+    source = ColorizedSource(ArraySource(rgb), is_rgb=True)
+    window = source.get_window(3, 8)
+    assert window.shape == (8, 5, 4)
+    assert np.array_equal(window[..., :3], (255 * rgb[:, 3:8]).astype(np.uint8))
+
+
+def test_animation_lut():
+    img = np.random.rand(5, 20, 20)
+    m = Movie(dt=1)
+    m.add_image(img, ylim_type='set', ylim_value=(0.2, 0.8), c_title='lut')
+    m.add_image(img, ylim_type='set', ylim_value=(0.2, 0.8), lut=True, lut_batch=2)
+    a = Animation(m)
+    a._init_draw()
+    a._draw_frame(3)
+    colored = a.images[1].get_array()
+    assert colored.dtype == np.uint8 and colored.shape == (20, 20, 4)
+    assert np.array_equal(colored, a.images[0].to_rgba(img[3], bytes=True))
+    assert a.images[1].norm.vmin == 0.2 and a.images[1].norm.vmax == 0.8
+    plt.close(a.fig)
+
+
+class CountingSource(ArraySource):
+    """ counts the columns read from a window animation """
+
+    def __init__(self, data):
+        ArraySource.__init__(self, data)
+        self.columns = 0
+
+    def get_window(self, start, stop):
+        self.columns += stop - start
+        return ArraySource.get_window(self, start, stop)
+
+
+def test_colorized_strip():
+    img = np.random.rand(6, 300)
+    lut = make_lut(plt.get_cmap('magma'))
+    counting = CountingSource(img)
+    source = ColorizedSource(counting, lut, 0.1, 0.9)
+    starts = list(range(0, 200, 7)) + [3, 150, 150, 260]
+    for start in starts:
+        assert np.array_equal(source.get_window(start, start + 31), apply_lut(img[:, start:start + 31], lut, 0.1, 0.9))
+    # the forward steps only color the 7 new columns, jumps and going back color the whole window
+    assert counting.columns == 31 + 7 * 28 + 3 * 31
+
+    rgb = np.random.rand(4, 100, 3)
+    source = ColorizedSource(ArraySource(rgb), is_rgb=True)
+    for start in range(0, 60, 5):
+        window = source.get_window(start, start + 11)
+        assert np.array_equal(window[..., :3], (255 * rgb[:, start:start + 11]).astype(np.uint8))
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.animation import writers
+from Animate.outputs import MultiWriter, StillFrames, ThumbnailStrip, as_output, GifOutput
+from Animate.progress import RenderProgress
+
+
+def test_as_output():
+    assert isinstance(as_output({'type': 'gif', 'step': 2}), GifOutput)
+    with pytest.raises(ValueError):
+        GifOutput(palette='octree')
+    stills = StillFrames([0, 3])
+    assert as_output(stills) is stills
+    with pytest.raises(ValueError):
+        as_output({'type': 'avi'})
+    with pytest.raises(ValueError):
+        as_output({'type': 'png', 'step': 0})
+    with pytest.raises(ValueError):
+        MultiWriter([], 14, 'h264', range(3))
+
+
+def test_still_frames(tmpdir, make_movie):
+    base = tmpdir.join('movie').strpath
+    m = make_movie(figsize=(3, 2))
+    progress = RenderProgress()
+    paths = m.save(base, outputs=[StillFrames([0, 4, 10]), ThumbnailStrip(n=3, height=20),
+                                  {'type': 'png', 'step': 2}], progress=progress)
+    assert progress.done == 6
+    assert paths == [base + '_00000.png', base + '_00004.png', base + '_strip.png', base + '_frames']
+    assert sorted(os.listdir(base + '_frames')) == ['frame_00000.png', 'frame_00002.png', 'frame_00004.png']
+    strip = plt.imread(base + '_strip.png')
+    still = plt.imread(base + '_00000.png')
+    assert strip.shape[0] == 20
+    assert strip.shape[1] == 3 * int(round(still.shape[1] * 20 / still.shape[0]))
+    # the same pixels in every output
+    frame = plt.imread(os.path.join(base + '_frames', 'frame_00004.png'))
+    assert np.array_equal(frame, plt.imread(base + '_00004.png'))
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_save_outputs(tmpdir, make_movie):
+    base = tmpdir.join('movie').strpath
+    m = make_movie(figsize=(3, 2))
+    outputs = [{'type': 'video'}, {'type': 'video', 'bitrate': 100, 'suffix': '_small'}, {'type': 'gif', 'step': 2},
+               {'type': 'stills', 'frames': [0]}]
+    progress = RenderProgress()
+    paths = m.save(base, outputs=outputs, progress=progress)
+    assert paths == [base + '.mp4', base + '_small.mp4', base + '.gif', base + '_00000.png']
+    assert progress.done == 6
+    for path in paths:
+        assert os.path.getsize(path) > 0
+    # the GIF is written by GifWriter as the frames come, every other frame
+    with open(base + '.gif', 'rb') as f:
+        data = f.read()
+    assert data.startswith(b'GIF89a') and data.count(b'\x21\xf9\x04') == 3
+    with pytest.raises(ValueError):
+        m.save(base, outputs=outputs, workers=2)
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+from matplotlib.animation import writers
+from Animate.Movie import Movie
+from Animate.pipeline import PipelinedWriter
+from Animate.progress import RenderProgress
+
+
+class SlowWriter(object):
+    """ buffer writer that records the frames it gets """
+    fps = 14
+    frame_size = (4, 2)
+
+    def __init__(self, fail_at=None):
+        self.frames = []
+        self.fail_at = fail_at
+        self.finished = False
+
+    def setup(self, fig, outfile, dpi=None):
+        pass
+
+    def write_frame(self, buffer):
+        if len(self.frames) == self.fail_at:
+            raise IOError('broken pipe')
+        self.frames.append(np.frombuffer(buffer, np.uint8).copy())
+
+    def finish(self):
+        self.finished = True
+
+
+def test_pipelined_writer():
+    writer = SlowWriter()
+    pipelined = PipelinedWriter(writer, depth=2)
+    frames = [np.full((2, 4, 4), i, np.uint8) for i in range(20)]
+    with pipelined.saving(None, 'out', None):
+        for frame in frames:
+            pipelined.write_frame(frame.tobytes())
+    # the buffers are reused, the encoder gets every frame as it was written
+    assert len(writer.frames) == 20 and writer.finished
+    for frame, written in zip(frames, writer.frames):
+        assert np.array_equal(frame.ravel(), written)
+    stats = pipelined.stats()
+    assert stats['frames'] == 20 and stats['depth'] == 2
+    assert stats['max_queued'] <= 2
+
+    pipelined = PipelinedWriter(SlowWriter(fail_at=3), depth=2)
+    with pytest.raises(IOError):
+        with pipelined.saving(None, 'out', None):
+            for frame in frames:
+                pipelined.write_frame(frame.tobytes())
+    with pytest.raises(ValueError):
+        PipelinedWriter(object())
+    with pytest.raises(ValueError):
+        PipelinedWriter(SlowWriter(), depth=0)
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_save_pipeline(tmpdir):
+    path = tmpdir.join('pipeline').strpath
+    m = Movie(dt=1.0 / 14, fig_kwargs={'figsize': (3, 2)})
+    m.add_image(np.random.rand(8, 10, 10), c_title='value')
+    m.add_time_label()
+    progress = RenderProgress()
+    m.save(path, writer_name='ffmpeg_raw', pipeline=2, progress=progress, report_path=path + '.json')
+    assert os.path.getsize(path + '.mp4') > 0
+    assert progress.done == 8
+    assert progress.info['pipeline']['frames'] == 8
+    with pytest.raises(ValueError):
+        m.save(path, writer_name='ffmpeg', pipeline=2)
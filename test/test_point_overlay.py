@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from Animate.Movie import Movie
+from Animate.compositor import compositor_support
+
+
+def test_add_point_overlay(tmpdir):
+    m = Movie(dt=1, fig_kwargs={'figsize': (3, 3)})
+    m.add_image(np.zeros((4, 20, 20)))
+    xy = np.random.rand(4, 50, 2) * 20
+    with pytest.raises(ValueError):
+        m.add_point_overlay(0, xy[:3])
+    with pytest.raises(ValueError):
+        m.add_point_overlay(0, xy[:, :, 0])
+    with pytest.raises(ValueError):
+        m.add_point_overlay(0, xy, sizes=np.ones(49))
+    with pytest.raises(RuntimeError):
+        Movie().add_point_overlay(0, xy)
+    # the length of the traces without images
+    traces = Movie()
+    traces.add_axis('t', 'v')
+    traces.add_trace(np.random.rand(4))
+    traces.add_point_overlay(0, xy, axis_type='trace')
+    with pytest.raises(ValueError):
+        traces.add_point_overlay(0, xy[:3], axis_type='trace')
+    path = tmpdir.join('xy.npy').strpath
+    np.save(path, xy)
+    m.add_point_overlay(0, path, sizes=np.full((4, 50), 10.0), colors=np.random.rand(4, 50), cmap='viridis')
+    assert isinstance(m.annotations[0]['xy'], np.memmap)
+    assert m.annotations[0]['sizes_per_frame'] and m.annotations[0]['colors_per_frame']
+    m.add_point_overlay(0, xy, colors='red')
+    assert not m.annotations[1]['colors_per_frame']
+    assert 'point overlays' in compositor_support(m)
+
+
+def test_draw_point_overlay():
+    m = Movie(dt=1, fig_kwargs={'figsize': (3, 3)})
+    m.add_image(np.zeros((3, 20, 20)), style='dark_img')
+    xy = np.full((3, 2, 2), np.nan)
+    xy[0, 0] = 5, 5
+    xy[2] = [[5, 5], [15, 15]]
+    m.add_point_overlay(0, xy, sizes=[40, 40], colors=np.array([[1, 0, 0, 1], [0, 1, 0, 1]]))
+    frames = list(m.iter_frames(copy=True))
+
+    empty = Movie(dt=1, fig_kwargs={'figsize': (3, 3)})
+    empty.add_image(np.zeros((3, 20, 20)), style='dark_img')
+    reference = list(empty.iter_frames(copy=True))
+
+    red = [(f[..., 0] > 200) & (f[..., 1] < 50) for f in frames]
+    green = [(f[..., 1] > 100) & (f[..., 0] < 50) for f in frames]
+    assert red[0].any() and not green[0].any()
+    # frame 1 has only missing points: the same pixels as no overlay
+    assert np.array_equal(frames[1], reference[1])
+    assert red[2].any() and green[2].any()
+    # the red point of frame 2 is at the same place as in frame 0
+    assert np.array_equal(red[0], red[2])
+
+
+def test_point_overlay_per_frame():
+    m = Movie(dt=1, fig_kwargs={'figsize': (3, 3)})
+    m.add_image(np.zeros((2, 20, 20)), style='dark_img')
+    xy = np.full((2, 1, 2), 10.0)
+    sizes = np.array([[10.0], [200.0]])
+    colors = np.array([[[1, 0, 0, 1]], [[0, 0, 1, 1]]])
+    m.add_point_overlay(0, xy, sizes=sizes, colors=colors)
+    first, second = list(m.iter_frames(copy=True))
+    assert (first[..., 0] > 200).sum() < (second[..., 2] > 200).sum()
+    assert not (first[..., 2] > 200).any()
@@ -1,7 +1,10 @@
 import pytest
+import io
+import json
 import os
 import numpy as np
 from Animate.Movie import Movie
+from Animate.progress import PrintProgress, RenderProgress
 from matplotlib.animation import writers
 import matplotlib.pyplot as plt
 
@@ -33,12 +36,114 @@ def test_ffmpeg(tmpdir):
     assert os.path.isfile(path + '.mp4')
 
 
-def test_save_fail(tmpdir):
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_ffmpeg_raw(tmpdir):
+    path = tmpdir.join('test_raw').relto('')
+    m = Movie(dt=1.0/14, height_ratio=2)
+    img = np.arange(100).reshape(4, 5, 5)
+    m.add_image(img, style='dark_img')
+    m.save(path, writer_name='ffmpeg_raw')
+    assert os.path.isfile(path + '.mp4')
+
+
+@pytest.mark.skipif('ffmpeg' not in writers.avail, reason='No ffmpeg to save with')
+def test_ffmpeg_workers(tmpdir):
+    path = tmpdir.join('test3').relto('')
+    m = Movie(dt=1.0/14, height_ratio=2)
+    img = np.arange(250).reshape(10, 5, 5)
+    m.add_image(img, style='dark_img')
+    m.add_axis('x', 'y')
+    m.add_trace(np.arange(10))
+    m.add_time_label()
+    m.save(path, workers=3)
+    assert os.path.isfile(path + '.mp4')
+    assert [p for p in os.listdir(str(tmpdir)) if p.startswith('segments_')] == []
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_save_progress(tmpdir):
+    path = tmpdir.join('test4').relto('')
+    report_path = tmpdir.join('report.json').strpath
+    m = Movie(dt=1.0/14, height_ratio=2)
+    img = np.arange(150).reshape(6, 5, 5)
+    m.add_image(img, style='dark_img')
+    progress = RenderProgress()
+    m.save(path, writer_name='ffmpeg_raw', progress=progress, report_path=report_path)
+    assert [f[0] for f in progress.frames] == list(range(6))
+    assert all(f[2] is not None for f in progress.frames)
+    assert progress.eta == 0
+    with open(report_path) as f:
+        report = json.load(f)
+    assert report['frames_done'] == 6
+    assert report['writer'] == 'RawPipeWriter'
+    assert report['stages']['draw']['total'] > 0
+
+    # stock writers draw while grabbing the frame
+    progress = RenderProgress()
+    m.save(path, progress=progress)
+    assert progress.stage_stats()['draw'] is None
+    assert progress.done == 6
+
+    progress = RenderProgress()
+    m.save(path, workers=2, progress=progress)
+    assert sorted(f[0] for f in progress.frames) == list(range(6))
+    assert progress.info['workers'] == 2
+
+    stream = io.StringIO()
+    m.save(path, progress=PrintProgress(interval=1000, stream=stream))
+    lines = stream.getvalue().splitlines()
+    assert lines[0].startswith('frame 1/6')
+    assert lines[1].startswith('frame 6/6')
+    assert lines[2].startswith('rendered 6 frames')
+
+    with pytest.raises(ValueError) as ex:
+        m.save(path, progress='yes')
+    assert 'progress should be True or a RenderProgress' in str(ex.value)
+
+
+@pytest.mark.skipif('imagemagick' not in writers.avail, reason='No imagemagick to save with')
+def test_imagemagick_workers_fail(tmpdir):
+    path = tmpdir.join('test').relto('')
+    m = Movie(dt=1.0/14, height_ratio=2)
+    img = np.arange(100).reshape(4, 5, 5)
+    m.add_image(img, style='dark_img')
+    with pytest.raises(ValueError) as ex:
+        m.save(path, writer_name='imagemagick', workers=2)
+    assert 'only supported with ffmpeg' in str(ex.value)
+
+
+def test_save_fail(tmpdir, monkeypatch):
     path = tmpdir.join('test').relto('')
-    writers.avail = []
+    monkeypatch.setattr(writers, 'avail', [])
     m = Movie(dt=1.0 / 14, height_ratio=2)
     img = np.arange(100).reshape(4, 5, 5)
     m.add_image(img, style='dark_img')
     with pytest.raises(ValueError) as ex:
         m.save(path)
     assert 'Could not find' in str(ex.value)
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_preview(tmpdir):
+    path = tmpdir.join('preview').relto('')
+    m = Movie(dt=1.0/14, height_ratio=2)
+    img = np.arange(40 * 25).reshape(40, 5, 5)
+    m.add_image(img, style='dark_img')
+    m.add_axis('x', 'y')
+    m.add_trace(np.arange(40))
+    m.add_time_label()
+    progress = RenderProgress()
+    m.preview(path, stride=7, start=3, progress=progress)
+    assert os.path.isfile(path + '.mp4')
+    assert [f[0] for f in progress.frames] == list(range(3, 40, 7))
+
+    progress = RenderProgress()
+    m.save(path, writer_name='ffmpeg_raw', preview=True, workers=2, progress=progress)
+    assert sorted(f[0] for f in progress.frames) == list(range(0, 40, 10))
+
+    progress = RenderProgress()
+    m.save(path, frames=[5, 1, 30], progress=progress)
+    assert [f[0] for f in progress.frames] == [5, 1, 30]
+    with pytest.raises(ValueError) as ex:
+        m.save(path, frames=[50])
+    assert 'is not a frame of the movie' in str(ex.value)
@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+from Animate.Movie import Movie
+from Animate.Animation import Animation, frame_range, select_frames
+from Animate.segments import split_frames
+
+
+def test_frame_range():
+    m = Movie(dt=1.0 / 14)
+    img = np.arange(250).reshape(10, 5, 5)
+    m.add_image(img, style='dark_img')
+    assert list(frame_range(m)) == list(range(10))
+
+    m = Movie(dt=1)
+    img = np.arange(100).reshape(5, 20)
+    m.add_image(img, animation_type='window', window_size=5, window_step=2)
+    assert list(frame_range(m)) == list(range(0, 15, 2))
+
+    with pytest.raises(RuntimeError) as ex:
+        frame_range(Movie())
+    assert 'At least one image is needed' in str(ex.value)
+
+
+def test_split_frames():
+    chunks = split_frames(range(10), 3)
+    assert [list(c) for c in chunks] == [[0, 1, 2], [3, 4, 5], [6, 7, 8, 9]]
+    chunks = split_frames(range(0, 15, 2), 2)
+    assert [list(c) for c in chunks] == [[0, 2, 4, 6], [8, 10, 12, 14]]
+    chunks = split_frames(range(2), 4)
+    assert [list(c) for c in chunks] == [[0], [1]]
+
+
+def test_animation_frames():
+    m = Movie(dt=1.0 / 14)
+    img = np.arange(250).reshape(10, 5, 5)
+    m.add_image(img, style='dark_img')
+    a = Animation(m, frames=range(4, 8))
+    assert list(a.new_frame_seq()) == [4, 5, 6, 7]
+    a = Animation(m)
+    assert list(a.new_frame_seq()) == list(range(10))
+
+
+def test_window_running_line():
+    m = Movie(dt=0.5)
+    img = np.arange(400).reshape(5, 80)
+    m.add_image(img, animation_type='window', window_size=7, window_step=3)
+    m.add_axis('x', 'y')
+    m.add_trace(np.arange(80))
+    a = Animation(m, frames=range(30, 60, 3))
+    a._init_draw()
+    for frame in a.new_frame_seq():
+        a._draw_frame(frame)
+    rect = a.running_lines[0]
+    assert np.isclose(rect.get_x(), (57 - 7 // 2) * 0.5)
+    assert np.isclose(rect.get_width(), 7 * 0.5)
+
+
+def test_select_frames():
+    m = Movie(dt=1)
+    m.add_image(np.random.rand(5, 40), animation_type='window', window_size=5, window_step=5)
+    assert select_frames(m) == frame_range(m)
+    assert list(select_frames(m, slice(1, None, 3))) == [5, 20]
+    a = Animation(m, frames=select_frames(m, slice(None, None, 2)), interpolation='nearest')
+    assert list(a.frames) == [0, 10, 20, 30]
+    a._init_draw()
+    a._draw_frame(20)
+    assert a.images[0].get_interpolation() == 'nearest'
+    assert np.array_equal(a.images[0].get_array(), m.images[0]['data'][:, 20:25])
@@ -0,0 +1,108 @@
+import inspect
+import json
+import os
+
+import numpy as np
+import pytest
+from matplotlib.animation import writers
+from Animate.Movie import Movie
+from Animate.cli import main
+from Animate.spec import METHODS, MOVIE_ARGUMENTS, SAVE_ARGUMENTS, build_movie, load_spec, save_arguments, \
+    validate_spec
+
+
+def signature(function):
+    try:
+        spec = inspect.getfullargspec(function)
+    except AttributeError:
+        spec = inspect.getargspec(function)
+    n_required = len(spec.args) - len(spec.defaults or ())
+    keywords = getattr(spec, 'varkw', getattr(spec, 'keywords', None))
+    return tuple(spec.args[1:n_required]), tuple(spec.args[n_required:]), keywords is not None
+
+
+def test_methods_match_movie():
+    for method, arguments in METHODS.items():
+        assert signature(getattr(Movie, method)) == arguments, method
+    assert signature(Movie.__init__)[1] == MOVIE_ARGUMENTS
+    required, optional, _ = signature(Movie.save)
+    assert set(required + optional) - set(SAVE_ARGUMENTS) == {'progress'}
+
+
+def write_spec(tmpdir, spec, name='spec.json'):
+    np.save(tmpdir.join('stack.npy').strpath, np.random.rand(6, 8, 8))
+    np.save(tmpdir.join('trace.npy').strpath, np.random.rand(6))
+    path = tmpdir.join(name).strpath
+    with open(path, 'w') as f:
+        json.dump(spec, f)
+    return path
+
+
+SPEC = {'movie': {'dt': 0.5, 'fig_kwargs': {'figsize': [3, 3]}},
+        'steps': [{'add_image': {'data': 'stack.npy', 'c_title': 'value'}},
+                  {'add_axis': {'x_label': 't', 'y_label': 'v'}},
+                  {'add_trace': {'data': 'trace.npy', 'label': 'mean'}},
+                  {'add_time_label': {}},
+                  {'add_circle_annotation': {'axis': 0, 'x': 4, 'y': 4, 'radius': 2, 'fill': False}}],
+        'save': {'path': 'out', 'writer_name': 'ffmpeg_raw', 'frames': {'step': 2}}}
+
+
+def test_validate_spec(tmpdir):
+    path = write_spec(tmpdir, SPEC)
+    assert validate_spec(load_spec(path), tmpdir.strpath) == []
+    bad = {'movie': {'colour': 'red'},
+           'steps': [{'add_trace': {'data': 'missing.npy'}},
+                     {'add_image': {'data': 'stack.npy', 'cmap': 'gray'}},
+                     {'add_axis': {'x_label': 1, 'y_label': 'v'}},
+                     {'add_text_annotation': {'axis': 1, 'x': 1, 'y': '2', 'text': 'a'}},
+                     {'add_annotation': {'axis': 0, 'xy': 5, 'xy_text': [1, 1], 'text': 'a'}},
+                     {'add_image': {}, 'add_axis': {}}],
+           'save': {'dpi': 'high', 'fps': 30, 'checkpoint': [10]}}
+    errors = validate_spec(bad, tmpdir.strpath)
+    expected = ['unknown argument colour', 'data file not found', 'axis 0 is added by a later add_axis',
+                'unknown argument cmap', 'x_label should be a string', 'y should be a number', 'there is no image 1',
+                'xy is not valid', 'mapping of one method', 'path should be a string', 'dpi should be a number',
+                'checkpoint should be a number']
+    assert len(errors) == len(expected)
+    for error, message in zip(errors, expected):
+        assert message in error
+    with pytest.raises(ValueError):
+        load_spec(tmpdir.join('stack.npy').strpath)
+
+
+def test_build_movie(tmpdir):
+    path = write_spec(tmpdir, SPEC)
+    m = build_movie(load_spec(path), tmpdir.strpath)
+    assert m.images[0]['data'].shape == (6, 8, 8)
+    assert len(m.traces) == 1 and len(m.labels) == 1 and len(m.annotations) == 1
+    output, kwargs = save_arguments(SPEC, tmpdir.strpath)
+    assert output == tmpdir.join('out').strpath
+    assert kwargs['frames'] == slice(None, None, 2)
+
+
+def test_yaml_spec(tmpdir):
+    yaml = pytest.importorskip('yaml')
+    path = tmpdir.join('spec.yml').strpath
+    with open(path, 'w') as f:
+        yaml.safe_dump(SPEC, f)
+    assert load_spec(path) == SPEC
+
+
+def test_cli(tmpdir, capsys):
+    path = write_spec(tmpdir, SPEC)
+    assert main(['--validate', path]) == 0
+    assert main(['--dry-run', path]) == 0
+    out = capsys.readouterr().out
+    assert '1 specs are valid' in out
+    assert 'stack.npy (6, 8, 8)' in out and 'trace.npy (6,)' in out
+    bad = write_spec(tmpdir, {'steps': []}, 'bad.json')
+    assert main(['--validate', path, bad]) == 1
+    assert 'at least one add_image step' in capsys.readouterr().err
+
+
+@pytest.mark.skipif('ffmpeg_raw' not in writers.avail, reason='No ffmpeg to save with')
+def test_cli_render(tmpdir):
+    spec = dict(SPEC, save={'path': 'movies/out', 'writer_name': 'ffmpeg_raw'})
+    path = write_spec(tmpdir, spec)
+    assert main(['--quiet', path]) == 0
+    assert os.path.getsize(tmpdir.join('movies', 'out.mp4').strpath) > 0
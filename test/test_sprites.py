@@ -0,0 +1,127 @@
+import numpy as np
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import pytest
+from Animate.Movie import Movie
+from Animate.Animation import Animation
+from Animate.compositor import Compositor
+from Animate import sprites
+from Animate.sprites import SpriteCache, SpriteText, format_labels
+
+
+def render(text_class, strings, **kwargs):
+    fig = plt.figure(figsize=(3, 2))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    cache = SpriteCache()
+    if text_class is SpriteText:
+        text = SpriteText(0.2, 0.4, '', cache, transform=ax.transAxes, **kwargs)
+    else:
+        text = text_class(0.2, 0.4, '', transform=ax.transAxes, **kwargs)
+    ax.add_artist(text)
+    frames = []
+    # twice: the second time from the cache
+    for s in strings + strings:
+        text.set_text(s)
+        fig.canvas.draw()
+        frames.append(np.frombuffer(fig.canvas.buffer_rgba(), np.uint8).copy())
+    plt.close(fig)
+    return frames, cache
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'ha': 'center', 'va': 'top', 'size': 20},
+                                    {'ha': 'right', 'va': 'bottom', 'color': 'red'}])
+def test_sprite_text(kwargs):
+    strings = ['1.25s', 'frame 12', '\u00e9t\u00e9']
+    # with whole pixel advances the glyphs are where Text draws them
+    with mpl.rc_context({'text.hinting_factor': 1}):
+        reference, _ = render(plt.Text, strings, **kwargs)
+        frames, cache = render(SpriteText, strings, **kwargs)
+        for a, b in zip(reference, frames):
+            assert np.array_equal(a, b)
+        stats = cache.stats()
+        assert stats['misses'] == stats['sprites'] and stats['hits'] > stats['misses']
+        # the alpha of the color is rounded differently
+        reference, _ = render(plt.Text, strings, alpha=0.3, **kwargs)
+        frames, _ = render(SpriteText, strings, alpha=0.3, **kwargs)
+        for a, b in zip(reference, frames):
+            assert np.abs(a.astype(int) - b).max() <= 1
+    # else they are shifted to their subpixel positions
+    blank, _ = render(plt.Text, [''])
+    reference, _ = render(plt.Text, strings, **kwargs)
+    frames, cache = render(SpriteText, strings, **kwargs)
+    reference = [r.astype(int) for r in reference]
+    for a, b in zip(reference, frames):
+        assert np.abs(a - b).sum() < 0.3 * np.abs(a - blank[0]).sum()
+
+
+def test_sprite_fallback(monkeypatch):
+    # math text, several lines and rotated texts are drawn by Text
+    strings = ['$x^2$', 'frame 12\nline two', '1.25s']
+    reference, _ = render(plt.Text, strings, rotation=30)
+    frames, cache = render(SpriteText, strings, rotation=30)
+    for a, b in zip(reference, frames):
+        assert np.array_equal(a, b)
+    assert len(cache) == 0
+
+    # and so are the texts of a font API that does not lay out strings like this one
+    glyph = sprites._FontMetrics.glyph
+
+    def wide_glyph(self, c):
+        index, advance, cbox = glyph(self, c)
+        return index, advance + 64, cbox
+
+    strings = ['1.25s', 'frame 12']
+    reference, _ = render(plt.Text, strings)
+    monkeypatch.setattr(sprites._FontMetrics, 'glyph', wide_glyph)
+    frames, cache = render(SpriteText, strings)
+    for a, b in zip(reference, frames):
+        assert np.array_equal(a, b)
+    assert len(cache) == 0
+    # and the numpy backend leaves the movie to matplotlib
+    m = Movie(dt=0.5)
+    m.add_image(np.random.rand(2, 5, 5))
+    m.add_time_label()
+    a = Animation(m)
+    a._init_draw()
+    a._draw_frame(0)
+    assert 'sprites' in Compositor(a).setup()
+    plt.close(a.fig)
+
+
+def test_sprite_cache():
+    cache = SpriteCache(max_bytes=1000)
+    with pytest.raises(ValueError):
+        SpriteCache(max_bytes=0)
+    for i in range(4):
+        cache.put(i, i, 300)
+    assert len(cache) == 3 and cache.n_bytes == 900 and cache.evictions == 1
+    assert cache.get(0) is None and cache.get(1) == 1
+    # 1 was used last, 2 goes first
+    cache.put(4, 4, 300)
+    assert cache.get(2) is None and cache.get(1) == 1
+    # a sprite larger than the cache is kept alone
+    cache.put(5, 5, 5000)
+    assert len(cache) == 1 and cache.get(5) == 5
+
+
+def test_animation_labels():
+    m = Movie(dt=0.05)
+    m.add_image(np.random.rand(60, 5, 5))
+    m.add_time_label()
+    m.add_label(0.5, 0.5, np.arange(60) % 2, s_format='%d', color='red')
+    assert format_labels('%.1fs', np.arange(6) * 0.5, [1, 3]) == {1: '0.5s', 3: '1.5s'}
+    assert format_labels('%d/%d', [(1, 2), (3, 4)], range(2)) == {0: '1/2', 1: '3/4'}
+    a = Animation(m)
+    a._init_draw()
+    for frame in a.frames:
+        a._draw_frame(frame)
+        a.fig.canvas.draw()
+        assert a.labels[0].get_text() == '%.2fs' % (frame * 0.05)
+        assert a.labels[1].get_text() == '%d' % (frame % 2)
+    stats = a.text_sprites.stats()
+    # every time label is a new string, its glyphs are rendered once
+    assert stats['misses'] == stats['sprites'] < 100
+    assert stats['hits'] > 2 * stats['misses']
+    plt.close(a.fig)
@@ -0,0 +1,72 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from Animate.Movie import Movie
+from Animate.Animation import Animation
+from Animate.static_layer import StaticLayer
+
+
+def render_both(m):
+    """ frames drawn in full and with a StaticLayer, the StaticLayer and its Animation """
+    frames = []
+    for cached in (False, True):
+        a = Animation(m)
+        a._init_draw()
+        layer = None
+        buffers = []
+        for frame in a.frames:
+            a._draw_frame(frame)
+            if cached:
+                if layer is None:
+                    layer = StaticLayer(a.fig, a._drawn_artists)
+                layer.draw()
+            else:
+                a.fig.canvas.draw()
+            buffers.append(np.frombuffer(a.fig.canvas.buffer_rgba(), np.uint8).copy())
+        frames.append(buffers)
+        plt.close(a.fig)
+    return frames[0], frames[1], layer, a
+
+
+def test_static_layer_movie():
+    img = np.random.rand(6, 10, 10)
+    m = Movie(dt=0.5, fig_kwargs={'figsize': (4, 4)})
+    m.add_image(img, c_title='value')
+    m.add_image(img[:, ::-1], style='light_img')
+    m.add_axis('t', 'v')
+    m.add_trace(img.mean(axis=(1, 2)), label='mean')
+    m.add_trace(img.max(axis=(1, 2)))
+    m.add_time_label()
+    m.add_text_annotation(0, 2, 2, 'static', color='red')
+    m.add_circle_annotation(1, 5, 5, 2, fill=False, color='white')
+    xy = np.stack([np.linspace(1, 8, 6)] * 2, axis=1)
+    m.add_variable_annotation(0, xy, xy + 1, ['%d' % i for i in range(6)], color='white')
+    full, cached, layer, a = render_both(m)
+    for f, c in zip(full, cached):
+        assert np.array_equal(f, c)
+    assert layer.full_draws == 0
+    # the trace lines are in the background, the running line and everything above it is redrawn
+    assert len(a.traces) == 2 and a.running_lines[0] in layer.layers[-1]
+    assert not any(line in redrawn for redrawn in layer.layers for line in a.traces)
+
+
+def test_static_layer_window():
+    img = np.random.rand(8, 200)
+    m = Movie(dt=0.1, fig_kwargs={'figsize': (4, 4)})
+    m.add_image(img, animation_type='window', window_size=29, window_step=20)
+    m.add_axis('t', 'v')
+    m.add_trace(img.mean(axis=0))
+    full, cached, layer, a = render_both(m)
+    for f, c in zip(full, cached):
+        assert np.array_equal(f, c)
+
+
+def test_static_layer_fallback():
+    img = np.random.rand(4, 10, 10)
+    m = Movie(dt=1, fig_kwargs={'figsize': (4, 4)})
+    m.add_image(img, c_title='value')
+    # a label that moves over the colorbar, which is drawn after the image axes
+    m.add_label(0.5, 0.5, ['x', 'x' * 20, 'x', 'x' * 20], size=20)
+    full, cached, layer, a = render_both(m)
+    for f, c in zip(full, cached):
+        assert np.array_equal(f, c)
+    assert layer.full_draws > 0
@@ -0,0 +1,82 @@
+import numpy as np
+from Animate.Movie import Movie
+from Animate.FrameSource import ArraySource
+from Animate.stats import StreamingHistogram, stack_stats
+
+
+def test_small_exact():
+    data = np.arange(100).reshape(4, 5, 5)
+    stats = stack_stats(data, (10, 90))
+    assert stats.min == 0
+    assert stats.max == 99
+    assert np.isclose(stats.percentiles[10], 9.9)
+    assert np.isclose(stats.percentiles[90], 89.1)
+    assert stats.error == 0
+    assert stats.count == 100
+
+    data = np.array([np.nan, 1, 2, 3, np.nan])
+    stats = stack_stats(data, (50,))
+    assert stats.min == 1
+    assert stats.max == 3
+    assert stats.percentiles[50] == 2
+    assert stats.count == 3
+
+
+def test_integer_exact_chunked():
+    data = np.random.RandomState(0).randint(-3000, 30000, size=(50, 16, 16)).astype(np.int16)
+    stats = stack_stats(data, (0.1, 50, 99.9), chunk_size=1000)
+    assert stats.error == 0
+    assert stats.min == data.min()
+    assert stats.max == data.max()
+    for q in (0.1, 50, 99.9):
+        assert np.isclose(stats.percentiles[q], np.percentile(data, q))
+
+    data = data.astype(np.uint16) // 3
+    stats = stack_stats(ArraySource(data), (25,), chunk_size=1000)
+    assert np.isclose(stats.percentiles[25], np.percentile(data, 25))
+
+
+def test_float_approximate():
+    rs = np.random.RandomState(1)
+    # the range grows from chunk to chunk so the histogram is widened several times
+    data = rs.randn(40, 32, 32) * np.arange(1, 41)[:, None, None] + np.arange(40)[:, None, None]
+    data[3, 4, 5] = np.nan
+    stats = stack_stats(data, (1, 99.9), n_bins=1024, chunk_size=3000)
+    assert 0 < stats.error < (np.nanmax(data) - np.nanmin(data)) / 512
+    assert stats.count == data.size - 1
+    assert stats.min == np.nanmin(data)
+    assert stats.max == np.nanmax(data)
+    for q in (1, 99.9):
+        assert abs(stats.percentiles[q] - np.nanpercentile(data, q)) <= stats.error
+
+
+def test_sample():
+    data = np.arange(1000, dtype=np.float64).reshape(10, 10, 10)
+    stats = stack_stats(data, (50,), sample=2)
+    assert stats.count == 500
+    assert stats.max == 899
+    assert abs(stats.percentiles[50] - np.percentile(data[::2], 50)) <= stats.error
+
+
+def test_histogram_empty():
+    histogram = StreamingHistogram()
+    histogram.update(np.array([np.nan, np.nan]))
+    assert histogram.count == 0
+    assert np.isnan(histogram.percentile(50))
+
+
+def test_add_image_ylim_error():
+    m = Movie()
+    img = np.arange(100).reshape(4, 5, 5)
+    m.add_image(img, ylim_type='p_both', ylim_value=10)
+    assert m.images[0]['ylim_error'] == 0
+    assert 'ylim_sample' not in m.images[0]
+
+    img = np.random.RandomState(2).rand(64, 256, 256)
+    m.add_image(img, ylim_type='p_both', ylim_value=1, ylim_sample=4)
+    image = m.images[1]
+    assert image['ylim_error'] > 0
+    assert abs(image['ymin'] - np.percentile(img[::4], 1)) <= image['ylim_error']
+    assert abs(image['ymax'] - np.percentile(img[::4], 99)) <= image['ylim_error']
+    m.add_image(img, ylim_type='same', ylim_value=1)
+    assert m.images[2]['ylim_error'] == image['ylim_error']
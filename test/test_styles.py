@@ -0,0 +1,33 @@
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from Animate.Movie import Movie
+from Animate.styles import custom_styles, resolve_style, style_context
+
+
+def test_resolve_style():
+    for style in ('dark_img', 'light_trace', ['dark_img', {'image.cmap': 'magma'}], 'dark_background'):
+        with plt.style.context(style, after_reset=True):
+            expected = dict.copy(mpl.rcParams)
+        assert resolve_style(style) == expected
+    assert resolve_style(['dark_img', {'image.cmap': 'magma'}])['image.cmap'] == 'magma'
+    # resolved once
+    assert resolve_style('dark_trace') is resolve_style('dark_trace')
+
+
+def test_style_context():
+    with mpl.rc_context({'image.cmap': 'gray', 'lines.linewidth': 7}):
+        before = dict.copy(mpl.rcParams)
+        with style_context(['light_img', {'image.cmap': 'magma'}]) as rc:
+            assert mpl.rcParams['image.cmap'] == 'magma'
+            assert mpl.rcParams['lines.linewidth'] == mpl.rcParamsDefault['lines.linewidth']
+            assert rc['axes.spines.top'] is False
+        assert dict.copy(mpl.rcParams) == before
+
+
+def test_custom_styles():
+    styles = custom_styles()
+    assert sorted(styles) == ['dark_img', 'dark_trace', 'light_img', 'light_trace']
+    assert custom_styles() is styles
+    m = Movie()
+    for name in styles:
+        assert name in plt.style.library and m.styles[name] is styles[name]